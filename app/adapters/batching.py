@@ -0,0 +1,73 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from app.adapters.prompt_builder import build_batch_prompt, parse_batch_decisions
+from app.core.exceptions import LLMBatchUnusableError, LLMGenerationError, LLMTransientError
+from app.domain.schemas import AgentDecisionRequest, LLMResponse
+
+logger = logging.getLogger(__name__)
+
+class BatchPromptMixin(ABC):
+    """
+    Batched decisions for adapters exposing `complete(prompt) -> (raw_text, usage)`.
+
+    One request carries the shared market block plus K agents. The mixin never retries
+    on its own: when the envelope is malformed, every agent maps to LLMBatchUnusableError,
+    and so does any agent missing from an otherwise valid answer. LLMRouter then splits
+    the group or retries the agents alone, each call taking its own pool slot and
+    rate-limit token.
+    """
+    supports_batch = True
+    name = "llm"
+
+    @abstractmethod
+    async def complete(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        """One non-streamed request under the adapter's request policy: (raw text, usage)."""
+
+    async def generate_batch_decisions(
+        self,
+        requests: List[AgentDecisionRequest],
+        market_data: Dict[str, Any],
+        news_context: str = "",
+        provider: Optional[str] = None
+    ) -> Dict[str, Union[LLMResponse, Exception]]:
+        if len(requests) == 1:
+            r = requests[0]
+            try:
+                decision = await self.generate_trade_decision(
+                    agent_name=r.agent_name,
+                    portfolio=r.portfolio,
+                    market_data=market_data,
+                    rank=r.rank,
+                    leader_gap=r.leader_gap,
+                    persona=r.persona,
+                    news_context=news_context
+                )
+            except Exception as e:
+                return {r.key: e}
+            return {r.key: decision}
+
+        logger.info(f"Sending batch prompt for {len(requests)} agents to {self.name}...")
+        try:
+            raw_text, usage = await self.complete(build_batch_prompt(requests, market_data))
+            parsed = parse_batch_decisions(raw_text, [r.key for r in requests], self.name)
+        except LLMTransientError as e:
+            # Already retried by the request policy; splitting would only multiply the failures
+            return {r.key: e for r in requests}
+        except LLMGenerationError as e:
+            logger.warning(f"{self.name} batch of {len(requests)} unusable ({e})")
+            unusable = LLMBatchUnusableError(f"{self.name} batch of {len(requests)} unusable: {e}")
+            return {r.key: unusable for r in requests}
+
+        results: Dict[str, Union[LLMResponse, Exception]] = {}
+        for r in requests:
+            decision = parsed.get(r.key)
+            if decision is not None:
+                decision.usage = {**usage, "batch_size": len(requests)}
+                results[r.key] = decision
+            else:
+                results[r.key] = LLMBatchUnusableError(f"{self.name} batch left out {r.agent_name}")
+        if len(parsed) < len(requests):
+            logger.warning(f"{self.name} batch answered {len(parsed)}/{len(requests)} agents")
+        return results
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Mapping
+from typing import Any, Dict, Optional, Union
+
+from app.ports.llm_port import LLMPort, load_llm_adapter
+from app.domain.schemas import LLMResponse, PortfolioRead
+
+logger = logging.getLogger(__name__)
+
+def _plain(obj: Any) -> Any:
+    # Snapshot views and read-only quotes hash like the dicts they stand for
+    return dict(obj) if isinstance(obj, Mapping) else str(obj)
+
+class CachedLLMAdapter(LLMPort):
+    """
+    Memoizes another LLMPort by the full decision context.
+    With a `path`, entries are appended to a JSONL file so repeated backtests of the
+    same scenario only pay for the LLM once.
+    """
+
+    def __init__(
+        self,
+        inner: Union[LLMPort, str],
+        path: Optional[str] = None,
+        inner_kwargs: Optional[Dict[str, Any]] = None
+    ):
+        # `inner` may be a "module:Class" spec so the adapter can be built inside worker processes
+        self.inner = load_llm_adapter(inner, **(inner_kwargs or {})) if isinstance(inner, str) else inner
+        self.path = path
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        self._cache[row["key"]] = row["response"]
+            logger.info(f"Loaded {len(self._cache)} cached LLM decisions from {path}")
+
+    @staticmethod
+    def _key(**context: Any) -> str:
+        raw = json.dumps(context, sort_keys=True, default=_plain)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def generate_trade_decision(
+        self, 
+        agent_name: str,
+        portfolio: PortfolioRead, 
+        market_data: Dict[str, Any],
+        rank: int,
+        leader_gap: float,
+        persona: str = "",
+        news_context: str = "",
+        provider: Optional[str] = None
+    ) -> LLMResponse:
+        portfolio_dump = portfolio.model_dump()
+        if not portfolio_dump["open_orders"]:
+            del portfolio_dump["open_orders"] # Keeps keys of caches recorded before resting orders stable
+        context = dict(
+            agent_name=agent_name,
+            portfolio=portfolio_dump,
+            market_data=market_data,
+            rank=rank,
+            leader_gap=round(leader_gap, 2),
+            persona=persona,
+            news_context=news_context
+        )
+        if provider is not None:
+            context["provider"] = provider # Keeps keys of caches recorded before routing stable
+        key = self._key(**context)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return LLMResponse.model_validate(cached)
+
+        self.misses += 1
+        decision = await self.inner.generate_trade_decision(
+            agent_name=agent_name,
+            portfolio=portfolio,
+            market_data=market_data,
+            rank=rank,
+            leader_gap=leader_gap,
+            persona=persona,
+            news_context=news_context,
+            provider=provider
+        )
+        response = decision.model_dump(mode="json")
+        self._cache[key] = response
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, "response": response}) + "\n")
+        return decision
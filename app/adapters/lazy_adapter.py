@@ -0,0 +1,42 @@
+import logging
+from typing import Dict, Optional, Union
+
+from app.domain.schemas import LLMResponse
+from app.ports.llm_port import LLMPort, load_llm_adapter
+
+logger = logging.getLogger(__name__)
+
+class LazyLLMAdapter(LLMPort):
+    """
+    Stand-in that imports and builds a "module:Class" adapter on first use, so
+    provider SDKs (google.generativeai, ...) stay out of a cold start that never calls them.
+    """
+
+    def __init__(self, spec: str, **kwargs):
+        self.spec = spec
+        self.kwargs = kwargs
+        self._adapter: Optional[LLMPort] = None
+
+    @property
+    def adapter(self) -> LLMPort:
+        if self._adapter is None:
+            logger.info(f"Loading LLM adapter {self.spec}")
+            self._adapter = load_llm_adapter(self.spec, **self.kwargs)
+        return self._adapter
+
+    @property
+    def supports_batch(self) -> bool:
+        return self.adapter.supports_batch
+
+    @property
+    def supports_streaming(self) -> bool:
+        return self.adapter.supports_streaming
+
+    async def generate_trade_decision(self, *args, **kwargs) -> LLMResponse:
+        return await self.adapter.generate_trade_decision(*args, **kwargs)
+
+    async def generate_batch_decisions(self, *args, **kwargs) -> Dict[str, Union[LLMResponse, Exception]]:
+        return await self.adapter.generate_batch_decisions(*args, **kwargs)
+
+    async def stream_trade_decision(self, *args, **kwargs) -> LLMResponse:
+        return await self.adapter.stream_trade_decision(*args, **kwargs)
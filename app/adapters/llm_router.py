@@ -0,0 +1,263 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from app.core.config import settings
+from app.core.exceptions import LLMBatchUnusableError, LLMGenerationError, LLMTransientError
+from app.core.rate_limit import SlidingWindowRateLimiter
+from app.domain.schemas import AgentDecisionRequest, LLMResponse, LLMTrade, PortfolioRead
+from app.ports.llm_port import LLMPort
+
+logger = logging.getLogger(__name__)
+
+class ProviderHealth:
+    """Consecutive transient failures; past the threshold the provider sits out a cooldown."""
+
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.open_until
+
+class LLMRouter(LLMPort):
+    """
+    Dispatches each decision to the adapter registered for the agent's `provider`
+    (unknown providers go to the default), with a concurrency pool and a
+    requests-per-minute limiter per provider. When a provider fails transiently
+    (timeouts, 429, 5xx), or is cooling down after repeated transient failures, the
+    call fails over to the next healthy one; other errors (4xx, auth, invalid output)
+    are raised as they are, so they neither spend a fallback's quota nor hide config bugs.
+    """
+    supports_batch = True
+    supports_streaming = True
+
+    def __init__(
+        self,
+        adapters: Dict[str, LLMPort],
+        default: str,
+        concurrency: Optional[Dict[str, int]] = None,
+        rpm: Optional[Dict[str, int]] = None
+    ):
+        if not adapters:
+            raise ValueError("LLMRouter needs at least one adapter")
+        concurrency = concurrency or {}
+        rpm = rpm or {}
+        self.adapters = adapters
+        self.default = default if default in adapters else next(iter(adapters))
+        self.limits = {name: max(concurrency.get(name, settings.LLM_PROVIDER_CONCURRENCY_DEFAULT), 1) for name in adapters}
+        self.pools = {name: asyncio.Semaphore(limit) for name, limit in self.limits.items()}
+        self.rate_limiter = {name: SlidingWindowRateLimiter(rpm.get(name, 0), 60) for name in adapters}
+        self.health = {name: ProviderHealth() for name in adapters}
+
+    @property
+    def max_concurrency(self) -> int:
+        return sum(self.limits.values())
+
+    def _candidates(self, provider: Optional[str]) -> List[str]:
+        primary = provider if provider in self.adapters else self.default
+        others = [name for name in self.adapters if name != primary]
+        healthy = [name for name in others if self.health[name].healthy]
+        if self.health[primary].healthy:
+            return [primary] + healthy
+        # Primary is cooling down: try the healthy ones first, the primary last
+        return healthy + [primary]
+
+    async def generate_trade_decision(
+        self,
+        agent_name: str,
+        portfolio: PortfolioRead,
+        market_data: Dict[str, Any],
+        rank: int,
+        leader_gap: float,
+        persona: str = "",
+        news_context: str = "",
+        provider: Optional[str] = None
+    ) -> LLMResponse:
+        return await self._dispatch(
+            provider,
+            agent_name=agent_name,
+            portfolio=portfolio,
+            market_data=market_data,
+            rank=rank,
+            leader_gap=leader_gap,
+            persona=persona,
+            news_context=news_context
+        )
+
+    async def stream_trade_decision(
+        self,
+        agent_name: str,
+        portfolio: PortfolioRead,
+        market_data: Dict[str, Any],
+        rank: int,
+        leader_gap: float,
+        persona: str = "",
+        news_context: str = "",
+        provider: Optional[str] = None,
+        on_trades: Optional[Callable[[List[LLMTrade]], None]] = None
+    ) -> LLMResponse:
+        return await self._dispatch(
+            provider,
+            on_trades=on_trades or (lambda trades: None),
+            agent_name=agent_name,
+            portfolio=portfolio,
+            market_data=market_data,
+            rank=rank,
+            leader_gap=leader_gap,
+            persona=persona,
+            news_context=news_context
+        )
+
+    async def _dispatch(self, provider: Optional[str], on_trades: Optional[Callable[[List[LLMTrade]], None]] = None, **kwargs) -> LLMResponse:
+        candidates = self._candidates(provider)
+        handed_off = False
+
+        def hand_off(trades: List[LLMTrade]):
+            nonlocal handed_off
+            handed_off = True
+            on_trades(trades)
+
+        error: Optional[Exception] = None
+        for name in candidates:
+            try:
+                decision = await self._call(name, on_trades=hand_off if on_trades else None, **kwargs)
+            except LLMTransientError as e:
+                error = e
+                self._record_failure(name, e)
+                if handed_off:
+                    # The trades are already executing; another provider would decide again
+                    break
+                if name != candidates[-1]:
+                    logger.warning(f"🔀 {name} failed for {kwargs['agent_name']} ({e}), failing over")
+                continue
+            self._record_success(name)
+            requested = provider if provider in self.adapters else self.default
+            if name != requested:
+                decision.usage = {**(decision.usage or {}), "requested_provider": requested}
+            return decision
+        raise error
+
+    async def generate_batch_decisions(
+        self,
+        requests: List[AgentDecisionRequest],
+        market_data: Dict[str, Any],
+        news_context: str = "",
+        provider: Optional[str] = None
+    ) -> Dict[str, Union[LLMResponse, Exception]]:
+        """
+        Groups agents by provider. Batch-capable providers get one request per group
+        (taking one pool slot); agents whose batch call failed transiently, or whose
+        provider cannot batch, go through the single-call path with its failover.
+        An unusable batch is split in halves, and agents it left out are retried alone.
+        """
+        groups: Dict[str, List[AgentDecisionRequest]] = defaultdict(list)
+        for r in requests:
+            groups[r.provider if r.provider in self.adapters else self.default].append(r)
+
+        results: Dict[str, Union[LLMResponse, Exception]] = {}
+
+        async def single(r: AgentDecisionRequest):
+            try:
+                results[r.key] = await self.generate_trade_decision(
+                    agent_name=r.agent_name,
+                    portfolio=r.portfolio,
+                    market_data=market_data,
+                    rank=r.rank,
+                    leader_gap=r.leader_gap,
+                    persona=r.persona,
+                    news_context=news_context,
+                    provider=r.provider
+                )
+            except Exception as e:
+                results[r.key] = e
+
+        async def run_group(name: str, group: List[AgentDecisionRequest]):
+            adapter = self.adapters[name]
+            if not adapter.supports_batch or len(group) == 1 or not self.health[name].healthy:
+                await asyncio.gather(*(single(r) for r in group))
+                return
+            async with self.pools[name]:
+                await self._throttle(name)
+                batch = await adapter.generate_batch_decisions(group, market_data, news_context, provider=name)
+
+            retry, unusable = [], []
+            for r in group:
+                result = batch.get(r.key)
+                if isinstance(result, LLMBatchUnusableError):
+                    unusable.append(r)
+                elif isinstance(result, LLMTransientError) and len(self.adapters) > 1:
+                    retry.append(r)
+                else:
+                    results[r.key] = result if result is not None else LLMGenerationError("No decision returned")
+            if retry:
+                self._record_failure(name, batch[retry[0].key])
+                await asyncio.gather(*(single(r) for r in retry))
+            elif any(isinstance(batch.get(r.key), LLMResponse) for r in group):
+                self._record_success(name)
+
+            # Retries go back through the pool and limiter, one slot and token per request
+            if len(unusable) == len(group):
+                logger.warning(f"{name} batch of {len(group)} unusable; splitting")
+                mid = len(group) // 2
+                await asyncio.gather(run_group(name, group[:mid]), run_group(name, group[mid:]))
+            elif unusable:
+                logger.warning(f"Retrying {len(unusable)} agents left out of a {name} batch alone")
+                await asyncio.gather(*(single(r) for r in unusable))
+
+        await asyncio.gather(*(run_group(name, group) for name, group in groups.items()))
+        return results
+
+    async def _throttle(self, name: str):
+        while (retry_after := self.rate_limiter[name].hit(name)) is not None:
+            await asyncio.sleep(retry_after)
+
+    async def _call(self, name: str, on_trades: Optional[Callable[[List[LLMTrade]], None]] = None, **kwargs) -> LLMResponse:
+        async with self.pools[name]:
+            await self._throttle(name)
+            if on_trades is None:
+                return await self.adapters[name].generate_trade_decision(provider=name, **kwargs)
+            return await self.adapters[name].stream_trade_decision(provider=name, on_trades=on_trades, **kwargs)
+
+    def _record_success(self, name: str):
+        self.health[name].failures = 0
+
+    def _record_failure(self, name: str, error: Exception):
+        # Bad output is the prompt's problem; only transport/quota failures mark a provider unhealthy
+        if not isinstance(error, LLMTransientError):
+            return
+        health = self.health[name]
+        health.failures += 1
+        if health.failures >= settings.LLM_FAILOVER_AFTER_FAILURES:
+            health.open_until = time.monotonic() + settings.LLM_FAILOVER_COOLDOWN_SECONDS
+            health.failures = 0
+            logger.error(f"🚫 LLM provider {name} unhealthy, sitting out {settings.LLM_FAILOVER_COOLDOWN_SECONDS}s")
+
+def build_llm_router() -> LLMRouter:
+    """
+    Registry from settings: Gemini plus every configured OpenAI-compatible endpoint.
+    Adapters are built on first use, so SDK imports stay off the cold-start path.
+    """
+    from app.adapters.lazy_adapter import LazyLLMAdapter
+
+    adapters: Dict[str, LLMPort] = {"gemini": LazyLLMAdapter("app.adapters.gemini_adapter:GeminiAdapter")}
+    for name, config in settings.OPENAI_COMPATIBLE_PROVIDERS.items():
+        adapters[name] = LazyLLMAdapter("app.adapters.openai_compatible_adapter:OpenAICompatibleAdapter", name=name, **config)
+    return LLMRouter(
+        adapters,
+        default=settings.LLM_DEFAULT_PROVIDER,
+        concurrency=settings.LLM_PROVIDER_CONCURRENCY,
+        rpm=settings.LLM_PROVIDER_RPM
+    )
+
+_router: Optional[LLMRouter] = None
+
+def get_llm_router() -> LLMRouter:
+    """Process-wide router, so pools, limiters, health and latency stats are shared."""
+    global _router
+    if _router is None:
+        _router = build_llm_router()
+    return _router
@@ -0,0 +1,74 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.ports.market_data_port import MarketDataPort
+from app.services.market_calendar import MarketCalendar, market_calendar
+
+logger = logging.getLogger(__name__)
+
+class MarketHoursCachedMarketData(MarketDataPort):
+    """
+    Wraps a MarketDataPort so quotes are only fetched while they can change.
+
+    During a session every call goes upstream and refreshes the cache. Once the
+    market is closed, a ticker is fetched once after the close has settled
+    (MARKET_CLOSE_SETTLE_SECONDS) and that last close is served until the next open.
+    Placeholder quotes (`is_fallback`) are never cached.
+    """
+
+    def __init__(self, inner: MarketDataPort, calendar: MarketCalendar):
+        self.inner = inner
+        self.calendar = calendar
+        # kind -> ticker -> (value, fetched_at epoch)
+        self._cache: Dict[str, Dict[str, Tuple[Any, float]]] = {"price": {}, "rich": {}}
+        self.hits = 0
+        self.misses = 0
+
+    async def _serve(self, kind: str, tickers: List[str], fetch: Callable[[List[str]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc)
+        cache = self._cache[kind]
+        if self.calendar.is_open(now):
+            wanted = list(tickers)
+        else:
+            settled = self.calendar.last_close(now).timestamp() + settings.MARKET_CLOSE_SETTLE_SECONDS
+            wanted = [t for t in tickers if t not in cache or cache[t][1] < settled]
+
+        fetched: Dict[str, Any] = await fetch(wanted) if wanted else {}
+        stamp = time.time()
+        for ticker, value in fetched.items():
+            if not (isinstance(value, dict) and value.get("is_fallback")):
+                cache[ticker] = (value, stamp)
+
+        self.hits += len(tickers) - len(wanted)
+        self.misses += len(wanted)
+        if len(wanted) < len(tickers):
+            logger.info(f"🌙 Market closed: served {len(tickers) - len(wanted)}/{len(tickers)} {kind} quotes from the last close")
+        return {t: fetched[t] if t in fetched else cache[t][0] for t in tickers if t in fetched or t in cache}
+
+    async def get_current_price(self, ticker: str) -> float:
+        return (await self.get_current_prices([ticker]))[ticker]
+
+    async def get_current_prices(self, tickers: List[str]) -> Dict[str, float]:
+        return await self._serve("price", tickers, self.inner.get_current_prices)
+
+    async def get_rich_market_data(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        return await self._serve("rich", tickers, self.inner.get_rich_market_data)
+
+    async def get_price_history(self, ticker: str, range_: str = "60d", interval: str = "30m") -> List[Tuple[datetime, float]]:
+        return await self.inner.get_price_history(ticker, range_, interval)
+
+_market_data: Optional[MarketDataPort] = None
+
+def get_market_data() -> MarketDataPort:
+    """Process-wide market data client: Yahoo, behind the market-hours cache when the calendar is on."""
+    global _market_data
+    if _market_data is None:
+        from app.adapters.yahoo_finance_adapter import YahooFinanceAdapter
+
+        _market_data = YahooFinanceAdapter()
+        if settings.MARKET_CALENDAR_ENABLED:
+            _market_data = MarketHoursCachedMarketData(_market_data, market_calendar)
+    return _market_data
@@ -0,0 +1,122 @@
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+
+from app.adapters.batching import BatchPromptMixin
+from app.adapters.prompt_builder import build_trade_prompt, log_raw_response, parse_decision
+from app.adapters.streaming import StreamPromptMixin
+from app.core.exceptions import LLMGenerationError, LLMTransientError
+from app.core.request_policy import RequestPolicy
+from app.domain.schemas import LLMResponse, PortfolioRead
+from app.ports.llm_port import LLMPort
+
+logger = logging.getLogger(__name__)
+
+class OpenAICompatibleAdapter(StreamPromptMixin, BatchPromptMixin, LLMPort):
+    """
+    Chat Completions over plain HTTP, for OpenAI and any server exposing the same API
+    (vLLM, llama.cpp server, Ollama's /v1, LM Studio...).
+    """
+
+    def __init__(self, base_url: str, model: str, api_key: Optional[str] = None, name: str = "openai"):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.name = name
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        # Timeouts are enforced per attempt by the request policy
+        self.client = httpx.AsyncClient(base_url=self.base_url, headers=headers, timeout=None)
+        self.policy = RequestPolicy(name)
+
+    async def generate_trade_decision(
+        self,
+        agent_name: str,
+        portfolio: PortfolioRead,
+        market_data: Dict[str, Any],
+        rank: int,
+        leader_gap: float,
+        persona: str = "",
+        news_context: str = "",
+        provider: Optional[str] = None
+    ) -> LLMResponse:
+        prompt = build_trade_prompt(
+            agent_name=agent_name,
+            portfolio=portfolio,
+            market_data=market_data,
+            rank=rank,
+            leader_gap=leader_gap,
+            persona=persona
+        )
+        logger.info(f"Sending prompt to {self.name} (Length: {len(prompt)} chars)...")
+        raw_text, usage = await self.complete(prompt)
+        decision = parse_decision(raw_text, self.name)
+        decision.usage = usage
+        return decision
+
+    async def complete(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        """Raw JSON completion under the request policy, with usage accounting."""
+        (raw_text, tokens), info = await self.policy.call(lambda: self._request(prompt))
+        return raw_text, {"provider": self.name, "model": self.model, **info, **tokens}
+
+    def _payload(self, prompt: str) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "response_format": {"type": "json_object"},
+        }
+
+    def _check_status(self, response: httpx.Response, body: str = ""):
+        if response.status_code == 429 or response.status_code >= 500:
+            raise LLMTransientError(f"{self.name} returned HTTP {response.status_code}")
+        if response.status_code >= 400:
+            raise LLMGenerationError(f"{self.name} returned HTTP {response.status_code}: {body[:200]}")
+
+    async def _request(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        try:
+            response = await self.client.post("/chat/completions", json=self._payload(prompt))
+        except httpx.TransportError as e:
+            raise LLMTransientError(f"{self.name} transport error: {e}")
+        self._check_status(response, response.text)
+
+        body = response.json()
+        try:
+            raw_text = body["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            raise LLMGenerationError(f"{self.name} returned no completion")
+        log_raw_response(logger, self.name, raw_text)
+        return raw_text, self._tokens(body.get("usage"))
+
+    async def stream_chunks(self, prompt: str, tokens: Dict[str, Any]) -> AsyncIterator[str]:
+        """Content deltas of a server-sent-events completion (`stream: true`)."""
+        payload = {**self._payload(prompt), "stream": True, "stream_options": {"include_usage": True}}
+        try:
+            async with self.client.stream("POST", "/chat/completions", json=payload) as response:
+                if response.status_code >= 400:
+                    self._check_status(response, (await response.aread()).decode(errors="replace"))
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    event = json.loads(data)
+                    if event.get("usage"):
+                        tokens.update(self._tokens(event["usage"]))
+                    for choice in event.get("choices") or []:
+                        content = (choice.get("delta") or {}).get("content")
+                        if content:
+                            yield content
+        except httpx.TransportError as e:
+            raise LLMTransientError(f"{self.name} transport error: {e}")
+        except json.JSONDecodeError as e:
+            raise LLMGenerationError(f"{self.name} sent a malformed stream event: {e}")
+
+    @staticmethod
+    def _tokens(usage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        usage = usage or {}
+        return {
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "total_tokens": usage.get("total_tokens")
+        }
@@ -0,0 +1,252 @@
+import json
+import logging
+import random
+from typing import Any, Dict, List
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.core.exceptions import LLMGenerationError
+from app.domain.schemas import AgentDecisionRequest, LLMResponse, PortfolioRead
+from app.domain.market_snapshot import MarketView
+
+MARKET_DATA_LEGEND = """The following JSON contains advanced technicals for available tickers:
+- Price & Return: current price, daily_return_pct
+- Trend: sma_50, dist_sma50_pct (Distance from 50d MA)
+- Momentum: rsi_14 (Overbought > 70, Oversold < 30), macd_hist (Momentum shift)
+- Volatility: atr_14_pct (Risk), bb_width (Bollinger Band Width - Squeeze potential)
+- Volume: rel_vol_20 (Relative Volume vs 20d avg)
+- Context: dist_52w_high_pct"""
+
+THOUGHTS_FIRST_SCHEMA = """{
+  "thoughts": "Since I am [Persona], and I see AAPL has RSI 25...",
+  "trades": [
+    { "action": "BUY", "ticker": "AAPL", "quantity": 10 },
+    { "action": "SELL", "ticker": "AAPL", "quantity": 10, "order_type": "STOP", "trigger_price": 140.0 }
+  ]
+}"""
+
+TRADES_FIRST_SCHEMA = """{
+  "trades": [
+    { "action": "BUY", "ticker": "AAPL", "quantity": 10 },
+    { "action": "SELL", "ticker": "AAPL", "quantity": 10, "order_type": "STOP", "trigger_price": 140.0 }
+  ],
+  "thoughts": "Since I am [Persona], and I see AAPL has RSI 25..."
+}"""
+
+def _order_rules() -> str:
+    expiry = f"expire after {settings.ORDER_TTL_HOURS}h" if settings.ORDER_TTL_HOURS else "stay open until filled"
+    # Without the scheduler there are no price updates: each cycle matches them on its own quotes
+    checked = "at every price update between decisions" if settings.RUN_SCHEDULER else "against fresh prices before each decision"
+    return (
+        'Trades are MARKET orders (filled now) unless they set "order_type" with a "trigger_price": '
+        "LIMIT rests until the price is at or better than it (BUY at or below, SELL at or above), "
+        "STOP until the price crosses it (BUY at or above, SELL at or below, e.g. a stop-loss). "
+        f"Resting orders are checked {checked} and {expiry}; "
+        f"at most {settings.ORDER_MAX_OPEN_PER_AGENT} can be open. Do not repeat your Open Orders."
+    )
+
+def _market_data_json(market_data: Dict[str, Any]) -> str:
+    # A snapshot view renders each ticker once per cycle and caches the result
+    if isinstance(market_data, MarketView):
+        return market_data.to_json()
+    return json.dumps(market_data, indent=2)
+
+def _portfolio_text(portfolio: PortfolioRead, market_data: Dict[str, Any]) -> str:
+    portfolio_summary = []
+    for p in portfolio.positions:
+        # Safely get current price from rich data or fallback
+        ticker_data = market_data.get(p.ticker, {})
+        current_price = ticker_data.get('price', p.avg_cost)
+        
+        unrealized_pnl = (current_price - p.avg_cost) * p.quantity
+        portfolio_summary.append(
+            f"- {p.ticker}: Qty={p.quantity}, AvgCost=${p.avg_cost:.2f}, CurPrice=${current_price:.2f}, UnrealizedPnL=${unrealized_pnl:.2f}"
+        )
+    
+    return "\n".join(portfolio_summary) if portfolio_summary else "No positions held."
+
+def _orders_text(portfolio: PortfolioRead) -> str:
+    lines = [f"- {o.order_type.value} {o.action.value} {o.quantity} {o.ticker} @ ${o.trigger_price:.2f}" for o in portfolio.open_orders]
+    return "\n".join(lines) if lines else "No open orders."
+
+def build_trade_prompt(
+    agent_name: str,
+    portfolio: PortfolioRead,
+    market_data: Dict[str, Any],
+    rank: int,
+    leader_gap: float,
+    persona: str = "",
+    trades_first: bool = False
+) -> str:
+    """
+    The single-agent decision prompt, shared by every LLM provider adapter.
+    `trades_first` asks for the trades before the thoughts, for streamed responses.
+    """
+    # 1. Format Market Data for Prompt
+    # market_data is { "AAPL": { "price": 150, "pe": 20, "rsi": 60... } }
+    market_data_str = _market_data_json(market_data)
+    
+    # 2. Portfolio Summary
+    portfolio_text = _portfolio_text(portfolio, market_data)
+    
+    if trades_first:
+        output_order = "your list of 'trades' first, then your 'thoughts' (explain how your Persona influenced this)"
+        json_schema = TRADES_FIRST_SCHEMA
+    else:
+        output_order = "your 'thoughts' (explain how your Persona influenced this) and list of 'trades'"
+        json_schema = THOUGHTS_FIRST_SCHEMA
+
+    # 3. Construct System Prompt
+    system_prompt = f"""
+START_IDENTITY
+Name: {agent_name}
+Persona: {persona}
+END_IDENTITY
+
+START_GOAL
+Maximize Total Equity. Climb the Leaderboard.
+END_GOAL
+
+START_CONTEXT
+- Rank: #{rank}
+- Gap to Leader: ${leader_gap:.2f}
+END_CONTEXT
+
+START_PORTFOLIO
+Cash: ${portfolio.cash_balance:.2f}
+Total Equity: ${portfolio.total_equity:.2f}
+Positions:
+{portfolio_text}
+Open Orders:
+{_orders_text(portfolio)}
+END_PORTFOLIO
+
+START_MARKET_DATA
+{MARKET_DATA_LEGEND}
+
+{market_data_str}
+END_MARKET_DATA
+
+START_INSTRUCTIONS
+1. Analyze the Market Data deeply. Combine indicators:
+   - Example: High Relative Volume + Price Breakout + MACD positive?
+   - Example: Price at 52w High + RSI > 80? (Potential Reversal)
+2. Consider your Gamification Context ({'Aggressive (Catch up)' if leader_gap > 0 else 'Defensive (Maintain Lead)'}).
+3. Use your Persona ({persona}) to bias your decision (e.g., Value trader looks for low P/E or dip buys).
+3. Output valid JSON with {output_order}.
+4. DO NOT Short Sell (Sell > Held). DO NOT Buy > Cash.
+5. {_order_rules()}
+
+JSON SCHEMA:
+{json_schema}
+END_INSTRUCTIONS
+"""
+    return system_prompt
+
+def build_batch_prompt(requests: List[AgentDecisionRequest], market_data: Dict[str, Any]) -> str:
+    """
+    One prompt for several agents: the market block once, then each agent's identity,
+    context and portfolio tagged with its key. The answer is a keyed list of decisions.
+    """
+    market_data_str = _market_data_json(market_data)
+    agent_blocks = []
+    for r in requests:
+        stance = 'Aggressive (Catch up)' if r.leader_gap > 0 else 'Defensive (Maintain Lead)'
+        agent_blocks.append(f"""START_AGENT {r.key}
+Name: {r.agent_name}
+Persona: {r.persona}
+Rank: #{r.rank} | Gap to Leader: ${r.leader_gap:.2f} | Gamification Context: {stance}
+Cash: ${r.portfolio.cash_balance:.2f}
+Total Equity: ${r.portfolio.total_equity:.2f}
+Positions:
+{_portfolio_text(r.portfolio, market_data)}
+Open Orders:
+{_orders_text(r.portfolio)}
+END_AGENT {r.key}""")
+    agents_text = "\n\n".join(agent_blocks)
+
+    return f"""
+START_GOAL
+You are the decision engine for {len(requests)} independent trading agents.
+Each agent maximizes its own Total Equity and tries to climb the Leaderboard.
+END_GOAL
+
+START_MARKET_DATA
+{MARKET_DATA_LEGEND}
+
+{market_data_str}
+END_MARKET_DATA
+
+START_AGENTS
+{agents_text}
+END_AGENTS
+
+START_INSTRUCTIONS
+1. Decide for every agent separately, using only that agent's portfolio, context and Persona.
+2. Analyze the Market Data deeply and combine indicators, as each agent's Persona would.
+3. Respect each agent's own Cash and Positions: DO NOT Short Sell (Sell > Held). DO NOT Buy > Cash.
+4. {_order_rules()}
+5. Output valid JSON with exactly one entry per agent, keyed by the id after START_AGENT.
+
+JSON SCHEMA:
+{{
+  "decisions": [
+    {{
+      "agent": "<id>",
+      "thoughts": "Since I am [Persona], and I see AAPL has RSI 25...",
+      "trades": [
+        {{ "action": "BUY", "ticker": "AAPL", "quantity": 10 }},
+        {{ "action": "SELL", "ticker": "AAPL", "quantity": 10, "order_type": "STOP", "trigger_price": 140.0 }}
+      ]
+    }}
+  ]
+}}
+END_INSTRUCTIONS
+"""
+
+def parse_batch_decisions(raw_text: str, keys: List[str], provider: str) -> Dict[str, LLMResponse]:
+    """
+    Decisions by agent key. Raises LLMGenerationError when the envelope is unusable;
+    entries that are malformed, unknown or duplicated are dropped so the caller can retry them alone.
+    """
+    try:
+        body = json.loads(raw_text)
+    except json.JSONDecodeError as e:
+        raise LLMGenerationError(f"{provider} returned invalid batch JSON: {e}")
+    items = body.get("decisions") if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        raise LLMGenerationError(f"{provider} batch response has no decisions list")
+
+    wanted = set(keys)
+    decisions: Dict[str, LLMResponse] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        key = str(item.get("agent", ""))
+        if key not in wanted or key in decisions:
+            continue
+        try:
+            decisions[key] = LLMResponse.model_validate({"thoughts": item.get("thoughts"), "trades": item.get("trades")})
+        except ValidationError:
+            continue
+    return decisions
+
+def parse_decision(raw_text: str, provider: str) -> LLMResponse:
+    try:
+        return LLMResponse.model_validate_json(raw_text)
+    except ValidationError as e:
+        raise LLMGenerationError(f"{provider} returned invalid decision JSON: {e}")
+
+def log_raw_response(logger: logging.Logger, provider: str, raw_text: str):
+    """
+    Raw model output at INFO for a LLM_RAW_LOG_SAMPLE_RATE share of responses, cut to
+    LLM_RAW_LOG_MAX_CHARS; the rest only get a size line at DEBUG.
+    """
+    if random.random() >= settings.LLM_RAW_LOG_SAMPLE_RATE:
+        logger.debug(f"{provider} Response Received ({len(raw_text)} chars)")
+        return
+    limit = settings.LLM_RAW_LOG_MAX_CHARS
+    if limit and len(raw_text) > limit:
+        raw_text = f"{raw_text[:limit]}... [{len(raw_text) - limit} more chars]"
+    logger.info(f"{provider} Response Received (Raw): {raw_text}")
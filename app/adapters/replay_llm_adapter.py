@@ -0,0 +1,50 @@
+import json
+import logging
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.ports.llm_port import LLMPort
+from app.domain.schemas import LLMResponse, PortfolioRead
+
+logger = logging.getLogger(__name__)
+
+class ReplayLLMAdapter(LLMPort):
+    """
+    Replays recorded decisions per agent, in order, without calling a model.
+    Useful for backtests and for re-running a cycle from exported audit logs.
+    Agents with no recorded decisions left simply hold.
+    """
+
+    def __init__(self, responses: Optional[Dict[str, List[Dict[str, Any]]]] = None, path: Optional[str] = None):
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        for agent_name, items in (responses or {}).items():
+            self._queues[agent_name].extend(items)
+        if path:
+            self._load(path)
+
+    def _load(self, path: str):
+        # JSONL rows: {"agent_name": "...", "response": {"thoughts": "...", "trades": [...]}}
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                name = row.get("agent_name") or row.get("name")
+                self._queues[name].append(row["response"])
+        logger.info(f"Loaded replay decisions for {len(self._queues)} agents from {path}")
+
+    async def generate_trade_decision(
+        self, 
+        agent_name: str,
+        portfolio: PortfolioRead, 
+        market_data: Dict[str, Any],
+        rank: int,
+        leader_gap: float,
+        persona: str = "",
+        news_context: str = "",
+        provider: Optional[str] = None
+    ) -> LLMResponse:
+        queue = self._queues.get(agent_name)
+        if not queue:
+            return LLMResponse(thoughts="No recorded decision, holding.", trades=[])
+        return LLMResponse.model_validate(queue.popleft())
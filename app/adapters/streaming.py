@@ -0,0 +1,157 @@
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from app.adapters.prompt_builder import build_trade_prompt, log_raw_response, parse_decision
+from app.core.exceptions import LLMGenerationError
+from app.domain.schemas import LLMResponse, LLMTrade, PortfolioRead
+
+logger = logging.getLogger(__name__)
+
+class DecisionStreamParser:
+    """
+    Incremental scanner for a {"thoughts": ..., "trades": [...]} decision.
+
+    Each object of the top-level "trades" array is validated as soon as its closing
+    brace arrives, and `trades_closed` flips when the array ends, whatever comes after.
+    The full text is kept for the final validation of the whole decision.
+    """
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.text = ""
+        self.trades: List[LLMTrade] = []
+        self.trades_closed = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._in_trades = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[LLMTrade]:
+        """Consume a chunk; returns the trades completed by it. Raises on an invalid trade."""
+        self.text += chunk
+        completed = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect_key:
+                        self._key = json.loads(text[self._string_start:i + 1])
+                        self._expect_key = False
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._expect_key = True
+                elif self._depth == 2 and c == "[" and self._key == "trades":
+                    self._in_trades = True
+                elif self._depth == 3 and c == "{" and self._in_trades:
+                    self._item_start = i
+            elif c in "}]":
+                if self._depth == 3 and c == "}" and self._item_start is not None:
+                    completed.append(self._validate_trade(text[self._item_start:i + 1]))
+                    self._item_start = None
+                elif self._depth == 2 and c == "]" and self._in_trades:
+                    self._in_trades = False
+                    self.trades_closed = True
+                self._depth -= 1
+            elif c == "," and self._depth == 1:
+                self._expect_key = True
+        self._pos = len(text)
+        self.trades.extend(completed)
+        return completed
+
+    def _validate_trade(self, raw: str) -> LLMTrade:
+        try:
+            return LLMTrade.model_validate_json(raw)
+        except ValidationError as e:
+            raise LLMGenerationError(f"{self.provider} streamed an invalid trade {raw[:100]}: {e}")
+
+    def result(self) -> LLMResponse:
+        return parse_decision(self.text, self.provider)
+
+class StreamPromptMixin(ABC):
+    """
+    Streamed decisions for adapters exposing `stream_chunks(prompt, tokens)`, an async
+    iterator of text chunks that fills `tokens` with usage counts when the provider reports them.
+
+    The prompt asks for "trades" before "thoughts", so `on_trades` fires with the validated
+    order list while the reasoning is still being generated. Attempts run under the
+    adapter's request policy without hedging (two streams would hand off twice), and
+    nothing is retried once the trades have been handed off.
+    """
+    supports_streaming = True
+    name = "llm"
+
+    @abstractmethod
+    def stream_chunks(self, prompt: str, tokens: Dict[str, Any]) -> AsyncIterator[str]:
+        """Text chunks of one streamed request; fills `tokens` with usage counts when reported."""
+
+    async def stream_trade_decision(
+        self,
+        agent_name: str,
+        portfolio: PortfolioRead,
+        market_data: Dict[str, Any],
+        rank: int,
+        leader_gap: float,
+        persona: str = "",
+        news_context: str = "",
+        provider: Optional[str] = None,
+        on_trades: Optional[Callable[[List[LLMTrade]], None]] = None
+    ) -> LLMResponse:
+        prompt = build_trade_prompt(
+            agent_name=agent_name,
+            portfolio=portfolio,
+            market_data=market_data,
+            rank=rank,
+            leader_gap=leader_gap,
+            persona=persona,
+            trades_first=True
+        )
+        logger.info(f"Streaming prompt to {self.name} (Length: {len(prompt)} chars)...")
+        t0 = time.perf_counter()
+        timings: Dict[str, Any] = {"first_trade_ms": None, "trades_ready_ms": None}
+
+        def hand_off(trades: List[LLMTrade]):
+            timings["trades_ready_ms"] = round((time.perf_counter() - t0) * 1000)
+            if on_trades is not None:
+                on_trades(list(trades))
+
+        async def attempt():
+            if timings["trades_ready_ms"] is not None:
+                raise LLMGenerationError(f"{self.name} stream failed after its trades were handed off")
+            parser = DecisionStreamParser(self.name)
+            tokens: Dict[str, Any] = {}
+            async for chunk in self.stream_chunks(prompt, tokens):
+                if parser.feed(chunk) and timings["first_trade_ms"] is None:
+                    timings["first_trade_ms"] = round((time.perf_counter() - t0) * 1000)
+                if parser.trades_closed and timings["trades_ready_ms"] is None:
+                    hand_off(parser.trades)
+            return parser, tokens
+
+        (parser, tokens), info = await self.policy.call(attempt, hedge=False)
+        log_raw_response(logger, self.name, parser.text)
+        decision = parser.result()
+        if timings["trades_ready_ms"] is None:
+            hand_off(decision.trades)
+        decision.usage = {"provider": self.name, **info, **tokens, **timings, "streamed": True}
+        return decision
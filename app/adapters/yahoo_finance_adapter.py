@@ -1,7 +1,9 @@
 import asyncio
 import logging
+import time
 import httpx
-from typing import Dict, List, Any
+from datetime import datetime
+from typing import Dict, List, Any, Tuple
 from app.ports.market_data_port import MarketDataPort
 from app.core.exceptions import MarketDataError
 
@@ -13,6 +15,7 @@ class YahooFinanceAdapter(MarketDataPort):
     Replaces the heavy 'yfinance' library to save ~100MB+ in build size (no pandas/numpy).
     """
     BASE_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{ticker}?interval=1d&range=1d"
+    HISTORY_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{ticker}?interval={interval}&range={range_}"
     
     # Random User-Agent to prevent 403s
     HEADERS = {
@@ -51,6 +54,31 @@ class YahooFinanceAdapter(MarketDataPort):
             
         return results
 
+    async def get_price_history(self, ticker: str, range_: str = "60d", interval: str = "30m") -> List[Tuple[datetime, float]]:
+        """
+        Fetch historical closes as [(utc_timestamp, close)], oldest first.
+        Yahoo serves intraday intervals (e.g. 30m) for at most the last 60 days.
+        """
+        try:
+            async with httpx.AsyncClient(headers=self.HEADERS, timeout=30.0) as client:
+                response = await client.get(self.HISTORY_URL.format(ticker=ticker, interval=interval, range_=range_))
+                response.raise_for_status()
+                data = response.json()
+        except Exception as e:
+            raise MarketDataError(f"Error fetching history for {ticker}: {e}")
+
+        result = data.get('chart', {}).get('result') or []
+        if not result:
+            raise MarketDataError(f"No history returned for {ticker}")
+
+        timestamps = result[0].get('timestamp') or []
+        quotes = result[0].get('indicators', {}).get('quote') or [{}]
+        closes = quotes[0].get('close') or []
+        return [
+            (datetime.utcfromtimestamp(ts), float(close))
+            for ts, close in zip(timestamps, closes) if close is not None
+        ]
+
     async def get_rich_market_data(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
         """
         Fetch simplified rich data for analytical display. 
@@ -67,17 +95,23 @@ class YahooFinanceAdapter(MarketDataPort):
         return results
 
     async def _fetch_simple_meta(self, ticker: str) -> Dict[str, Any]:
-        """Helper to fetch meta info and return structured rich data."""
+        """
+        Helper to fetch meta info and return structured rich data.
+        `fetched_at` (epoch seconds) and `is_fallback` let the risk engine refuse to trade on placeholder prices.
+        """
+        fallback = {"price": 100.0, "daily_return_pct": 0.0, "fetched_at": time.time(), "is_fallback": True}
         try:
             async with httpx.AsyncClient(headers=self.HEADERS, timeout=10.0) as client:
                 response = await client.get(self.BASE_URL.format(ticker=ticker))
                 data = response.json()
                 result = data.get('chart', {}).get('result', [])
                 if not result:
-                    return {"price": 100.0, "daily_return_pct": 0.0}
+                    return fallback
                 
                 meta = result[0].get('meta', {})
-                price = meta.get('regularMarketPrice') or meta.get('previousClose') or 100.0
+                price = meta.get('regularMarketPrice') or meta.get('previousClose')
+                if not price:
+                    return fallback
                 prev_close = meta.get('previousClose') or price
                 daily_ret = ((price - prev_close) / prev_close) * 100 if prev_close else 0.0
                 
@@ -93,8 +127,10 @@ class YahooFinanceAdapter(MarketDataPort):
                     "rsi_14": 50.0,
                     "atr_14_pct": 1.5,
                     "bb_width": 4.0,
-                    "dist_52w_high_pct": -5.0
+                    "dist_52w_high_pct": -5.0,
+                    "fetched_at": time.time(),
+                    "is_fallback": False
                 }
         except Exception as e:
             logger.error(f"Error fetching rich data for {ticker}: {e}")
-            return {"price": 100.0, "daily_return_pct": 0.0}
+            return fallback
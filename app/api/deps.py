@@ -11,6 +11,7 @@ from app.core.config import settings
 from app.domain.models import User
 from app.domain.schemas import TokenData
 from app.core.database import SessionLocal
+from app.core.user_cache import user_cache
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -20,10 +21,7 @@ async def get_db() -> Generator:
     async with SessionLocal() as session:
         yield session
 
-async def get_current_user(
-    session: AsyncSession = Depends(get_db),
-    token: str = Depends(reusable_oauth2)
-) -> User:
+async def get_token_data(token: str = Depends(reusable_oauth2)) -> TokenData:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
@@ -34,17 +32,46 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    
+    if token_data.sub is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    return token_data
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_db),
+    token: str = Depends(reusable_oauth2),
+    token_data: TokenData = Depends(get_token_data)
+) -> User:
+    # Cached reads return a transient User; load it into the session before mutating it.
+    user = user_cache.get(token_data.sub, token)
+    if user:
+        return user
+
     result = await session.execute(select(User).where(User.id == int(token_data.sub))) # sub store ID
     user = result.scalars().first()
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    user_cache.set(token_data.sub, token, user, token_exp=token_data.exp)
     return user
 
-def get_current_active_superuser(
-    current_user: User = Depends(get_current_user),
+def get_current_user_id(current_user: User = Depends(get_current_user)) -> int:
+    """Authenticated user id; the subject must still exist (the lookup is served from the user cache)."""
+    return current_user.id
+
+async def get_current_active_superuser(
+    session: AsyncSession = Depends(get_db),
+    token: str = Depends(reusable_oauth2),
+    token_data: TokenData = Depends(get_token_data),
 ) -> User:
+    # A false embedded claim rejects before any lookup; otherwise the (cached) row stays authoritative.
+    if token_data.adm is False:
+        raise HTTPException(
+            status_code=400, detail="The user doesn't have enough privileges"
+        )
+    current_user = await get_current_user(session, token, token_data)
     if not current_user.is_admin:
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
@@ -52,12 +79,16 @@ def get_current_active_superuser(
     return current_user
 
 from app.services.trading_service import TradingService
-from app.adapters.gemini_adapter import GeminiAdapter
-from app.adapters.yahoo_finance_adapter import YahooFinanceAdapter
+from app.adapters.llm_router import get_llm_router
+from app.adapters.market_hours_cache import get_market_data
+from app.services.portfolio_book import portfolio_book
+from app.services.market_calendar import market_calendar
 
 def get_trading_service(session: AsyncSession = Depends(get_db)) -> TradingService:
     return TradingService(
         db_session=session,
-        llm_client=GeminiAdapter(),
-        market_data_client=YahooFinanceAdapter()
+        llm_client=get_llm_router(),
+        market_data_client=get_market_data(),
+        book=portfolio_book if settings.USE_PORTFOLIO_BOOK else None,
+        calendar=market_calendar if settings.MARKET_CALENDAR_ENABLED else None
     )
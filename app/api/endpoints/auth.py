@@ -1,6 +1,7 @@
+import math
 from datetime import timedelta
 from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -8,37 +9,65 @@ from sqlalchemy import select
 from app.api import deps
 from app.core import security
 from app.core.config import settings
+from app.core.exceptions import PasswordHashingBusyError
+from app.core.rate_limit import login_rate_limiter, client_ip
+from app.core.responses import FastJSONResponse
 from app.domain.models import User
 from app.domain.schemas import Token, UserCreate, UserRead, UserPublicRead
 
 router = APIRouter()
 
+def _throttle(request: Request, scope: str):
+    retry_after = login_rate_limiter.hit(f"{scope}:{client_ip(request)}")
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, try again shortly.",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/login/access-token", response_model=Token)
 async def login_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: AsyncSession = Depends(deps.get_db)
 ) -> Any:
     """OAuth2 compatible token login, get an access token for future requests."""
+    _throttle(request, "login")
     result = await session.execute(select(User).where(User.username == form_data.username))
     user = result.scalars().first()
     
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    try:
+        valid = user is not None and await security.verify_password_async(form_data.password, user.hashed_password)
+    except PasswordHashingBusyError:
+        raise _hashing_busy()
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    claims = {"username": user.username, "adm": user.is_admin} if settings.AUTH_EMBED_CLAIMS else None
     return {
         "access_token": security.create_access_token(
-            subject=user.id, expires_delta=access_token_expires
+            subject=user.id, expires_delta=access_token_expires, claims=claims
         ),
         "token_type": "bearer",
     }
 
 @router.post("/register", response_model=UserRead)
 async def register_user(
+    request: Request,
     user_in: UserCreate,
     session: AsyncSession = Depends(deps.get_db)
 ) -> Any:
     """Register a new user."""
+    _throttle(request, "register")
     result = await session.execute(select(User).where(User.username == user_in.username))
     if result.scalars().first():
         raise HTTPException(
@@ -46,9 +75,14 @@ async def register_user(
             detail="The user with this username already exists in the system.",
         )
         
+    try:
+        hashed_password = await security.get_password_hash_async(user_in.password)
+    except PasswordHashingBusyError:
+        raise _hashing_busy()
+
     user = User(
         username=user_in.username,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=hashed_password,
         is_admin=False # Default false
     )
     session.add(user)
@@ -69,15 +103,20 @@ async def get_public_profile(
     session: AsyncSession = Depends(deps.get_db)
 ) -> Any:
     """Get public profile of a user."""
-    from sqlalchemy.orm import selectinload
-    from app.domain.models import Agent, Portfolio
-    
-    stmt = select(User).where(User.username == username).options(
-        selectinload(User.agents).selectinload(Agent.portfolio).selectinload(Portfolio.positions)
-    )
-    result = await session.execute(stmt)
-    user = result.scalars().first()
-    
-    if not user:
+    from app.domain.models import Agent
+    from app.repositories.agent_repository import AgentRepository
+
+    stmt = select(
+        User.id, User.username, User.avatar_id, User.first_name, User.last_name,
+        User.linkedin_handle, User.twitter_handle
+    ).where(User.username == username)
+    row = (await session.execute(stmt)).first()
+
+    if not row:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+
+    user_id, *profile = row
+    fields = ("username", "avatar_id", "first_name", "last_name", "linkedin_handle", "twitter_handle")
+    public_profile = dict(zip(fields, profile))
+    public_profile["agents"] = await AgentRepository(Agent, session).get_agent_rows(owner_id=user_id)
+    return FastJSONResponse(public_profile)
@@ -0,0 +1,36 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from app.api import deps
+from app.core.database import SessionLocal
+from app.domain.constants import ExportFormat, ExportKind
+from app.domain.models import User
+from app.services.export_service import MEDIA_TYPES, export_filename, export_stream
+
+router = APIRouter()
+
+@router.get("/admin/export/{kind}")
+async def export_history(
+    kind: ExportKind,
+    format: ExportFormat = ExportFormat.NDJSON,
+    gzip: bool = False,
+    agent_id: Optional[uuid.UUID] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(deps.get_current_active_superuser)
+) -> StreamingResponse:
+    """
+    Stream trades, audit logs or equity snapshots as NDJSON/CSV (Admin Only), optionally
+    filtered by agent and [start, end). Rows come off a server-side cursor, so bytes start
+    flowing immediately and memory stays flat however many rows match.
+    """
+    filename = export_filename(kind, format, gzip)
+    return StreamingResponse(
+        export_stream(SessionLocal, kind, format, gzip, agent_id, start, end),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
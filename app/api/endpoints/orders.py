@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.domain.constants import OrderStatus
+from app.domain.models import Agent, Order, User
+from app.domain.schemas import OrderRead
+from app.repositories.order_repository import OrderRepository
+from app.services.order_book import order_book
+
+router = APIRouter()
+
+async def _get_agent(session: AsyncSession, agent_id: uuid.UUID) -> Agent:
+    agent = await session.get(Agent, agent_id)
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    return agent
+
+@router.get("/agents/{agent_id}/orders", response_model=List[OrderRead])
+async def list_orders(
+    agent_id: uuid.UUID,
+    status: Optional[OrderStatus] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user_id: int = Depends(deps.get_current_user_id),
+    session: AsyncSession = Depends(deps.get_db)
+) -> Any:
+    """An agent's LIMIT/STOP orders, newest first; `status=OPEN` for the ones still resting."""
+    await _get_agent(session, agent_id)
+    return await OrderRepository(Order, session).list_for_agent(agent_id, status=status, limit=limit)
+
+@router.delete("/agents/{agent_id}/orders/{order_id}", response_model=OrderRead)
+async def cancel_order(
+    agent_id: uuid.UUID,
+    order_id: int,
+    current_user: User = Depends(deps.get_current_user),
+    session: AsyncSession = Depends(deps.get_db)
+) -> Any:
+    """Cancel a resting order (its agent's owner or an admin)."""
+    agent = await _get_agent(session, agent_id)
+    if agent.owner_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not the owner of this agent")
+
+    repo = OrderRepository(Order, session)
+    order = await repo.get(order_id)
+    if not order or order.agent_id != agent_id:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    # Conditional on OPEN: a fill in flight holds the row, and once it commits the order is no longer cancellable
+    cancelled = await repo.cancel(order_id, datetime.utcnow())
+    await session.commit()
+    await session.refresh(order)
+    if not cancelled:
+        raise HTTPException(status_code=409, detail=f"Order is {order.status}, only OPEN orders can be cancelled")
+    # Other processes skip it when it triggers: fills re-check the status
+    order_book.cancel(order.id)
+    return order
@@ -0,0 +1,90 @@
+import uuid
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core.config import settings
+from app.domain.models import Agent, Ticker, User, WatchlistEntry
+from app.domain.schemas import TickerCreate, TickerRead, TickerUpdate, WatchlistRead, WatchlistUpdate
+from app.repositories.ticker_repository import TickerRepository, normalize_symbol
+from app.repositories.watchlist_repository import WatchlistRepository
+
+router = APIRouter()
+
+@router.get("/tickers", response_model=List[TickerRead])
+async def list_tickers(
+    active_only: bool = True,
+    current_user_id: int = Depends(deps.get_current_user_id),
+    session: AsyncSession = Depends(deps.get_db)
+) -> Any:
+    """The ticker registry; only active tickers can be put on a watchlist."""
+    return await TickerRepository(Ticker, session).list(active_only=active_only)
+
+@router.post("/admin/tickers")
+async def upsert_tickers(
+    tickers_in: List[TickerCreate],
+    current_user: User = Depends(deps.get_current_active_superuser),
+    session: AsyncSession = Depends(deps.get_db)
+) -> Any:
+    """Register tickers, or update the metadata of known ones (admin). Deactivated ones leave every watchlist."""
+    created, updated = await TickerRepository(Ticker, session).upsert_many(tickers_in)
+    await session.commit()
+    return {"created": created, "updated": updated}
+
+@router.patch("/admin/tickers/{symbol}", response_model=TickerRead)
+async def update_ticker(
+    symbol: str,
+    ticker_in: TickerUpdate,
+    current_user: User = Depends(deps.get_current_active_superuser),
+    session: AsyncSession = Depends(deps.get_db)
+) -> Any:
+    """Update a ticker (admin). Deactivating it drops it from every watchlist; holdings keep being quoted."""
+    repo = TickerRepository(Ticker, session)
+    ticker = await repo.get_by_symbol(symbol)
+    if not ticker:
+        raise HTTPException(status_code=404, detail="Ticker not found")
+    await repo.apply_update(ticker, ticker_in.model_dump(exclude_unset=True))
+    await session.commit()
+    return ticker
+
+async def _get_agent(session: AsyncSession, agent_id: uuid.UUID) -> Agent:
+    agent = await session.get(Agent, agent_id)
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    return agent
+
+@router.get("/agents/{agent_id}/watchlist", response_model=WatchlistRead)
+async def get_watchlist(
+    agent_id: uuid.UUID,
+    current_user_id: int = Depends(deps.get_current_user_id),
+    session: AsyncSession = Depends(deps.get_db)
+) -> Any:
+    """An agent's watchlist; empty means it follows the default universe."""
+    await _get_agent(session, agent_id)
+    tickers = await WatchlistRepository(WatchlistEntry, session).get_symbols(agent_id)
+    return {"agent_id": agent_id, "tickers": tickers}
+
+@router.put("/agents/{agent_id}/watchlist", response_model=WatchlistRead)
+async def set_watchlist(
+    agent_id: uuid.UUID,
+    watchlist_in: WatchlistUpdate,
+    current_user: User = Depends(deps.get_current_user),
+    session: AsyncSession = Depends(deps.get_db)
+) -> Any:
+    """Replace an agent's watchlist (its owner or an admin). Symbols must be active registry tickers."""
+    agent = await _get_agent(session, agent_id)
+    if agent.owner_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not the owner of this agent")
+
+    tickers = list(dict.fromkeys(normalize_symbol(t) for t in watchlist_in.tickers))
+    if len(tickers) > settings.WATCHLIST_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"A watchlist holds at most {settings.WATCHLIST_MAX_SIZE} tickers")
+    unknown = set(tickers) - await TickerRepository(Ticker, session).get_active_symbols(tickers)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown or inactive tickers: {', '.join(sorted(unknown))}")
+
+    await WatchlistRepository(WatchlistEntry, session).replace(agent_id, tickers)
+    await session.commit()
+    return {"agent_id": agent_id, "tickers": sorted(tickers)}
@@ -1,4 +1,5 @@
-from typing import List, Any
+from typing import List, Any, Optional
+from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -7,11 +8,17 @@ from uuid import UUID
 
 from app.api import deps
 from app.core.config import settings
-from app.domain.schemas import AgentCreate, AgentRead, AgentDetail, UserRead, UserUpdate
+from app.core.responses import FastJSONResponse
+from app.core.user_cache import user_cache
+from app.domain.schemas import AgentCreate, AgentRead, AgentDetail, UserRead, UserUpdate, EquitySeriesRead, AgentAnalyticsRead, CycleRunRead, CycleRunDetail
 from app.repositories.agent_repository import AgentRepository
 from app.repositories.portfolio_repository import PortfolioRepository
+from app.repositories.equity_repository import EquityRepository, RESOLUTIONS, pick_resolution
+from app.repositories.cycle_run_repository import CycleRunRepository
 from app.services.trading_service import TradingService
-from app.domain.models import Agent, Portfolio, User
+from app.services.analytics_service import AnalyticsService
+from app.services.maintenance import equity_rollup_due, run_equity_rollup
+from app.domain.models import Agent, Portfolio, User, EquitySnapshot, CycleRun
 
 router = APIRouter()
 
@@ -49,7 +56,6 @@ async def create_agent(
     portfolio = Portfolio(agent_id=agent.id)
     session.add(portfolio)
     await session.commit()
-    await session.commit()
     
     # Reload with portfolio for response model
     stmt = select(Agent).where(Agent.id == agent.id).options(
@@ -69,20 +75,16 @@ async def read_agents(
 ) -> Any:
     """Retrieve all agents (Global Leaderboard)."""
     repo = AgentRepository(Agent, session)
-    return await repo.get_all_with_portfolios()
+    return FastJSONResponse(await repo.get_agent_rows())
 
 @router.get("/agents/me", response_model=List[AgentRead])
 async def read_my_agents(
-    current_user: User = Depends(deps.get_current_user),
+    current_user_id: int = Depends(deps.get_current_user_id),
     session: AsyncSession = Depends(deps.get_db)
 ) -> Any:
     """Retrieve agents owned by the current user."""
-    stmt = select(Agent).where(Agent.owner_id == current_user.id).options(
-        selectinload(Agent.portfolio).selectinload(Portfolio.positions),
-        selectinload(Agent.owner)
-    )
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    repo = AgentRepository(Agent, session)
+    return FastJSONResponse(await repo.get_agent_rows(owner_id=current_user_id))
 
 @router.get("/agents/{agent_id}", response_model=AgentDetail)
 async def get_agent(
@@ -91,41 +93,78 @@ async def get_agent(
     current_user: User = Depends(deps.get_current_user)
 ) -> Any:
     """Get specific agent details."""
-    
-    # Eager load portfolio, positions, and trades to avoid MissingGreenlet
-    stmt = select(Agent).where(Agent.id == agent_id).options(
-        selectinload(Agent.portfolio).selectinload(Portfolio.positions),
-        selectinload(Agent.portfolio).selectinload(Portfolio.trades), # Assuming trades on Portfolio
-        selectinload(Agent.audit_logs),
-        selectinload(Agent.owner)
-    )
-    result = await session.execute(stmt)
-    agent = result.scalars().first()
-    
-    if not agent:
+    try:
+        agent_uuid = UUID(agent_id)
+    except ValueError:
         raise HTTPException(status_code=404, detail="Agent not found")
-    
-    # Flatten trades from portfolio to top level for schema matching if needed
-    # or update schema to nested. 
-    # AgentDetail expects trades directly? Let's check schema.
-    # User asked for "trades of an agent".
-    # AgentDetail definition: trades: List[TradeRead] = []
-    # But trades are on portfolio.
-    # Let's populate the Pydantic model manually or use a property.
-    agent_detail = AgentDetail.model_validate(agent)
-    if agent.portfolio and agent.portfolio.trades:
-        agent_detail.trades = agent.portfolio.trades
-        
-    return agent_detail
+
+    # Column projections of portfolio, positions, trades and audit logs,
+    # serialized directly instead of validating the ORM graph through AgentDetail.
+    repo = AgentRepository(Agent, session)
+    agent_detail = await repo.get_agent_detail_row(agent_uuid)
+
+    if not agent_detail:
+        raise HTTPException(status_code=404, detail="Agent not found")
+
+    return FastJSONResponse(agent_detail)
+
+@router.get("/agents/{agent_id}/equity", response_model=EquitySeriesRead)
+async def get_agent_equity(
+    agent_id: UUID,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: str = "auto",
+    session: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Equity time series for charts. Defaults to the last 30 days.
+    resolution=auto picks raw marks, 1h or 1d buckets to keep the point count bounded.
+    """
+    if resolution not in ("auto", "raw", *RESOLUTIONS):
+        raise HTTPException(status_code=400, detail="resolution must be one of auto, raw, 1h, 1d")
+
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=30)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    result = await session.execute(select(Portfolio.id).where(Portfolio.agent_id == agent_id))
+    portfolio_id = result.scalar()
+    if portfolio_id is None:
+        raise HTTPException(status_code=404, detail="Agent not found")
+
+    if resolution == "auto":
+        resolution = pick_resolution(start, end)
+    repo = EquityRepository(EquitySnapshot, session)
+    points = await repo.get_series(portfolio_id, start, end, resolution)
+    return FastJSONResponse({"agent_id": agent_id, "resolution": resolution, "points": points})
+
+@router.get("/agents/{agent_id}/analytics", response_model=AgentAnalyticsRead)
+async def get_agent_analytics(
+    agent_id: UUID,
+    session: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """Return, risk and trading metrics, computed for all agents once per mark."""
+    analytics = await AnalyticsService(session).get_agent_analytics(agent_id)
+    if analytics is None:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    return FastJSONResponse(analytics)
 
 @router.post("/market/cycle")
 async def trigger_market_cycle(
     background_tasks: BackgroundTasks,
+    force: bool = False,
+    resume: bool = True,
     current_user: User = Depends(deps.get_current_active_superuser),
     service: TradingService = Depends(deps.get_trading_service)
 ) -> Any:
-    """Manually trigger a market cycle (UI Only - Auth Required)."""
-    background_tasks.add_task(service.execute_market_cycle)
+    """
+    Manually trigger a market cycle (UI Only - Auth Required). `force` runs it even while the market is closed;
+    `resume=false` starts fresh instead of continuing an interrupted cycle.
+    """
+    background_tasks.add_task(service.execute_market_cycle, force=force, resume=resume)
     return {"message": "Market cycle triggered in background"}
 
 @router.get("/market/cron")
@@ -145,9 +184,49 @@ async def trigger_market_cron(
     if key != settings.SECRET_KEY:
          raise HTTPException(status_code=403, detail="Invalid Cron Key")
 
+    # Without the in-process scheduler, cron is also what keeps the equity rollups current
+    rollup = not settings.RUN_SCHEDULER and equity_rollup_due()
+    if service.market_closed():
+        # Answer without touching quotes or the LLM; cron keeps firing outside trading hours
+        if rollup:
+            background_tasks.add_task(run_equity_rollup)
+        return {"message": "Market closed", "next_open": service.calendar.next_open().isoformat()}
+
     background_tasks.add_task(service.execute_market_cycle)
+    if rollup:
+        background_tasks.add_task(run_equity_rollup) # After the cycle, so its snapshots are included
     return {"message": "Cron execution started"}
 
+@router.get("/admin/db/pool")
+async def get_db_pool_stats(
+    current_user: User = Depends(deps.get_current_active_superuser)
+) -> Any:
+    """Connection pool profile, status and checkout wait times (Admin Only)."""
+    from app.core.database import pool_stats
+    return pool_stats.snapshot()
+
+@router.get("/admin/cycles", response_model=List[CycleRunRead])
+async def list_cycle_runs(
+    limit: int = 20,
+    current_user: User = Depends(deps.get_current_active_superuser),
+    session: AsyncSession = Depends(deps.get_db)
+) -> Any:
+    """Recent market cycles with their progress counters (Admin Only)."""
+    return await CycleRunRepository(CycleRun, session).list_recent(min(limit, 200))
+
+@router.get("/admin/cycles/{run_id}", response_model=CycleRunDetail)
+async def get_cycle_run(
+    run_id: int,
+    current_user: User = Depends(deps.get_current_active_superuser),
+    session: AsyncSession = Depends(deps.get_db)
+) -> Any:
+    """One cycle's live progress and per-agent timings, slowest decisions first (Admin Only)."""
+    repo = CycleRunRepository(CycleRun, session)
+    run = await repo.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Cycle not found")
+    return {**CycleRunRead.model_validate(run).model_dump(), "agents": await repo.get_agent_rows(run_id)}
+
 # --- User Profile Endpoints ---
 
 @router.get("/users/me", response_model=UserRead)
@@ -164,6 +243,8 @@ async def update_my_profile(
     session: AsyncSession = Depends(deps.get_db)
 ) -> Any:
     """Update current user profile (avatar, etc.)."""
+    # current_user may be a cached, detached snapshot: update the persistent row instead
+    current_user = await session.get(User, current_user.id)
     if user_in.avatar_id is not None:
         current_user.avatar_id = user_in.avatar_id
     if user_in.first_name is not None:
@@ -178,4 +259,5 @@ async def update_my_profile(
     session.add(current_user)
     await session.commit()
     await session.refresh(current_user)
+    user_cache.invalidate(str(current_user.id))
     return current_user
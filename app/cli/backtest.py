@@ -0,0 +1,84 @@
+"""
+Backtest personas/prompts over historical prices with the live trading rules.
+
+Usage:
+    python -m app.cli.backtest --config backtest.json [--workers 4] [--output results.json]
+
+Config:
+    {
+      "tickers": ["AAPL", "MSFT"],
+      "range": "60d", "interval": "30m",        # Yahoo history (30m is limited to 60 days)
+      "prices_csv": "prices.csv",               # optional instead: ticker,timestamp,close
+      "scenarios": [
+        {"name": "baseline",
+         "agents": [{"name": "AlphaBot", "persona": "You are a momentum trader.", "cash": 100000}],
+         "llm": "app.adapters.cached_llm_adapter:CachedLLMAdapter",
+         "llm_kwargs": {"inner": "app.adapters.gemini_adapter:GeminiAdapter", "path": "llm_cache.jsonl"}}
+      ]
+    }
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List
+
+from app.domain.schemas import BacktestScenario
+from app.services.backtest_service import run_scenarios
+
+logger = logging.getLogger(__name__)
+
+def load_prices_csv(path: str) -> Dict[str, List]:
+    prices: Dict[str, List] = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            prices.setdefault(row["ticker"], []).append((datetime.fromisoformat(row["timestamp"]), float(row["close"])))
+    for series in prices.values():
+        series.sort()
+    return prices
+
+async def fetch_prices(tickers: List[str], range_: str, interval: str) -> Dict[str, List]:
+    from app.adapters.yahoo_finance_adapter import YahooFinanceAdapter
+    adapter = YahooFinanceAdapter()
+    histories = await asyncio.gather(*(adapter.get_price_history(t, range_, interval) for t in tickers))
+    return dict(zip(tickers, histories))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", required=True)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="Write full results (incl. equity curves) as JSON")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    with open(args.config) as f:
+        config = json.load(f)
+
+    if config.get("prices_csv"):
+        prices = load_prices_csv(config["prices_csv"])
+    else:
+        prices = asyncio.run(fetch_prices(config["tickers"], config.get("range", "60d"), config.get("interval", "30m")))
+    logger.info(f"Loaded {sum(len(s) for s in prices.values())} bars for {len(prices)} tickers")
+
+    scenarios = [BacktestScenario(prices=prices, **s) for s in config["scenarios"]]
+    results = run_scenarios(scenarios, workers=args.workers)
+
+    for result in results:
+        print(f"\n{result.scenario}: {result.cycles} cycles {result.start} -> {result.end} in {result.duration_seconds:.1f}s")
+        for agent in sorted(result.agents, key=lambda a: a.final_equity, reverse=True):
+            ret = f"{agent.total_return_pct:+.2f}%" if agent.total_return_pct is not None else "n/a"
+            sharpe = f"{agent.sharpe:.2f}" if agent.sharpe is not None else "n/a"
+            dd = f"{agent.max_drawdown_pct:.2f}%" if agent.max_drawdown_pct is not None else "n/a"
+            reasons = f" [{', '.join(f'{r} {n}' for r, n in sorted(agent.rejections.items()))}]" if agent.rejections else ""
+            print(f"  {agent.name:<20} equity ${agent.final_equity:,.2f}  return {ret}  sharpe {sharpe}  "
+                  f"maxDD {dd}  trades {agent.trades} (rejected {agent.rejected_trades}{reasons}, llm errors {agent.llm_errors})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump([r.model_dump(mode="json") for r in results], f)
+
+if __name__ == "__main__":
+    main()
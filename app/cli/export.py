@@ -0,0 +1,53 @@
+"""
+Export trades, audit logs or equity snapshots as NDJSON or CSV, streamed from a
+server-side cursor (constant memory however many rows match).
+
+Usage:
+    python -m app.cli.export trades [--format csv] [--gzip] [--agent UUID]
+        [--start 2025-01-01] [--end 2025-02-01] [--output trades.csv.gz]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import uuid
+from datetime import datetime
+
+from app.core.database import SessionLocal, engine
+from app.domain.constants import ExportFormat, ExportKind
+from app.services.export_service import export_stream
+
+logger = logging.getLogger(__name__)
+
+async def run(args) -> int:
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    written = 0
+    try:
+        async for chunk in export_stream(
+            SessionLocal, ExportKind(args.kind), ExportFormat(args.format), args.gzip, args.agent, args.start, args.end
+        ):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+        await engine.dispose()
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=[k.value for k in ExportKind])
+    parser.add_argument("--format", choices=[f.value for f in ExportFormat], default=ExportFormat.NDJSON.value)
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--agent", type=uuid.UUID, help="Only this agent's rows")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="Inclusive, ISO date/time (UTC)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="Exclusive, ISO date/time (UTC)")
+    parser.add_argument("--output", "-o", help="File to write (default: stdout)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", stream=sys.stderr)
+    written = asyncio.run(run(args))
+    logger.info(f"📦 Exported {args.kind}: {written / 1024:.1f} KiB to {args.output or 'stdout'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Import-time report: what importing a module (the app by default) costs, per module.
+
+Runs a fresh interpreter with `-X importtime`, so nothing is cached in-process,
+and lists the most expensive modules by cumulative and by self time.
+
+Usage:
+    python -m app.cli.importtime [--module app.main] [--top 25] [--prefix app.]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+def measure(module: str) -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for every module imported, in import order."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))}
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def _table(title: str, rows: List[Tuple[str, int, int]]):
+    print(f"\n{title}")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us in rows:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--prefix", default="", help="Only list modules starting with this, e.g. app.")
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    total = next((cumulative for name, _, cumulative in rows if name == args.module), sum(r[1] for r in rows))
+    listed = [r for r in rows if r[0].startswith(args.prefix)]
+
+    print(f"import {args.module}: {total / 1000:.1f} ms, {len(rows)} modules")
+    _table("By cumulative time", sorted(listed, key=lambda r: r[2], reverse=True)[:args.top])
+    _table("By self time", sorted(listed, key=lambda r: r[1], reverse=True)[:args.top])
+
+if __name__ == "__main__":
+    main()
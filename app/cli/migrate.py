@@ -0,0 +1,35 @@
+"""
+Create the schema and seed the default admin user and agents.
+
+Serverless deployments skip this at startup (DB_INIT_ON_STARTUP); run it once per
+deploy or schema change instead.
+
+Usage:
+    python -m app.cli.migrate [--no-seed]
+"""
+import argparse
+import asyncio
+import logging
+
+from app.core.database import SessionLocal, engine
+from app.services.bootstrap import create_schema, seed_defaults
+
+async def run(seed: bool = True):
+    try:
+        await create_schema(engine)
+        if seed:
+            async with SessionLocal() as session:
+                await seed_defaults(session)
+    finally:
+        await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--no-seed", action="store_true", help="Only create missing tables")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    asyncio.run(run(seed=not args.no_seed))
+
+if __name__ == "__main__":
+    main()
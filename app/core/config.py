@@ -1,6 +1,8 @@
 from pydantic_settings import BaseSettings
-from pydantic import ValidationError
-from typing import Optional
+from pydantic import ValidationError, model_validator
+from typing import Dict, List, Optional
+
+from app.domain.constants import ScreenerStyle
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "SentientAlpha"
@@ -10,21 +12,132 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./sentient_alpha.db"
+    DB_PROFILE: str = "auto" # auto | sqlite | server | serverless
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE_SECONDS: int = 1800 # Below typical Postgres/Neon idle-connection cutoffs
+    DB_STATEMENT_CACHE_SIZE: int = 100 # asyncpg prepared statements per connection
+    DB_PGBOUNCER: bool = False # Transaction pooling (e.g. Neon "-pooler" host): no prepared statement caching
+    DB_SLOW_CHECKOUT_MS: int = 500 # Warn when waiting this long for a pooled connection
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    DB_QUERY_STATS_ENABLED: bool = True # Per-request/per-cycle query count, DB time and N+1 warnings
+    DB_QUERY_STATS_HEADERS: bool = True # X-DB-* and Server-Timing response headers
+    DB_N_PLUS_ONE_THRESHOLD: int = 5 # Identical statements within one request/cycle flagged as N+1
+    DB_QUERY_BUDGETS: Dict[str, int] = {} # Handler name (e.g. "read_my_agents") -> max queries, warned when exceeded
 
     # Security
     SECRET_KEY: str = "change_this_in_production"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    AUTH_USER_CACHE_TTL_SECONDS: int = 30 # 0 disables the authenticated-user cache
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_EMBED_CLAIMS: bool = False # Put username/is_admin claims in issued tokens
+    PASSWORD_HASH_WORKERS: int = 2 # Threads for argon2 (releases the GIL)
+    PASSWORD_HASH_MAX_QUEUE: int = 32 # Pending + running hash jobs before rejecting with 503
+    LOGIN_RATE_LIMIT_ATTEMPTS: int = 10 # Per client IP and window, 0 disables
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = 60
+    TRUST_PROXY_HEADERS: bool = False # Only behind a proxy that sets X-Forwarded-For (Render/Vercel)
     
     # AI Provider
     GOOGLE_API_KEY: str
+    LLM_TIMEOUT_SECONDS: float = 300.0 # Per-attempt ceiling (used until latency samples exist)
+    LLM_TIMEOUT_MIN_SECONDS: float = 20.0
+    LLM_TIMEOUT_P99_MULTIPLIER: float = 2.0 # Adaptive timeout = observed p99 x this
+    LLM_TIMEOUT_FALLBACK_FAILURE_RATE: float = 0.2 # Above this share of failed recent calls, use LLM_TIMEOUT_SECONDS
+    LLM_MAX_RETRIES: int = 2 # Transient failures only, jittered exponential backoff
+    LLM_RETRY_BASE_SECONDS: float = 1.0
+    LLM_RETRY_MAX_SECONDS: float = 30.0
+    LLM_HEDGE_ENABLED: bool = True # Fire a second request once a call passes p95
+    LLM_LATENCY_WINDOW: int = 200 # Recent calls used for percentiles
+    LLM_LATENCY_MIN_SAMPLES: int = 20
+    LLM_DEFAULT_PROVIDER: str = "gemini" # For agents whose provider has no adapter
+    # name -> {"base_url": ..., "model": ..., "api_key": ...}, e.g. a local OpenAI-compatible server
+    OPENAI_COMPATIBLE_PROVIDERS: Dict[str, Dict[str, str]] = {}
+    LLM_PROVIDER_CONCURRENCY: Dict[str, int] = {} # Per-provider in-flight cap
+    LLM_PROVIDER_CONCURRENCY_DEFAULT: int = 4
+    LLM_PROVIDER_RPM: Dict[str, int] = {} # Per-provider requests/minute, unset = unlimited
+    LLM_FAILOVER_AFTER_FAILURES: int = 3 # Consecutive transient failures before a cooldown
+    LLM_FAILOVER_COOLDOWN_SECONDS: int = 60
+    LLM_BATCH_SIZE: int = 1 # Agents per LLM request (shared market context); 1 disables batching
+    LLM_STREAMING: bool = False # Stream single-agent decisions; trades go to execution before the thoughts finish
+    LLM_RAW_LOG_SAMPLE_RATE: float = 0.05 # Share of raw LLM responses logged at INFO
+    LLM_RAW_LOG_MAX_CHARS: int = 2000 # Cut for logged raw responses, 0 = no cut
 
     # Market Data
     MARKET_DATA_PROVIDER: str = "yfinance"
+    MARKET_CALENDAR_ENABLED: bool = True # NYSE sessions: no cycles or quote fetches while closed
+    MARKET_EXTRA_HOLIDAYS: List[str] = [] # Ad-hoc closures as ISO dates, e.g. ["2025-01-09"]
+    MARKET_CLOSE_SETTLE_SECONDS: int = 300 # After the close, quotes fetched later than this are the final ones
+    WATCHLIST_MAX_SIZE: int = 50 # Tickers per agent watchlist (each one is quoted every cycle)
+    SCREENER_TOP_K: int = 15 # Watchlist tickers per prompt, best-scored for the persona (+ holdings); 0 disables
+    SCREENER_DEFAULT_STYLE: str = "momentum" # For personas matching no screener's keywords
+    SCREENER_PLUGINS: Dict[str, str] = {} # Extra screeners, name -> "module:Class" (a Screener subclass)
+
+    # Startup (None = on, except serverless where cold starts pay for it)
+    SCHEDULER_ENABLED: Optional[bool] = None # In-process APScheduler; serverless uses /market/cron instead
+    DB_INIT_ON_STARTUP: Optional[bool] = None # create_all + seeding in lifespan; otherwise run python -m app.cli.migrate
 
     # Scheduling
     SCHEDULER_INTERVAL_SECONDS: int = 600
     PRICE_UPDATE_INTERVAL_SECONDS: int = 600
     SCHEDULER_TIMEZONE: str = "America/New_York"
+    EQUITY_ROLLUP_INTERVAL_MINUTES: int = 60
+    PORTFOLIO_BOOK_ENABLED: bool = False # In-memory marks with write-behind; needs the in-process scheduler
+    PORTFOLIO_BOOK_FLUSH_SECONDS: int = 5
+    PORTFOLIO_BOOK_JOURNAL_PATH: str = "./portfolio_book.journal"
+    EQUITY_RAW_RETENTION_DAYS: int = 30 # Raw snapshots older than this are pruned, never before they are rolled up
+    EQUITY_SERIES_MAX_POINTS: int = 2000 # Range queries pick the finest resolution under this
+    ANALYTICS_RESOLUTION: str = "1d" # Rollup bucket used as the return period
+    ANALYTICS_LOOKBACK_DAYS: int = 365
+
+    # Market cycle pipeline (load -> decide -> execute -> persist)
+    CYCLE_LOAD_BATCH_SIZE: int = 200 # Agents per loader page
+    CYCLE_LLM_CONCURRENCY: int = 4 # Concurrent LLM decisions
+    CYCLE_EXECUTE_BATCH_SIZE: int = 50 # Decisions per risk check / commit
+    CYCLE_QUEUE_SIZE: int = 64 # Bound on each inter-stage queue
+    CYCLE_RUN_STALE_SECONDS: int = 600 # A RUNNING cycle without a heartbeat for this long is treated as crashed
+    CYCLE_RESUME_WINDOW_SECONDS: int = 3600 # Interrupted cycles older than this are abandoned, not resumed
+    CYCLE_SLOT_MINUTES: int = 30 # Schedule slot; an interrupted cycle is only resumed within its own slot
+
+    # Pre-trade risk (0 disables a limit)
+    RISK_MAX_ORDER_NOTIONAL: float = 25000.0 # $ per order
+    RISK_MAX_POSITION_PCT: float = 0.5 # Max share of equity in one ticker after a buy
+    RISK_MAX_QUOTE_AGE_SECONDS: int = 900 # Reject orders priced off older quotes
+
+    # Resting LIMIT/STOP orders, matched on every price update (without the scheduler: at each cycle start)
+    ORDER_MAX_OPEN_PER_AGENT: int = 10 # Further orders are rejected when placed
+    ORDER_TTL_HOURS: int = 120 # Unfilled orders expire after this, 0 = good till cancelled
+
+    # API Responses
+    RESPONSE_GZIP_MIN_SIZE: int = 1024 # bytes, 0 disables gzip
+    EXPORT_YIELD_PER: int = 2000 # Rows per server-side cursor fetch in bulk exports
+
+    @model_validator(mode="after")
+    def check_screener_style(self) -> "Settings":
+        styles = [s.value for s in ScreenerStyle] + list(self.SCREENER_PLUGINS)
+        if self.SCREENER_DEFAULT_STYLE not in styles:
+            raise ValueError(f"Unknown SCREENER_DEFAULT_STYLE '{self.SCREENER_DEFAULT_STYLE}' (have: {', '.join(styles)})")
+        return self
+
+    @property
+    def IS_SERVERLESS(self) -> bool:
+        """Vercel sets VERCEL=1 in its runtime."""
+        import os
+        return bool(os.environ.get("VERCEL"))
+
+    @property
+    def RUN_SCHEDULER(self) -> bool:
+        return self.SCHEDULER_ENABLED if self.SCHEDULER_ENABLED is not None else not self.IS_SERVERLESS
+
+    @property
+    def USE_PORTFOLIO_BOOK(self) -> bool:
+        """The scheduler hydrates and flushes the book; without it marks go straight to the database."""
+        return self.PORTFOLIO_BOOK_ENABLED and self.RUN_SCHEDULER
+
+    @property
+    def RUN_DB_INIT(self) -> bool:
+        return self.DB_INIT_ON_STARTUP if self.DB_INIT_ON_STARTUP is not None else not self.IS_SERVERLESS
 
     @property
     def ASYNC_DATABASE_URL(self) -> str:
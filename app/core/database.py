@@ -1,10 +1,138 @@
+import logging
+import time
+from collections import deque
+from threading import Lock
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from app.core.config import settings
 
-# If using postgres, we need to pass ssl=True for Neon/Vercel
-connect_args = {}
-if settings.DATABASE_URL.startswith(("postgres://", "postgresql://")):
-    connect_args = {"ssl": True}
+logger = logging.getLogger(__name__)
+
+class PoolStats:
+    """Connection checkout wait times, so pool saturation shows up in logs and /admin/db/pool."""
+
+    def __init__(self, window: int = 1000):
+        self._waits = deque(maxlen=window)
+        self._lock = Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.slow_checkouts = 0
+
+    def record(self, wait: float):
+        with self._lock:
+            self._waits.append(wait)
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if wait * 1000 >= settings.DB_SLOW_CHECKOUT_MS:
+                self.slow_checkouts += 1
+                logger.warning(f"⏳ DB pool checkout waited {wait * 1000:.0f}ms (profile={DB_PROFILE}, {engine.pool.status()})")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+        p = lambda q: round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 2) if waits else 0.0
+        return {
+            "profile": DB_PROFILE,
+            "pool": engine.pool.status(),
+            "checkouts": self.checkouts,
+            "slow_checkouts": self.slow_checkouts,
+            "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+            "p50_wait_ms": p(0.50),
+            "p95_wait_ms": p(0.95),
+            "p99_wait_ms": p(0.99),
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+pool_stats = PoolStats()
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_stats.record(time.perf_counter() - t0)
+
+class InstrumentedNullPool(NullPool):
+    # Every checkout opens a connection, so the "wait" is the connect + SSL handshake
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_stats.record(time.perf_counter() - t0)
+
+def _resolve_profile() -> str:
+    if settings.DB_PROFILE != "auto":
+        return settings.DB_PROFILE
+    if settings.ASYNC_DATABASE_URL.startswith("sqlite"):
+        return "sqlite"
+    return "serverless" if settings.IS_SERVERLESS else "server"
+
+def _is_sqlite_memory(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and (
+        parsed.database in (None, "", ":memory:") or parsed.query.get("mode") == "memory"
+    )
+
+def _engine_kwargs(profile: str) -> Dict[str, Any]:
+    """
+    sqlite: single local file, small pool, WAL pragmas on connect
+    (an in-memory database keeps SQLAlchemy's single shared connection).
+    server: long-lived process (Render), pooled connections with pre-ping and recycle.
+    serverless: cold starts (Vercel + Neon), no pool to outlive the invocation.
+    """
+    connect_args: Dict[str, Any] = {}
+    kwargs: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    if settings.DATABASE_URL.startswith(("postgres://", "postgresql://")):
+        # If using postgres, we need to pass ssl=True for Neon/Vercel
+        connect_args["ssl"] = True
+    if settings.ASYNC_DATABASE_URL.startswith("postgresql+asyncpg"):
+        pgbouncer = settings.DB_PGBOUNCER or "-pooler." in settings.DATABASE_URL
+        cache_size = 0 if pgbouncer else settings.DB_STATEMENT_CACHE_SIZE
+        connect_args["statement_cache_size"] = cache_size
+        connect_args["prepared_statement_cache_size"] = cache_size
+
+    if profile == "serverless":
+        kwargs["poolclass"] = InstrumentedNullPool
+    elif _is_sqlite_memory(settings.ASYNC_DATABASE_URL):
+        # Every pooled connection would open its own empty database; StaticPool shares one
+        pass
+    else:
+        kwargs.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        )
+
+    kwargs["connect_args"] = connect_args
+    return kwargs
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL") # Readers no longer block the cycle's writer
+    cursor.execute("PRAGMA synchronous=NORMAL") # Safe with WAL, avoids an fsync per commit
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA cache_size=-65536") # 64 MiB page cache
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+DB_PROFILE = _resolve_profile()
+
+engine = create_async_engine(settings.ASYNC_DATABASE_URL, **_engine_kwargs(DB_PROFILE))
+if DB_PROFILE == "sqlite":
+    event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+if settings.DB_QUERY_STATS_ENABLED:
+    from app.core.query_stats import instrument
+    instrument(engine)
 
-engine = create_async_engine(settings.ASYNC_DATABASE_URL, connect_args=connect_args)
 SessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
@@ -10,6 +10,14 @@ class LLMGenerationError(SentientAlphaException):
     """Raised when the LLM fails to generate a valid response."""
     pass
 
+class LLMTransientError(LLMGenerationError):
+    """Raised for LLM failures worth retrying (timeouts, rate limits, server errors)."""
+    pass
+
+class LLMBatchUnusableError(LLMGenerationError):
+    """Raised for an agent whose part of a batched response could not be used; it is retried in a smaller group."""
+    pass
+
 class TradeExecutionError(SentientAlphaException):
     """Raised when a trade cannot be executed (e.g. insufficient funds, short selling rule)."""
     pass
@@ -21,3 +29,11 @@ class InsufficientFundsError(TradeExecutionError):
 class ShortSellingError(TradeExecutionError):
     """Raised when trying to sell more than held quantity."""
     pass
+
+class PasswordHashingBusyError(SentientAlphaException):
+    """Raised when the password hashing pool queue is full."""
+    pass
+
+class QueryBudgetExceeded(SentientAlphaException, AssertionError):
+    """Raised when a block runs more SQL statements than its query budget."""
+    pass
@@ -0,0 +1,161 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+from app.core.exceptions import QueryBudgetExceeded
+
+logger = logging.getLogger(__name__)
+
+# Open scopes of the current context (request, cycle, test budget); tasks inherit them
+_scopes: ContextVar[Tuple["QueryStats", ...]] = ContextVar("query_stats_scopes", default=())
+
+class QueryStats:
+    """SQL statements run inside one scope: count, total DB time, slowest statement, repeats."""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: Dict[str, int] = {} # SQL text (parameters excluded) -> executions
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+
+    def n_plus_one_suspects(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Identical SELECTs run at least `threshold` times (DB_N_PLUS_ONE_THRESHOLD), most repeated first.
+        Writes are left out: batched flushes repeat one INSERT per commit by design.
+        """
+        threshold = threshold or settings.DB_N_PLUS_ONE_THRESHOLD
+        repeated = [
+            (statement, n) for statement, n in self.statements.items()
+            if n >= threshold and statement.lstrip()[:6].upper() == "SELECT"
+        ]
+        return sorted(repeated, key=lambda item: -item[1])
+
+    def headers(self) -> Dict[str, str]:
+        db_ms = self.total_time * 1000
+        return {
+            "X-DB-Queries": str(self.count),
+            "X-DB-Time-Ms": f"{db_ms:.2f}",
+            "X-DB-Slowest-Ms": f"{self.slowest_time * 1000:.2f}",
+            "X-DB-N1-Suspects": str(len(self.n_plus_one_suspects())),
+            "Server-Timing": f'db;dur={db_ms:.2f};desc="{self.count} queries"',
+        }
+
+    def report(self) -> str:
+        lines = [f"{n}x {_short(statement)}" for statement, n in sorted(self.statements.items(), key=lambda item: -item[1])]
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return f"<QueryStats {self.label!r} {self.count} queries, {self.total_time * 1000:.1f}ms>"
+
+def _short(statement: str, limit: int = 200) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+@contextmanager
+def track(label: str = "") -> Iterator[QueryStats]:
+    """Count the statements run in this context (and tasks started from it) until the block exits."""
+    stats = QueryStats(label)
+    token = _scopes.set(_scopes.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _scopes.reset(token)
+
+@contextmanager
+def detached() -> Iterator[None]:
+    """
+    Leave every enclosing scope for the block. Starlette runs BackgroundTasks inside the
+    request's context, so work they kick off would otherwise count against that request.
+    """
+    token = _scopes.set(())
+    try:
+        yield
+    finally:
+        _scopes.reset(token)
+
+@contextmanager
+def query_budget(max_queries: int, label: str = "") -> Iterator[QueryStats]:
+    """
+    Raise QueryBudgetExceeded if the block runs more than `max_queries` statements.
+    For tests, e.g. around an in-process request to pin an endpoint's query count.
+    """
+    with track(label) as stats:
+        yield stats
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{label or 'Block'} ran {stats.count} queries, over its budget of {max_queries}:\n{stats.report()}"
+        )
+
+def log_stats(stats: QueryStats, level: int = logging.DEBUG, budget: Optional[int] = None):
+    if logger.isEnabledFor(level):
+        slowest = f" (slowest {stats.slowest_time * 1000:.1f}ms: {_short(stats.slowest_statement, 120)})" if stats.count else ""
+        logger.log(level, f"🗄️ {stats.label}: {stats.count} queries, {stats.total_time * 1000:.1f}ms in the DB{slowest}")
+    for statement, n in stats.n_plus_one_suspects():
+        logger.warning(f"🔁 Possible N+1 in {stats.label}: {n}x {_short(statement)}")
+    if budget is not None and stats.count > budget:
+        logger.warning(f"💸 {stats.label} ran {stats.count} queries, over its budget of {budget}")
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _scopes.get():
+        context._query_stats_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_stats_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    for stats in _scopes.get():
+        stats.record(statement, elapsed)
+
+def instrument(engine):
+    """Hook statement timing into an (async) engine; statements outside any scope cost one ContextVar read."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+class QueryStatsMiddleware:
+    """
+    Tracks each HTTP request's statements: X-DB-* and Server-Timing response headers
+    (as of when the response starts), a debug log line once the response is done,
+    and warnings for N+1 suspects and for handlers over their DB_QUERY_BUDGETS entry.
+    """
+
+    def __init__(self, app, headers: bool = True):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track(f"{scope['method']} {scope['path']}") as stats:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start" and self.headers:
+                    MutableHeaders(scope=message).update(stats.headers())
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+        endpoint = getattr(scope.get("endpoint"), "__name__", None)
+        if endpoint:
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            stats.label = f"{endpoint} ({scope['method']} {route})"
+        log_stats(stats, budget=settings.DB_QUERY_BUDGETS.get(endpoint))
@@ -0,0 +1,57 @@
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from fastapi import Request
+
+from app.core.config import settings
+
+class SlidingWindowRateLimiter:
+    """In-process sliding-window limiter: at most `max_hits` per key within `window_seconds`."""
+
+    def __init__(self, max_hits: int, window_seconds: int):
+        self.max_hits = max_hits
+        self.window_seconds = window_seconds
+        self._hits: Dict[str, Deque[float]] = {}
+        self._last_sweep = time.monotonic()
+
+    def hit(self, key: str) -> Optional[float]:
+        """
+        Record an attempt for `key`.
+        Returns None when allowed, otherwise the seconds until the next attempt is allowed.
+        """
+        if self.max_hits <= 0:
+            return None
+        now = time.monotonic()
+        self._sweep(now)
+
+        hits = self._hits.setdefault(key, deque())
+        cutoff = now - self.window_seconds
+        while hits and hits[0] <= cutoff:
+            hits.popleft()
+
+        if len(hits) >= self.max_hits:
+            return hits[0] + self.window_seconds - now
+        hits.append(now)
+        return None
+
+    def _sweep(self, now: float):
+        # Drop idle keys once per window so one-off clients don't accumulate
+        if now - self._last_sweep < self.window_seconds:
+            return
+        cutoff = now - self.window_seconds
+        self._hits = {k: v for k, v in self._hits.items() if v and v[-1] > cutoff}
+        self._last_sweep = now
+
+def client_ip(request: Request) -> str:
+    if settings.TRUST_PROXY_HEADERS:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            # The right-most entry is the one appended by our own proxy
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+login_rate_limiter = SlidingWindowRateLimiter(
+    max_hits=settings.LOGIN_RATE_LIMIT_ATTEMPTS,
+    window_seconds=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+)
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.exceptions import LLMTransientError
+
+logger = logging.getLogger(__name__)
+
+class LatencyTracker:
+    """
+    Rolling window of call latencies (seconds) with nearest-rank percentiles, plus the
+    outcomes of recent calls. A timed-out call is recorded as a censored sample at the
+    timeout (its latency was at least that), so the percentiles keep up with a slowing provider.
+    """
+
+    def __init__(self, window: int):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._outcomes: Deque[bool] = deque(maxlen=window) # True = succeeded
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self._outcomes.append(True)
+
+    def record_timeout(self, seconds: float):
+        self._samples.append(seconds)
+        self._outcomes.append(False)
+
+    def record_failure(self):
+        self._outcomes.append(False)
+
+    def failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+class RequestPolicy:
+    """
+    Latency-aware timeouts, jittered exponential retries and hedging for slow remote calls.
+
+    - Timeout per attempt: p99 x LLM_TIMEOUT_P99_MULTIPLIER, clamped to
+      [LLM_TIMEOUT_MIN_SECONDS, LLM_TIMEOUT_SECONDS] (the ceiling until enough samples exist,
+      and while more than LLM_TIMEOUT_FALLBACK_FAILURE_RATE of recent calls failed).
+    - LLMTransientError / timeouts are retried with full-jitter exponential backoff.
+    - Once an attempt runs past p95, a second identical request is fired and the first
+      to succeed wins; the loser is cancelled.
+    """
+
+    def __init__(self, name: str = "llm"):
+        self.name = name
+        self.latency = LatencyTracker(settings.LLM_LATENCY_WINDOW)
+
+    def _ready(self) -> bool:
+        return len(self.latency) >= settings.LLM_LATENCY_MIN_SAMPLES
+
+    def timeout(self) -> float:
+        ceiling = settings.LLM_TIMEOUT_SECONDS
+        if not self._ready() or self.latency.failure_rate() > settings.LLM_TIMEOUT_FALLBACK_FAILURE_RATE:
+            return ceiling
+        adaptive = self.latency.percentile(99) * settings.LLM_TIMEOUT_P99_MULTIPLIER
+        return min(ceiling, max(settings.LLM_TIMEOUT_MIN_SECONDS, adaptive))
+
+    def hedge_delay(self) -> Optional[float]:
+        if not settings.LLM_HEDGE_ENABLED or not self._ready():
+            return None
+        return self.latency.percentile(95)
+
+    def backoff(self, attempt: int) -> float:
+        cap = min(settings.LLM_RETRY_MAX_SECONDS, settings.LLM_RETRY_BASE_SECONDS * 2 ** attempt)
+        return random.uniform(0, cap)
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], hedge: bool = True) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Run `fn` under the policy. Returns (result, info) where info carries
+        latency_ms, attempts, hedged and timeout_s for accounting.
+        `hedge=False` for calls with side effects along the way (streams).
+        """
+        t0 = time.perf_counter()
+        info = {"attempts": 0, "hedged": False, "timeout_s": None, "latency_ms": None}
+        retries = settings.LLM_MAX_RETRIES
+        for attempt in range(retries + 1):
+            info["attempts"] = attempt + 1
+            try:
+                result = await self._hedged(fn, info, hedge)
+                info["latency_ms"] = round((time.perf_counter() - t0) * 1000)
+                return result, info
+            except LLMTransientError as e:
+                if attempt == retries:
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"🔁 {self.name} attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _hedged(self, fn: Callable[[], Awaitable[Any]], info: Dict[str, Any], hedge: bool = True) -> Any:
+        timeout = self.timeout()
+        info["timeout_s"] = round(timeout, 1)
+        deadline = time.monotonic() + timeout
+        hedge_delay = self.hedge_delay() if hedge else None
+        tasks = {asyncio.create_task(fn()): time.perf_counter()}
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            while tasks:
+                wait = deadline - time.monotonic()
+                if hedge_delay is not None and not hedged:
+                    wait = min(wait, hedge_delay)
+                if wait <= 0:
+                    break
+                done, _ = await asyncio.wait(tasks, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if hedge_delay is not None and not hedged and time.monotonic() < deadline:
+                        logger.info(f"⏱️ {self.name} call past p95 ({hedge_delay:.1f}s), sending hedge request")
+                        hedged = info["hedged"] = True
+                        tasks[asyncio.create_task(fn())] = time.perf_counter()
+                        continue
+                    break
+                for task in done:
+                    started = tasks.pop(task)
+                    if task.exception() is None:
+                        self.latency.record(time.perf_counter() - started)
+                        return task.result()
+                    error = task.exception()
+                    if isinstance(error, LLMTransientError):
+                        self.latency.record_failure()
+                if error is not None and not isinstance(error, LLMTransientError):
+                    raise error
+            if error is not None and not tasks:
+                raise error
+            self.latency.record_timeout(timeout)
+            raise LLMTransientError(f"{self.name} call timed out after {timeout:.0f}s")
+        finally:
+            for task in tasks:
+                task.cancel()
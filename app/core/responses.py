@@ -0,0 +1,41 @@
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is a speedup, stdlib json keeps things working without it
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Fallback encoder matching Pydantic's JSON output for the types we return."""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize plain dicts/lists (e.g. SQL projections) straight to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response for large payloads.
+    Returning it from a route bypasses `response_model` validation, so the content
+    must already have the shape of the declared schema (see AgentRepository projections).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,20 +1,37 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Dict, Optional, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.exceptions import PasswordHashingBusyError
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
 ALGORITHM = "HS256"
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+# argon2 takes tens of milliseconds per call; run it on a small dedicated pool
+# so auth bursts never block the event loop (scheduler, cycles, other requests).
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_hash_jobs = 0
+
+def create_access_token(
+    subject: Union[str, Any],
+    expires_delta: timedelta = None,
+    claims: Optional[Dict[str, Any]] = None
+) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode = {"exp": expire, "sub": str(subject)}
+    if claims:
+        to_encode.update(claims)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -23,3 +40,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+async def _run_hash_job(fn, *args):
+    global _hash_jobs
+    if _hash_jobs >= settings.PASSWORD_HASH_MAX_QUEUE:
+        raise PasswordHashingBusyError(f"{_hash_jobs} password hash jobs pending")
+    _hash_jobs += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_jobs -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bounded hashing pool. Raises PasswordHashingBusyError when saturated."""
+    return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the bounded hashing pool. Raises PasswordHashingBusyError when saturated."""
+    return await _run_hash_job(get_password_hash, password)
@@ -0,0 +1,73 @@
+import time
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.domain.models import User
+
+class UserCache:
+    """
+    Short-TTL in-process cache of authenticated users, keyed by (subject, token).
+    Entries hold a column snapshot rather than the ORM instance, so every hit
+    returns a fresh transient `User` that is never bound to another request's session.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Dict[str, Tuple[float, Dict[str, Any]]]] = {}
+        self._size = 0
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, sub: str, token: str) -> Optional[User]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            tokens = self._entries.get(sub)
+            entry = tokens.get(token) if tokens else None
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= time.time():
+                del tokens[token]
+                self._size -= 1
+                return None
+        return User(**snapshot)
+
+    def set(self, sub: str, token: str, user: User, token_exp: Optional[float] = None):
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            # Never serve a user past the token's own expiry
+            expires_at = min(expires_at, token_exp)
+        snapshot = {c.key: getattr(user, c.key) for c in User.__table__.columns}
+        with self._lock:
+            if self._size >= self.max_entries:
+                self._entries.clear()
+                self._size = 0
+            tokens = self._entries.setdefault(sub, {})
+            if token not in tokens:
+                self._size += 1
+            tokens[token] = (expires_at, snapshot)
+
+    def invalidate(self, sub: str):
+        """Drop every cached token of a user (e.g. after a profile update)."""
+        with self._lock:
+            tokens = self._entries.pop(sub, None)
+            if tokens:
+                self._size -= len(tokens)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+user_cache = UserCache(
+    ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES
+)
@@ -4,3 +4,49 @@ class TradeAction(str, Enum):
     BUY = "BUY"
     SELL = "SELL"
     HOLD = "HOLD"
+
+class OrderType(str, Enum):
+    MARKET = "MARKET" # Filled in the cycle that decided it
+    LIMIT = "LIMIT" # Rests until the price is at or better than the trigger
+    STOP = "STOP" # Rests until the price crosses the trigger
+
+class OrderStatus(str, Enum):
+    OPEN = "OPEN"
+    FILLED = "FILLED"
+    REJECTED = "REJECTED" # Triggered but failed the risk checks
+    CANCELLED = "CANCELLED"
+    EXPIRED = "EXPIRED"
+
+class RiskRejectReason(str, Enum):
+    NO_PRICE = "NO_PRICE"
+    FALLBACK_PRICE = "FALLBACK_PRICE"
+    STALE_QUOTE = "STALE_QUOTE"
+    MAX_NOTIONAL = "MAX_NOTIONAL"
+    INSUFFICIENT_FUNDS = "INSUFFICIENT_FUNDS"
+    INSUFFICIENT_HOLDINGS = "INSUFFICIENT_HOLDINGS"
+    CONCENTRATION = "CONCENTRATION"
+
+class CycleRunStatus(str, Enum):
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    ABANDONED = "ABANDONED" # Interrupted and too old to resume
+
+class CycleAgentStatus(str, Enum):
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+class ExportKind(str, Enum):
+    TRADES = "trades"
+    AUDIT_LOGS = "audit_logs"
+    EQUITY = "equity"
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class ScreenerStyle(str, Enum):
+    """Built-in screeners; SCREENER_PLUGINS can add more."""
+    MOMENTUM = "momentum"
+    VALUE = "value"
+    VOLATILITY = "volatility"
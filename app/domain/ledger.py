@@ -0,0 +1,122 @@
+"""
+In-memory portfolio state.
+
+Slot-based records with the same attribute names as the ORM models they mirror
+(Portfolio, Position, Trade, Order), so TradingService rules can run on them unchanged.
+"""
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from app.domain.constants import OrderType, TradeAction
+
+class PositionState:
+    __slots__ = ("id", "ticker", "quantity", "avg_cost", "current_price")
+
+    def __init__(
+        self,
+        ticker: str,
+        quantity: int,
+        avg_cost: float,
+        current_price: Optional[float] = None,
+        id: Optional[int] = None
+    ):
+        self.id = id # Database row id once persisted
+        self.ticker = ticker
+        self.quantity = quantity
+        self.avg_cost = avg_cost
+        self.current_price = current_price
+
+    @property
+    def unrealized_pnl(self) -> float:
+        if self.current_price is not None:
+            return (self.current_price - self.avg_cost) * self.quantity
+        return 0.0
+
+class PortfolioState:
+    __slots__ = ("id", "agent_id", "cash_balance", "total_equity", "positions")
+
+    def __init__(
+        self,
+        id: int,
+        agent_id: Optional[uuid.UUID] = None,
+        cash_balance: float = 10000.0,
+        total_equity: Optional[float] = None,
+        positions: Optional[List[PositionState]] = None
+    ):
+        self.id = id
+        self.agent_id = agent_id
+        self.cash_balance = cash_balance
+        self.total_equity = cash_balance if total_equity is None else total_equity
+        self.positions = positions if positions is not None else []
+
+    def mark(self, prices) -> float:
+        """Mark positions to `prices` (ticker -> price) and return the new equity."""
+        equity = self.cash_balance
+        for pos in self.positions:
+            price = prices.get(pos.ticker)
+            if price:
+                pos.current_price = price
+                equity += pos.quantity * price
+            else:
+                equity += pos.quantity * (pos.current_price or pos.avg_cost)
+        self.total_equity = equity
+        return equity
+
+class TradeRecord:
+    __slots__ = ("portfolio_id", "ticker", "action", "quantity", "price", "reasoning", "timestamp", "pnl_realized")
+
+    def __init__(
+        self,
+        portfolio_id: int,
+        ticker: str,
+        action: str,
+        quantity: int,
+        price: float,
+        reasoning: str = "",
+        timestamp: Optional[datetime] = None,
+        pnl_realized: Optional[float] = None
+    ):
+        self.portfolio_id = portfolio_id
+        self.ticker = ticker
+        self.action = action
+        self.quantity = quantity
+        self.price = price
+        self.reasoning = reasoning
+        self.timestamp = timestamp
+        self.pnl_realized = pnl_realized
+
+class RestingOrder:
+    __slots__ = ("id", "portfolio_id", "agent_id", "ticker", "action", "order_type", "quantity", "trigger_price", "reasoning", "expires_at")
+
+    def __init__(
+        self,
+        id: int,
+        portfolio_id: int,
+        ticker: str,
+        action: TradeAction,
+        order_type: OrderType,
+        quantity: int,
+        trigger_price: float,
+        reasoning: str = "",
+        expires_at: Optional[datetime] = None,
+        agent_id: Optional[uuid.UUID] = None
+    ):
+        self.id = id
+        self.portfolio_id = portfolio_id
+        self.agent_id = agent_id
+        self.ticker = ticker
+        self.action = TradeAction(action)
+        self.order_type = OrderType(order_type)
+        self.quantity = quantity
+        self.trigger_price = trigger_price
+        self.reasoning = reasoning
+        self.expires_at = expires_at
+
+    @property
+    def triggers_below(self) -> bool:
+        """True when the order fires as the price falls to the trigger (BUY LIMIT, SELL STOP), False when it rises to it."""
+        return (self.action == TradeAction.BUY) == (self.order_type == OrderType.LIMIT)
+
+    def triggered_by(self, price: float) -> bool:
+        return price <= self.trigger_price if self.triggers_below else price >= self.trigger_price
@@ -0,0 +1,125 @@
+"""
+One cycle's quotes, built once and shared read-only by every stage.
+
+A MarketSnapshot indexes tickers to rows and keeps hot fields as array('d') columns;
+agents get MarketViews (a ticker -> row index subset, cached per ticker set) instead
+of copied dicts. Each ticker's prompt JSON is rendered once, so a view's prompt text
+is a join of cached fragments, byte-identical to json.dumps(dict(view), indent=2).
+"""
+import json
+import math
+from array import array
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+class MarketView(Mapping):
+    """Read-only ticker -> quote mapping over some rows of a snapshot; nothing is copied."""
+    __slots__ = ("_snapshot", "_index", "_json", "_dict")
+
+    def __init__(self, snapshot: "MarketSnapshot", index: Dict[str, int]):
+        self._snapshot = snapshot
+        self._index = index
+        self._json: Optional[str] = None
+        self._dict: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def __getitem__(self, ticker: str) -> Mapping:
+        return self._snapshot._quotes[self._index[ticker]]
+
+    def __contains__(self, ticker: object) -> bool:
+        return ticker in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def view(self, tickers: Iterable[str]) -> "MarketView":
+        return self._snapshot.view(tickers)
+
+    def to_json(self) -> str:
+        """Prompt text for these quotes (cached)."""
+        if self._json is None:
+            if not self._index:
+                self._json = "{}"
+            else:
+                fragment = self._snapshot._fragment
+                self._json = "{\n" + ",\n".join(fragment(i) for i in self._index.values()) + "\n}"
+        return self._json
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Plain dict for JSON columns (audit snapshots), cached; its quote dicts are shared, not copied."""
+        if self._dict is None:
+            plain = self._snapshot._plain
+            self._dict = {ticker: plain[i] for ticker, i in self._index.items()}
+        return self._dict
+
+class PriceView(Mapping):
+    """ticker -> price over the snapshot's price column (zero-copy), for mark-to-market."""
+    __slots__ = ("_index", "_prices")
+
+    def __init__(self, index: Dict[str, int], prices: array):
+        self._index = index
+        self._prices = prices
+
+    def __getitem__(self, ticker: str) -> float:
+        return self._prices[self._index[ticker]]
+
+    def __contains__(self, ticker: object) -> bool:
+        return ticker in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+class MarketSnapshot(MarketView):
+    """Immutable quotes of one cycle: ticker index, read-only quote rows and float columns."""
+    __slots__ = ("tickers", "prices", "fetched_at", "fallback", "price_view", "_quotes", "_plain", "_fragments", "_columns", "_views")
+
+    def __init__(self, rich_data: Dict[str, Dict[str, Any]]):
+        self.tickers: Tuple[str, ...] = tuple(rich_data)
+        super().__init__(self, {ticker: i for i, ticker in enumerate(self.tickers)})
+        # Private copies: the source dicts may be a cache that outlives the cycle
+        self._plain: List[Dict[str, Any]] = [dict(quote) for quote in rich_data.values()]
+        self._quotes = tuple(MappingProxyType(quote) for quote in self._plain)
+        self.prices = array("d", (quote.get("price") or 0.0 for quote in self._plain)) # 0.0: no price, falsy like before
+        self.fetched_at = array("d", (quote.get("fetched_at") or math.nan for quote in self._plain))
+        self.fallback = bytes(bool(quote.get("is_fallback")) for quote in self._plain)
+        self.price_view = PriceView(self._index, self.prices)
+        self._fragments: List[Optional[str]] = [None] * len(self.tickers)
+        self._columns: Dict[str, array] = {}
+        self._views: Dict[Tuple[str, ...], MarketView] = {}
+
+    def _fragment(self, i: int) -> str:
+        if self._fragments[i] is None:
+            body = json.dumps(self._plain[i], indent=2).replace("\n", "\n  ")
+            self._fragments[i] = f"  {json.dumps(self.tickers[i])}: {body}"
+        return self._fragments[i]
+
+    def column(self, field: str) -> array:
+        """A quote field across all tickers as floats (NaN when missing, not numeric or infinite), cached."""
+        if field not in self._columns:
+            values = array("d")
+            for quote in self._plain:
+                value = quote.get(field)
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    value = math.nan
+                values.append(value if math.isfinite(value) else math.nan)
+            self._columns[field] = values
+        return self._columns[field]
+
+    def view(self, tickers: Iterable[str]) -> MarketView:
+        """The quotes of `tickers` (unknown ones skipped, order kept); agents with the same set share one view."""
+        index = self._index
+        key = tuple(dict.fromkeys(t for t in tickers if t in index))
+        if len(key) == len(self.tickers) and key == self.tickers:
+            return self
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = MarketView(self, {t: index[t] for t in key})
+        return view
@@ -3,13 +3,13 @@ from datetime import datetime
 from typing import List, Optional
 from enum import Enum as PyEnum
 
-from sqlalchemy import String, Float, ForeignKey, Text, DateTime, JSON, Uuid
+from sqlalchemy import String, Float, ForeignKey, Text, DateTime, JSON, Uuid, Index, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 class Base(DeclarativeBase):
     pass
 
-from app.domain.constants import TradeAction
+from app.domain.constants import CycleRunStatus, OrderStatus, OrderType, TradeAction
 
 class User(Base):
     __tablename__ = "users"
@@ -42,11 +42,38 @@ class Agent(Base):
     owner: Mapped[Optional["User"]] = relationship("User", back_populates="agents")
     portfolio: Mapped["Portfolio"] = relationship("Portfolio", back_populates="agent", uselist=False, cascade="all, delete-orphan")
     audit_logs: Mapped[List["AuditLog"]] = relationship("AuditLog", back_populates="agent", cascade="all, delete-orphan")
+    watchlist: Mapped[List["WatchlistEntry"]] = relationship("WatchlistEntry", back_populates="agent", cascade="all, delete-orphan")
+    orders: Mapped[List["Order"]] = relationship("Order", back_populates="agent", cascade="all, delete-orphan")
 
     @property
     def owner_username(self) -> Optional[str]:
         return self.owner.username if self.owner else None
 
+class Ticker(Base):
+    """Registry of tradable symbols; only active ones can be put on a watchlist."""
+    __tablename__ = "tickers"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    symbol: Mapped[str] = mapped_column(String(16), unique=True, index=True)
+    name: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    exchange: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    sector: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    asset_type: Mapped[str] = mapped_column(String(16), default="equity")
+    is_active: Mapped[bool] = mapped_column(default=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class WatchlistEntry(Base):
+    """One symbol an agent follows; its prompt carries quotes for these plus its holdings."""
+    __tablename__ = "watchlist_entries"
+    __table_args__ = (UniqueConstraint("agent_id", "ticker", name="uq_watchlist_entries_agent_ticker"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    agent_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("agents.id"), index=True)
+    ticker: Mapped[str] = mapped_column(ForeignKey("tickers.symbol"), index=True)
+
+    # Relationships
+    agent: Mapped["Agent"] = relationship("Agent", back_populates="watchlist")
+
 class Portfolio(Base):
     __tablename__ = "portfolios"
 
@@ -95,6 +122,30 @@ class Trade(Base):
     # Relationships
     portfolio: Mapped["Portfolio"] = relationship("Portfolio", back_populates="trades")
 
+class Order(Base):
+    """Resting LIMIT/STOP order; OPEN ones are held in the OrderBook and matched on every price update."""
+    __tablename__ = "orders"
+    __table_args__ = (Index("ix_orders_status_id", "status", "id"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    agent_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("agents.id"), index=True)
+    portfolio_id: Mapped[int] = mapped_column(ForeignKey("portfolios.id"))
+    ticker: Mapped[str] = mapped_column(String(16), nullable=False)
+    action: Mapped[TradeAction] = mapped_column(String(8), nullable=False) # stored as string
+    order_type: Mapped[OrderType] = mapped_column(String(8), nullable=False)
+    quantity: Mapped[int] = mapped_column(nullable=False)
+    trigger_price: Mapped[float] = mapped_column(Float, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), default=OrderStatus.OPEN.value)
+    reasoning: Mapped[str] = mapped_column(Text, default="")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True) # None: good till cancelled
+    closed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    fill_price: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    detail: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # Relationships
+    agent: Mapped["Agent"] = relationship("Agent", back_populates="orders")
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
@@ -106,3 +157,67 @@ class AuditLog(Base):
     
     # Relationships
     agent: Mapped["Agent"] = relationship("Agent", back_populates="audit_logs")
+
+class EquitySnapshot(Base):
+    """Append-only equity mark, written in bulk for every portfolio at each price update."""
+    __tablename__ = "equity_snapshots"
+    __table_args__ = (Index("ix_equity_snapshots_portfolio_ts", "portfolio_id", "timestamp"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    portfolio_id: Mapped[int] = mapped_column(ForeignKey("portfolios.id"))
+    timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    total_equity: Mapped[float] = mapped_column(Float, nullable=False)
+    cash_balance: Mapped[float] = mapped_column(Float, nullable=False)
+
+class EquityRollup(Base):
+    """Downsampled OHLC equity bucket ("1h" or "1d") built from snapshots by the rollup job."""
+    __tablename__ = "equity_rollups"
+    __table_args__ = (UniqueConstraint("portfolio_id", "resolution", "bucket_start", name="uq_equity_rollups_bucket"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    portfolio_id: Mapped[int] = mapped_column(ForeignKey("portfolios.id"))
+    resolution: Mapped[str] = mapped_column(String(8), nullable=False)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    open: Mapped[float] = mapped_column(Float, nullable=False)
+    high: Mapped[float] = mapped_column(Float, nullable=False)
+    low: Mapped[float] = mapped_column(Float, nullable=False)
+    close: Mapped[float] = mapped_column(Float, nullable=False)
+    samples: Mapped[int] = mapped_column(default=0)
+
+class CycleRun(Base):
+    """One market cycle; counters advance with each committed batch and the heartbeat while it runs, so a crashed run can be resumed."""
+    __tablename__ = "cycle_runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    status: Mapped[str] = mapped_column(String(16), default=CycleRunStatus.RUNNING.value, index=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    heartbeat_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    agents_total: Mapped[int] = mapped_column(default=0)
+    agents_done: Mapped[int] = mapped_column(default=0)
+    agents_failed: Mapped[int] = mapped_column(default=0)
+    resumes: Mapped[int] = mapped_column(default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # Relationships
+    agents: Mapped[List["CycleRunAgent"]] = relationship("CycleRunAgent", back_populates="run", cascade="all, delete-orphan")
+
+class CycleRunAgent(Base):
+    """Per-agent checkpoint, committed in the same transaction as the agent's trades and audit row."""
+    __tablename__ = "cycle_run_agents"
+    __table_args__ = (UniqueConstraint("run_id", "agent_id", name="uq_cycle_run_agents_run_agent"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    run_id: Mapped[int] = mapped_column(ForeignKey("cycle_runs.id"), index=True)
+    agent_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("agents.id"))
+    status: Mapped[str] = mapped_column(String(16))
+    queued_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True) # Waiting for a decision worker
+    decide_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True) # LLM call
+    execute_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True) # Decided -> executed
+    trades_executed: Mapped[int] = mapped_column(default=0)
+    trades_rejected: Mapped[int] = mapped_column(default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    run: Mapped["CycleRun"] = relationship("CycleRun", back_populates="agents")
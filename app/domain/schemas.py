@@ -1,10 +1,10 @@
-from pydantic import BaseModel, Field, UUID4, ConfigDict
+from pydantic import BaseModel, Field, UUID4, ConfigDict, model_validator
 from enum import Enum
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 
 # --- Enums ---
-from app.domain.constants import TradeAction
+from app.domain.constants import OrderStatus, OrderType, TradeAction
 
 class Token(BaseModel):
     access_token: str
@@ -13,6 +13,8 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     username: Optional[str] = None
     sub: Optional[str] = None
+    exp: Optional[int] = None
+    adm: Optional[bool] = None # Embedded is_admin claim (AUTH_EMBED_CLAIMS)
 
 class UserBase(BaseModel):
     username: str
@@ -47,13 +49,63 @@ class LLMTrade(BaseModel):
     action: TradeAction
     ticker: str
     quantity: int = Field(..., gt=0, description="Quantity to buy or sell. Must be positive.")
+    order_type: OrderType = Field(OrderType.MARKET, description="MARKET fills now; LIMIT and STOP rest until trigger_price is reached.")
+    trigger_price: Optional[float] = Field(None, gt=0, description="Limit or stop price; required for LIMIT and STOP.")
+
+    @model_validator(mode="after")
+    def check_trigger(self) -> "LLMTrade":
+        if self.order_type != OrderType.MARKET:
+            if self.trigger_price is None:
+                raise ValueError(f"{self.order_type.value} orders need a trigger_price")
+            if self.action == TradeAction.HOLD:
+                raise ValueError(f"{self.order_type.value} orders must BUY or SELL")
+        return self
 
 class LLMResponse(BaseModel):
     thoughts: str = Field(..., description="Reasoning behind the trade decisions.")
     trades: List[LLMTrade]
+    # Per-call accounting (latency, attempts, tokens) set by the adapter; not part of the model's output
+    usage: Optional[Dict[str, Any]] = Field(default=None, exclude=True)
+
+class AgentDecisionRequest(BaseModel):
+    """One agent's slice of a batched decision request; `key` ties the answer back to it."""
+    key: str
+    agent_name: str
+    portfolio: "PortfolioRead"
+    rank: int
+    leader_gap: float
+    persona: str = ""
+    provider: Optional[str] = None
 
 # --- Domain Schemas ---
 
+class TickerCreate(BaseModel):
+    symbol: str = Field(..., min_length=1, max_length=16)
+    name: Optional[str] = None
+    exchange: Optional[str] = None
+    sector: Optional[str] = None
+    asset_type: str = "equity"
+    is_active: bool = True
+
+class TickerUpdate(BaseModel):
+    name: Optional[str] = None
+    exchange: Optional[str] = None
+    sector: Optional[str] = None
+    asset_type: Optional[str] = None
+    is_active: Optional[bool] = None
+
+class TickerRead(TickerCreate):
+    id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+class WatchlistUpdate(BaseModel):
+    tickers: List[str]
+
+class WatchlistRead(BaseModel):
+    agent_id: UUID4
+    tickers: List[str] # Empty: the agent watches the default universe
+
 class AuditLogRead(BaseModel):
     id: int
     prompt: Dict[str, Any]
@@ -88,9 +140,56 @@ class PortfolioRead(BaseModel):
     cash_balance: float
     total_equity: float
     positions: List[PositionRead] = []
+    open_orders: List[LLMTrade] = [] # Resting LIMIT/STOP orders, as the agent placed them
 
     model_config = ConfigDict(from_attributes=True)
 
+class OrderRead(BaseModel):
+    id: int
+    ticker: str
+    action: TradeAction
+    order_type: OrderType
+    quantity: int
+    trigger_price: float
+    status: OrderStatus
+    reasoning: str
+    created_at: datetime
+    expires_at: Optional[datetime] = None # None: good till cancelled
+    closed_at: Optional[datetime] = None
+    fill_price: Optional[float] = None
+    detail: Optional[str] = None # Why a triggered order was rejected
+
+    model_config = ConfigDict(from_attributes=True)
+
+class EquityPointRead(BaseModel):
+    timestamp: datetime
+    equity: float # Close of the bucket for rolled-up resolutions
+    high: Optional[float] = None
+    low: Optional[float] = None
+
+class EquitySeriesRead(BaseModel):
+    agent_id: UUID4
+    resolution: str # "raw", "1h" or "1d"
+    points: List[EquityPointRead] = []
+
+class AgentAnalyticsRead(BaseModel):
+    agent_id: UUID4
+    as_of: Optional[datetime] = None # Mark the metrics were computed for
+    resolution: str
+    periods: int = 0 # Number of return periods in the lookback
+    total_return_pct: Optional[float] = None
+    volatility_pct: Optional[float] = None # Annualized
+    sharpe: Optional[float] = None
+    sortino: Optional[float] = None
+    max_drawdown_pct: Optional[float] = None
+    trade_count: int = 0
+    closed_trades: int = 0
+    win_rate: Optional[float] = None
+    avg_realized_pnl: Optional[float] = None
+    realized_pnl_total: float = 0.0
+    exposure_pct: Optional[float] = None # Gross position value / equity
+    turnover: Optional[float] = None # Traded notional / average equity over the lookback
+
 class AgentCreate(BaseModel):
     name: str
     provider: str = "gemini"
@@ -109,3 +208,68 @@ class AgentRead(BaseModel):
 class AgentDetail(AgentRead):
     audit_logs: List[AuditLogRead] = []
     trades: List[TradeRead] = []
+
+# --- Backtest Schemas ---
+
+class BacktestAgentConfig(BaseModel):
+    name: str
+    persona: str = "You are a rational profit-maximizing trader."
+    cash: float = 10000.0
+
+class BacktestScenario(BaseModel):
+    name: str
+    agents: List[BacktestAgentConfig]
+    prices: Dict[str, List[Tuple[datetime, float]]] = {} # ticker -> [(timestamp, close)], oldest first
+    llm: str = "app.adapters.replay_llm_adapter:ReplayLLMAdapter" # "module:Class" LLMPort spec
+    llm_kwargs: Dict[str, Any] = {}
+    cycle_minutes: int = 30
+    llm_concurrency: int = 8
+
+class BacktestAgentResult(BaseModel):
+    name: str
+    final_equity: float
+    total_return_pct: Optional[float] = None
+    sharpe: Optional[float] = None
+    max_drawdown_pct: Optional[float] = None
+    trades: int = 0
+    rejected_trades: int = 0
+    rejections: Dict[str, int] = {} # RiskRejectReason -> count (open-order cap rejections are only in the total)
+    llm_errors: int = 0
+    equity_curve: List[float] = []
+
+class BacktestResult(BaseModel):
+    scenario: str
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    cycles: int = 0
+    duration_seconds: float = 0.0
+    agents: List[BacktestAgentResult] = []
+
+class CycleRunAgentRead(BaseModel):
+    agent_id: UUID4
+    agent_name: Optional[str] = None
+    status: str
+    queued_ms: Optional[float] = None
+    decide_ms: Optional[float] = None
+    execute_ms: Optional[float] = None
+    trades_executed: int = 0
+    trades_rejected: int = 0
+    error: Optional[str] = None
+    finished_at: datetime
+
+class CycleRunRead(BaseModel):
+    id: int
+    status: str
+    started_at: datetime
+    heartbeat_at: datetime
+    finished_at: Optional[datetime] = None
+    agents_total: int
+    agents_done: int
+    agents_failed: int
+    resumes: int
+    error: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class CycleRunDetail(CycleRunRead):
+    agents: List[CycleRunAgentRead] = []
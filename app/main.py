@@ -1,11 +1,12 @@
+import time
+_import_started = time.perf_counter()
+
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import logging
 
 from app.core.config import settings
 from app.api import routes, deps
-from app.services.scheduler_service import SchedulerService
-from app.domain.models import Base
 
 # Setup Logging
 logging.basicConfig(
@@ -14,80 +15,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-scheduler_service = SchedulerService()
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    logger.info("Initializing Database...")
-    from app.core.database import engine, SessionLocal
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    
-    # Seed Admin User
-    async with SessionLocal() as session:
-        from app.domain.models import User
-        from app.core.security import get_password_hash
-        from sqlalchemy import select
-        
-        result = await session.execute(select(User).where(User.username == "admin"))
-        admin = result.scalars().first()
-        if not admin:
-            logger.info("creating default admin user")
-            admin_user = User(
-                username="admin",
-                hashed_password=get_password_hash("admin"),
-                is_admin=True
-            )
-            session.add(admin_user)
-            await session.commit()
-            logger.info("Default admin user created (admin/admin)")
-        
-        # Seed Initial Agents
-        from app.domain.models import Agent, Portfolio
-        result = await session.execute(select(Agent))
-        agents = result.scalars().all()
-        
-        if not agents and admin:
-            logger.info("Seeding default agents...")
-            
-            # Agent 1: AlphaBot
-            agent1 = Agent(
-                name="AlphaBot",
-                provider="gemini", 
-                persona="You are a simplified momentum trader.",
-                owner_id=admin.id
-            )
-            session.add(agent1)
-            
-            # Agent 2: MarketMaker
-            agent2 = Agent(
-                name="MarketMaker",
-                provider="gemini",
-                persona="You are a high-frequency liquidity provider.",
-                owner_id=admin.id
-            )
-            session.add(agent2)
-            
-            await session.flush() # Generate IDs
-            
-            # Portfolios
-            p1 = Portfolio(agent_id=agent1.id, cash_balance=100000.0, total_equity=100000.0)
-            p2 = Portfolio(agent_id=agent2.id, cash_balance=500000.0, total_equity=500000.0)
-            
-            session.add(p1)
-            session.add(p2)
-            
-            await session.commit()
-            logger.info("Seeded agents: AlphaBot, MarketMaker")
+    started = time.perf_counter()
+    if settings.RUN_DB_INIT:
+        from app.core.database import engine, SessionLocal
+        from app.services.bootstrap import create_schema, seed_defaults
+        await create_schema(engine)
+        async with SessionLocal() as session:
+            await seed_defaults(session)
+
+    scheduler_service = None
+    if settings.PORTFOLIO_BOOK_ENABLED and not settings.USE_PORTFOLIO_BOOK:
+        logger.warning("⚠️ PORTFOLIO_BOOK_ENABLED needs the in-process scheduler; marks go straight to the database")
+    if settings.RUN_SCHEDULER:
+        # Imported here: APScheduler and the LLM/market adapters are not needed to serve requests
+        from app.services.scheduler_service import SchedulerService
+        logger.info("Starting Scheduler...")
+        scheduler_service = SchedulerService()
+        await scheduler_service.start()
+    logger.info(
+        f"⚡ Startup: imports {(started - _import_started) * 1000:.0f}ms, lifespan {(time.perf_counter() - started) * 1000:.0f}ms "
+        f"(db init {'on' if settings.RUN_DB_INIT else 'off'}, scheduler {'on' if scheduler_service else 'off'})"
+    )
 
-    logger.info("Starting Scheduler...")
-    await scheduler_service.start()
-    
     yield
-    
+
     # Shutdown
-    await scheduler_service.shutdown()
+    if scheduler_service:
+        await scheduler_service.shutdown()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -95,13 +52,31 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-from app.api.endpoints import auth
+from app.api.endpoints import auth, tickers, exports, orders
 app.include_router(auth.router, prefix=settings.API_V1_STR)
+app.include_router(tickers.router, prefix=settings.API_V1_STR)
+app.include_router(orders.router, prefix=settings.API_V1_STR)
+app.include_router(exports.router, prefix=settings.API_V1_STR)
 app.include_router(routes.router, prefix=settings.API_V1_STR)
 
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
+# Compress large JSON payloads (leaderboard, agent detail); gzip exports are already compressed
+if settings.RESPONSE_GZIP_MIN_SIZE > 0:
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.RESPONSE_GZIP_MIN_SIZE,
+        exclude_content_types=(*DEFAULT_EXCLUDED_CONTENT_TYPES, "application/gzip")
+    )
+
+# Outermost, so the headers cover everything the handler (and gzip) did before the response starts
+if settings.DB_QUERY_STATS_ENABLED:
+    from app.core.query_stats import QueryStatsMiddleware
+    app.add_middleware(QueryStatsMiddleware, headers=settings.DB_QUERY_STATS_HEADERS)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
@@ -1,6 +1,8 @@
+import asyncio
+import importlib
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
-from app.domain.schemas import LLMResponse, PortfolioRead
+from typing import Callable, List, Dict, Any, Optional, Union
+from app.domain.schemas import AgentDecisionRequest, LLMResponse, LLMTrade, PortfolioRead
 
 class LLMPort(ABC):
     
@@ -13,9 +15,80 @@ class LLMPort(ABC):
         rank: int,
         leader_gap: float,
         persona: str = "",
-        news_context: str = ""
+        news_context: str = "",
+        provider: Optional[str] = None
     ) -> LLMResponse:
         """
         Ask the LLM for trading decisions based on current portfolio, market data, and gamification context.
+        `provider` is the agent's Agent.provider; routers dispatch on it, single-provider adapters ignore it.
         """
         pass
+
+    # Adapters that can answer several agents in one request set this and override the batch call
+    supports_batch: bool = False
+
+    async def generate_batch_decisions(
+        self,
+        requests: List[AgentDecisionRequest],
+        market_data: Dict[str, Any],
+        news_context: str = "",
+        provider: Optional[str] = None
+    ) -> Dict[str, Union[LLMResponse, Exception]]:
+        """
+        Decisions for several agents sharing one market context, keyed by request key.
+        A failed agent maps to its exception. This default makes one call per agent.
+        """
+        async def decide(r: AgentDecisionRequest):
+            return await self.generate_trade_decision(
+                agent_name=r.agent_name,
+                portfolio=r.portfolio,
+                market_data=market_data,
+                rank=r.rank,
+                leader_gap=r.leader_gap,
+                persona=r.persona,
+                news_context=news_context,
+                provider=provider or r.provider
+            )
+        results = await asyncio.gather(*(decide(r) for r in requests), return_exceptions=True)
+        return {r.key: result for r, result in zip(requests, results)}
+
+    # Adapters that parse the response as it streams set this and override the streaming call
+    supports_streaming: bool = False
+
+    async def stream_trade_decision(
+        self,
+        agent_name: str,
+        portfolio: PortfolioRead,
+        market_data: Dict[str, Any],
+        rank: int,
+        leader_gap: float,
+        persona: str = "",
+        news_context: str = "",
+        provider: Optional[str] = None,
+        on_trades: Optional[Callable[[List[LLMTrade]], None]] = None
+    ) -> LLMResponse:
+        """
+        Like generate_trade_decision, but `on_trades` is called once with the validated trades
+        as soon as they are known, possibly before the thoughts are complete.
+        This default calls it when the whole decision is in.
+        """
+        decision = await self.generate_trade_decision(
+            agent_name=agent_name,
+            portfolio=portfolio,
+            market_data=market_data,
+            rank=rank,
+            leader_gap=leader_gap,
+            persona=persona,
+            news_context=news_context,
+            provider=provider
+        )
+        if on_trades is not None:
+            on_trades(list(decision.trades))
+        return decision
+
+
+def load_llm_adapter(spec: str, **kwargs) -> LLMPort:
+    """Build an adapter from a "module:Class" spec, e.g. "app.adapters.gemini_adapter:GeminiAdapter"."""
+    module_name, _, class_name = spec.partition(":")
+    adapter_cls = getattr(importlib.import_module(module_name), class_name)
+    return adapter_cls(**kwargs)
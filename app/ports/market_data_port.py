@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from datetime import datetime
+from typing import Dict, List, Tuple
 
 class MarketDataPort(ABC):
     
@@ -12,3 +13,8 @@ class MarketDataPort(ABC):
     async def get_current_prices(self, tickers: List[str]) -> Dict[str, float]:
         """Fetch real-time prices for multiple tickers. Returns a dict {ticker: price}."""
         pass
+
+    @abstractmethod
+    async def get_price_history(self, ticker: str, range_: str = "60d", interval: str = "30m") -> List[Tuple[datetime, float]]:
+        """Fetch historical closes as [(utc_timestamp, close)], oldest first."""
+        pass
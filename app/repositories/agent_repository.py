@@ -1,10 +1,11 @@
 import uuid
+from collections import defaultdict
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from app.repositories.base import BaseRepository
-from app.domain.models import Agent, Portfolio
+from app.domain.models import Agent, Portfolio, Position, Trade, AuditLog, User
 from app.domain.schemas import AgentCreate, AgentRead
 
 class AgentRepository(BaseRepository[Agent, AgentCreate, AgentCreate]):
@@ -17,11 +18,138 @@ class AgentRepository(BaseRepository[Agent, AgentCreate, AgentCreate]):
         """Fetch all agents with their portfolios eagerly loaded."""
         stmt = select(Agent).options(
             selectinload(Agent.portfolio).selectinload(Portfolio.positions),
-            selectinload(Agent.owner)
+            selectinload(Agent.owner),
+            selectinload(Agent.watchlist)
         )
         result = await self.session.execute(stmt)
         return result.scalars().all()
+
+    async def get_page_with_portfolios(self, after_id: Optional[uuid.UUID], limit: int) -> list[Agent]:
+        """Keyset page of agents (by id) with portfolios eagerly loaded, for streaming a cycle."""
+        stmt = select(Agent).options(
+            selectinload(Agent.portfolio).selectinload(Portfolio.positions),
+            selectinload(Agent.owner),
+            selectinload(Agent.watchlist)
+        ).order_by(Agent.id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(Agent.id > after_id)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
     
+    # --- Read Projections ---
+    # Plain dicts shaped like AgentRead / AgentDetail, built from column selects
+    # so API handlers can serialize them without hydrating and re-validating ORM graphs.
+
+    async def get_agent_rows(self, owner_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """AgentRead-shaped rows for all agents (or those of one owner)."""
+        stmt = (
+            select(
+                Agent.id, Agent.name, Agent.provider, Agent.persona,
+                User.username,
+                Portfolio.id, Portfolio.cash_balance, Portfolio.total_equity,
+            )
+            .outerjoin(User, Agent.owner_id == User.id)
+            .outerjoin(Portfolio, Portfolio.agent_id == Agent.id)
+        )
+        if owner_id is not None:
+            stmt = stmt.where(Agent.owner_id == owner_id)
+        result = await self.session.execute(stmt)
+
+        rows = []
+        portfolios = {}
+        for agent_id, name, provider, persona, owner_username, pid, cash, equity in result.all():
+            portfolio = None
+            if pid is not None:
+                portfolio = {"id": pid, "cash_balance": cash, "total_equity": equity, "positions": []}
+                portfolios[pid] = portfolio
+            rows.append({
+                "id": agent_id,
+                "name": name,
+                "provider": provider,
+                "persona": persona,
+                "owner_username": owner_username,
+                "portfolio": portfolio,
+            })
+
+        if portfolios:
+            # The full leaderboard reads every position, so skip a huge IN list
+            positions = await self._get_position_rows(list(portfolios.keys()) if owner_id is not None else None)
+            for pid, items in positions.items():
+                portfolios[pid]["positions"] = items
+        return rows
+
+    async def get_agent_detail_row(self, agent_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        """AgentDetail-shaped row for one agent, including trades and audit logs."""
+        stmt = (
+            select(
+                Agent.id, Agent.name, Agent.provider, Agent.persona,
+                User.username,
+                Portfolio.id, Portfolio.cash_balance, Portfolio.total_equity,
+            )
+            .outerjoin(User, Agent.owner_id == User.id)
+            .outerjoin(Portfolio, Portfolio.agent_id == Agent.id)
+            .where(Agent.id == agent_id)
+        )
+        row = (await self.session.execute(stmt)).first()
+        if row is None:
+            return None
+
+        _, name, provider, persona, owner_username, pid, cash, equity = row
+        portfolio = None
+        trades = []
+        if pid is not None:
+            positions = await self._get_position_rows([pid])
+            portfolio = {"id": pid, "cash_balance": cash, "total_equity": equity, "positions": positions.get(pid, [])}
+
+            trade_stmt = select(
+                Trade.id, Trade.ticker, Trade.action, Trade.quantity, Trade.price,
+                Trade.reasoning, Trade.timestamp, Trade.pnl_realized
+            ).where(Trade.portfolio_id == pid).order_by(Trade.id)
+            trades = [
+                {
+                    "id": t_id, "ticker": ticker, "action": action, "quantity": qty, "price": price,
+                    "reasoning": reasoning, "timestamp": ts, "pnl_realized": pnl
+                }
+                for t_id, ticker, action, qty, price, reasoning, ts, pnl in (await self.session.execute(trade_stmt)).all()
+            ]
+
+        audit_stmt = select(
+            AuditLog.id, AuditLog.prompt, AuditLog.response, AuditLog.timestamp
+        ).where(AuditLog.agent_id == agent_id).order_by(AuditLog.id)
+        audit_logs = [
+            {"id": log_id, "prompt": prompt, "response": response, "timestamp": ts}
+            for log_id, prompt, response, ts in (await self.session.execute(audit_stmt)).all()
+        ]
+
+        return {
+            "id": agent_id,
+            "name": name,
+            "provider": provider,
+            "persona": persona,
+            "owner_username": owner_username,
+            "portfolio": portfolio,
+            "audit_logs": audit_logs,
+            "trades": trades,
+        }
+
+    async def _get_position_rows(self, portfolio_ids: Optional[List[int]]) -> Dict[int, List[Dict[str, Any]]]:
+        stmt = select(
+            Position.portfolio_id, Position.ticker, Position.quantity, Position.avg_cost, Position.current_price
+        ).order_by(Position.id)
+        if portfolio_ids is not None:
+            stmt = stmt.where(Position.portfolio_id.in_(portfolio_ids))
+        grouped = defaultdict(list)
+        for pid, ticker, qty, avg_cost, price in (await self.session.execute(stmt)).all():
+            grouped[pid].append({
+                "ticker": ticker,
+                "quantity": qty,
+                "avg_cost": avg_cost,
+                "current_price": price,
+                # Mirrors Position.unrealized_pnl
+                "unrealized_pnl": (price - avg_cost) * qty if price is not None else 0.0,
+            })
+        return grouped
+
     async def create_with_portfolio(self, obj_in: AgentCreate) -> Agent:
         """Create an agent and initialize their portfolio."""
         agent = Agent(name=obj_in.name, provider=obj_in.provider, persona=obj_in.persona)
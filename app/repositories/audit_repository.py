@@ -0,0 +1,6 @@
+from app.repositories.base import BulkInsertRepository
+from app.domain.models import AuditLog
+from app.domain.schemas import AuditLogRead
+
+class AuditLogRepository(BulkInsertRepository[AuditLog, AuditLogRead, AuditLogRead]):
+    json_columns = ("prompt", "response")
@@ -1,8 +1,9 @@
+import json
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 from uuid import UUID
 
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import select, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -49,3 +50,50 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             await self.session.delete(obj)
             await self.session.commit()
         return obj
+
+class BulkInsertRepository(BaseRepository[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    Buffers plain row dicts and writes them in one go: COPY on Postgres (asyncpg),
+    a single executemany INSERT elsewhere. Rows must carry every value the table
+    needs, since ORM defaults and relationships are bypassed.
+    """
+    # Columns that must be JSON-encoded text for COPY (asyncpg's json codec expects str)
+    json_columns: tuple = ()
+
+    def __init__(self, model: Type[ModelType], session: AsyncSession):
+        super().__init__(model, session)
+        self._buffer: List[Dict[str, Any]] = []
+
+    def buffer(self, **row: Any) -> Dict[str, Any]:
+        self._buffer.append(row)
+        return row
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def flush_buffer(self) -> int:
+        """Write buffered rows in the session's current transaction (caller commits)."""
+        if not self._buffer:
+            return 0
+        rows, self._buffer = self._buffer, []
+
+        if self.session.bind.dialect.driver == "asyncpg":
+            await self._copy(rows)
+        else:
+            # Core insert: the ORM bulk path drops None values, and every change of key set
+            # (e.g. BUY rows without pnl_realized between SELL rows) starts a new statement
+            await self.session.execute(insert(self.model.__table__), rows)
+        return len(rows)
+
+    async def _copy(self, rows: List[Dict[str, Any]]):
+        columns = list(rows[0].keys())
+        records = [
+            tuple(json.dumps(row[c]) if c in self.json_columns else row[c] for c in columns)
+            for row in rows
+        ]
+        connection = await self.session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            self.model.__tablename__, records=records, columns=columns
+        )
@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import delete, func, select, update
+
+from app.repositories.base import BaseRepository, BulkInsertRepository
+from app.domain.constants import CycleAgentStatus, CycleRunStatus
+from app.domain.models import Agent, CycleRun, CycleRunAgent
+from app.domain.schemas import CycleRunAgentRead, CycleRunRead
+
+class CycleRunRepository(BaseRepository[CycleRun, CycleRunRead, CycleRunRead]):
+
+    async def get_latest_unfinished(self) -> Optional[CycleRun]:
+        """Most recent run that is still RUNNING (live or crashed) or FAILED."""
+        result = await self.session.execute(
+            select(CycleRun)
+            .where(CycleRun.status.in_([CycleRunStatus.RUNNING.value, CycleRunStatus.FAILED.value]))
+            .order_by(CycleRun.started_at.desc())
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    async def abandon_unfinished(self, before: datetime) -> int:
+        """Give up on unfinished runs started before `before` (caller commits)."""
+        result = await self.session.execute(
+            update(CycleRun)
+            .where(CycleRun.status.in_([CycleRunStatus.RUNNING.value, CycleRunStatus.FAILED.value]), CycleRun.started_at < before)
+            .values(status=CycleRunStatus.ABANDONED.value, finished_at=datetime.utcnow())
+        )
+        return result.rowcount
+
+    async def set_status(self, run_id: int, status: CycleRunStatus, error: Optional[str] = None):
+        """Status change by statement, usable after a rollback has expired the loaded row (caller commits)."""
+        values = {"status": status.value, "finished_at": datetime.utcnow()}
+        if error is not None:
+            values["error"] = error
+        await self.session.execute(update(CycleRun).where(CycleRun.id == run_id).values(**values))
+
+    async def touch(self, run_id: int, now: datetime) -> bool:
+        """Advance a RUNNING run's heartbeat (caller commits). False if the run is no longer RUNNING."""
+        result = await self.session.execute(
+            update(CycleRun)
+            .where(CycleRun.id == run_id, CycleRun.status == CycleRunStatus.RUNNING.value)
+            .values(heartbeat_at=now)
+        )
+        return bool(result.rowcount)
+
+    async def done_agent_ids(self, run_id: int) -> Set[Any]:
+        result = await self.session.execute(
+            select(CycleRunAgent.agent_id).where(CycleRunAgent.run_id == run_id, CycleRunAgent.status == CycleAgentStatus.DONE.value)
+        )
+        return set(result.scalars().all())
+
+    async def clear_failed(self, run_id: int) -> int:
+        """Drop FAILED checkpoints so a resume retries those agents (caller commits)."""
+        result = await self.session.execute(
+            delete(CycleRunAgent).where(CycleRunAgent.run_id == run_id, CycleRunAgent.status == CycleAgentStatus.FAILED.value)
+        )
+        return result.rowcount
+
+    async def count_agents(self) -> int:
+        return (await self.session.execute(select(func.count()).select_from(Agent))).scalar()
+
+    async def list_recent(self, limit: int = 20) -> List[CycleRun]:
+        result = await self.session.execute(select(CycleRun).order_by(CycleRun.started_at.desc()).limit(limit))
+        return result.scalars().all()
+
+    async def get_agent_rows(self, run_id: int) -> List[Dict[str, Any]]:
+        """CycleRunAgentRead-shaped rows for one run, slowest decisions first."""
+        result = await self.session.execute(
+            select(
+                CycleRunAgent.agent_id, Agent.name.label("agent_name"), CycleRunAgent.status,
+                CycleRunAgent.queued_ms, CycleRunAgent.decide_ms, CycleRunAgent.execute_ms,
+                CycleRunAgent.trades_executed, CycleRunAgent.trades_rejected,
+                CycleRunAgent.error, CycleRunAgent.finished_at
+            )
+            .join(Agent, Agent.id == CycleRunAgent.agent_id)
+            .where(CycleRunAgent.run_id == run_id)
+            .order_by(CycleRunAgent.decide_ms.desc())
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+class CycleRunAgentRepository(BulkInsertRepository[CycleRunAgent, CycleRunAgentRead, CycleRunAgentRead]):
+    pass
@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, insert, delete, func
+
+from app.repositories.base import BaseRepository
+from app.domain.models import EquitySnapshot, EquityRollup
+from app.domain.schemas import EquityPointRead
+from app.core.config import settings
+
+RESOLUTIONS = {
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+
+def bucket_start(ts: datetime, resolution: str) -> datetime:
+    if resolution == "1h":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def pick_resolution(start: datetime, end: datetime) -> str:
+    """Finest resolution whose point count for the range stays under EQUITY_SERIES_MAX_POINTS."""
+    span = (end - start).total_seconds()
+    if span / max(settings.PRICE_UPDATE_INTERVAL_SECONDS, 1) <= settings.EQUITY_SERIES_MAX_POINTS:
+        return "raw"
+    if span / RESOLUTIONS["1h"].total_seconds() <= settings.EQUITY_SERIES_MAX_POINTS:
+        return "1h"
+    return "1d"
+
+class EquityRepository(BaseRepository[EquitySnapshot, EquityPointRead, EquityPointRead]):
+
+    async def add_snapshots(self, rows: List[Dict[str, Any]]):
+        """Bulk append snapshots ({portfolio_id, timestamp, total_equity, cash_balance}) in one INSERT."""
+        if rows:
+            await self.session.execute(insert(EquitySnapshot), rows)
+
+    async def get_series(
+        self,
+        portfolio_id: int,
+        start: datetime,
+        end: datetime,
+        resolution: str
+    ) -> List[Dict[str, Any]]:
+        """EquityPointRead-shaped rows for one portfolio."""
+        if resolution == "raw":
+            stmt = select(EquitySnapshot.timestamp, EquitySnapshot.total_equity).where(
+                EquitySnapshot.portfolio_id == portfolio_id,
+                EquitySnapshot.timestamp >= start,
+                EquitySnapshot.timestamp <= end
+            ).order_by(EquitySnapshot.timestamp)
+            result = await self.session.execute(stmt)
+            return [{"timestamp": ts, "equity": eq} for ts, eq in result.all()]
+
+        stmt = select(EquityRollup.bucket_start, EquityRollup.close, EquityRollup.high, EquityRollup.low).where(
+            EquityRollup.portfolio_id == portfolio_id,
+            EquityRollup.resolution == resolution,
+            EquityRollup.bucket_start >= bucket_start(start, resolution),
+            EquityRollup.bucket_start <= end
+        ).order_by(EquityRollup.bucket_start)
+        result = await self.session.execute(stmt)
+        return [{"timestamp": ts, "equity": close, "high": high, "low": low} for ts, close, high, low in result.all()]
+
+    async def watermark(self, resolution: str) -> Optional[datetime]:
+        """Start of the latest `resolution` bucket stored (it may still be partial)."""
+        result = await self.session.execute(
+            select(func.max(EquityRollup.bucket_start)).where(EquityRollup.resolution == resolution)
+        )
+        return result.scalar()
+
+    async def rollup(self, resolution: str, since: Optional[datetime] = None, until: Optional[datetime] = None) -> int:
+        """
+        (Re)build `resolution` buckets overlapping [since, until].
+        1h buckets are built from raw snapshots, 1d buckets from the 1h rollups.
+        Without `since`, resumes from the resolution's watermark (or the oldest source row),
+        so buckets missed while the job was not running are caught up.
+        Returns the number of buckets written.
+        """
+        until = until or datetime.utcnow()
+        if since is None:
+            since = await self.watermark(resolution) or await self._oldest_source(resolution)
+            if since is None:
+                return 0
+        since = bucket_start(since, resolution)
+
+        if resolution == "1h":
+            stmt = select(
+                EquitySnapshot.portfolio_id, EquitySnapshot.timestamp, EquitySnapshot.total_equity
+            ).where(
+                EquitySnapshot.timestamp >= since, EquitySnapshot.timestamp <= until
+            ).order_by(EquitySnapshot.portfolio_id, EquitySnapshot.timestamp)
+        else:
+            stmt = select(
+                EquityRollup.portfolio_id, EquityRollup.bucket_start,
+                EquityRollup.open, EquityRollup.high, EquityRollup.low, EquityRollup.close
+            ).where(
+                EquityRollup.resolution == "1h",
+                EquityRollup.bucket_start >= since, EquityRollup.bucket_start <= until
+            ).order_by(EquityRollup.portfolio_id, EquityRollup.bucket_start)
+
+        result = await self.session.stream(stmt.execution_options(yield_per=5000))
+        buckets = []
+        async for partition in result.partitions():
+            if resolution == "1h":
+                # A raw mark is its own open/high/low/close
+                partition = ((pid, ts, eq, eq, eq, eq) for pid, ts, eq in partition)
+            buckets.extend(self._aggregate(partition, resolution))
+        # A portfolio can span partitions; merge adjacent pieces of the same bucket
+        buckets = self._merge(buckets)
+
+        await self.session.execute(delete(EquityRollup).where(
+            EquityRollup.resolution == resolution,
+            EquityRollup.bucket_start >= since,
+            EquityRollup.bucket_start <= until
+        ))
+        if buckets:
+            await self.session.execute(insert(EquityRollup), buckets)
+        return len(buckets)
+
+    async def prune_raw(self, older_than: datetime) -> int:
+        """Delete raw snapshots older than `older_than`, but never ones not yet covered by every rollup resolution."""
+        watermarks = [await self.watermark(resolution) for resolution in RESOLUTIONS]
+        if None in watermarks:
+            return 0
+        cutoff = min(older_than, *watermarks)
+        result = await self.session.execute(delete(EquitySnapshot).where(EquitySnapshot.timestamp < cutoff))
+        return result.rowcount or 0
+
+    async def _oldest_source(self, resolution: str) -> Optional[datetime]:
+        if resolution == "1h":
+            stmt = select(func.min(EquitySnapshot.timestamp))
+        else:
+            stmt = select(func.min(EquityRollup.bucket_start)).where(EquityRollup.resolution == "1h")
+        return (await self.session.execute(stmt)).scalar()
+
+    async def latest_snapshot_time(self) -> Optional[datetime]:
+        result = await self.session.execute(select(func.max(EquitySnapshot.timestamp)))
+        return result.scalar()
+
+    @staticmethod
+    def _aggregate(rows: Iterable[Tuple], resolution: str) -> List[Dict[str, Any]]:
+        # rows are ordered by (portfolio_id, timestamp)
+        buckets = []
+        current = None
+        for pid, ts, open_, high, low, close in rows:
+            start = bucket_start(ts, resolution)
+            if current and current["portfolio_id"] == pid and current["bucket_start"] == start:
+                current["high"] = max(current["high"], high)
+                current["low"] = min(current["low"], low)
+                current["close"] = close
+                current["samples"] += 1
+            else:
+                current = {
+                    "portfolio_id": pid, "resolution": resolution, "bucket_start": start,
+                    "open": open_, "high": high, "low": low, "close": close, "samples": 1
+                }
+                buckets.append(current)
+        return buckets
+
+    @staticmethod
+    def _merge(buckets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        merged = []
+        for b in buckets:
+            prev = merged[-1] if merged else None
+            if prev and prev["portfolio_id"] == b["portfolio_id"] and prev["bucket_start"] == b["bucket_start"]:
+                prev["high"] = max(prev["high"], b["high"])
+                prev["low"] = min(prev["low"], b["low"])
+                prev["close"] = b["close"]
+                prev["samples"] += b["samples"]
+            else:
+                merged.append(b)
+        return merged
@@ -0,0 +1,77 @@
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import select, update
+
+from app.repositories.base import BulkInsertRepository
+from app.domain.constants import OrderStatus
+from app.domain.ledger import RestingOrder
+from app.domain.models import Order
+from app.domain.schemas import OrderRead
+
+class OrderRepository(BulkInsertRepository[Order, OrderRead, OrderRead]):
+
+    async def get_open(self, after_id: int = 0) -> List[RestingOrder]:
+        """OPEN orders with an id above `after_id`, as OrderBook entries."""
+        result = await self.session.execute(
+            select(Order.id, Order.portfolio_id, Order.agent_id, Order.ticker, Order.action, Order.order_type,
+                   Order.quantity, Order.trigger_price, Order.reasoning, Order.expires_at)
+            .where(Order.status == OrderStatus.OPEN.value, Order.id > after_id)
+            .order_by(Order.id)
+        )
+        return [
+            RestingOrder(id=oid, portfolio_id=pid, agent_id=agent_id, ticker=ticker, action=action, order_type=order_type,
+                         quantity=qty, trigger_price=trigger, reasoning=reasoning or "", expires_at=expires_at)
+            for oid, pid, agent_id, ticker, action, order_type, qty, trigger, reasoning, expires_at in result.all()
+        ]
+
+    async def claim_open(self, ids: Iterable[int]) -> Set[int]:
+        """
+        Which of `ids` are still OPEN, locked until the caller commits: a no-op UPDATE takes the row locks
+        (the write lock on SQLite), so a concurrent cancel waits for the fill and then finds the order closed.
+        """
+        result = await self.session.execute(
+            update(Order)
+            .where(Order.id.in_(list(ids)), Order.status == OrderStatus.OPEN.value)
+            .values(status=Order.status)
+            .returning(Order.id)
+        )
+        return set(result.scalars().all())
+
+    async def close_many(self, rows: List[Dict[str, Any]]):
+        """
+        Record fills and rejections in one executemany UPDATE of the rows still OPEN;
+        rows carry id, status, closed_at, fill_price, detail (caller commits).
+        """
+        if rows:
+            await self.session.execute(
+                update(Order).where(Order.status == OrderStatus.OPEN.value).execution_options(synchronize_session=None), rows
+            )
+
+    async def cancel(self, order_id: int, now: datetime) -> bool:
+        """Cancel the order if it is still OPEN; False if a fill, expiry or other cancel closed it first (caller commits)."""
+        result = await self.session.execute(
+            update(Order)
+            .where(Order.id == order_id, Order.status == OrderStatus.OPEN.value)
+            .values(status=OrderStatus.CANCELLED.value, closed_at=now)
+        )
+        return result.rowcount > 0
+
+    async def expire(self, ids: List[int], now: datetime) -> int:
+        """Mark the still OPEN ones of `ids` EXPIRED (caller commits)."""
+        if not ids:
+            return 0
+        result = await self.session.execute(
+            update(Order)
+            .where(Order.id.in_(ids), Order.status == OrderStatus.OPEN.value)
+            .values(status=OrderStatus.EXPIRED.value, closed_at=now)
+        )
+        return result.rowcount
+
+    async def list_for_agent(self, agent_id: uuid.UUID, status: Optional[OrderStatus] = None, limit: int = 100) -> List[Order]:
+        stmt = select(Order).where(Order.agent_id == agent_id)
+        if status is not None:
+            stmt = stmt.where(Order.status == status.value)
+        result = await self.session.execute(stmt.order_by(Order.id.desc()).limit(limit))
+        return result.scalars().all()
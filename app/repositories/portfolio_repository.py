@@ -1,10 +1,10 @@
 from uuid import UUID
-from typing import Optional
+from typing import Dict, List, Optional, Set, Tuple
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
 from app.repositories.base import BaseRepository
-from app.domain.models import Portfolio
+from app.domain.models import Portfolio, Position
 from app.domain.schemas import PortfolioRead # Using Read schema as generic Create/Update might be handled internally
 
 class PortfolioRepository(BaseRepository[Portfolio, PortfolioRead, PortfolioRead]):
@@ -14,3 +14,32 @@ class PortfolioRepository(BaseRepository[Portfolio, PortfolioRead, PortfolioRead
         stmt = select(Portfolio).where(Portfolio.agent_id == agent_id).options(selectinload(Portfolio.positions))
         result = await self.session.execute(stmt)
         return result.scalars().first()
+
+    async def get_many_with_positions(self, ids: List[int]) -> List[Portfolio]:
+        """Current rows, overwriting any copies the session already holds (loaded before another writer committed)."""
+        result = await self.session.execute(
+            select(Portfolio).where(Portfolio.id.in_(ids)).options(selectinload(Portfolio.positions))
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().all()
+
+    async def get_held_tickers(self) -> Set[str]:
+        result = await self.session.execute(select(Position.ticker).distinct())
+        return set(result.scalars().all())
+
+    async def get_equities(self, prices: Dict[str, float]) -> List[Tuple[UUID, float]]:
+        """(agent_id, equity marked to `prices`) for every portfolio, from column selects only."""
+        result = await self.session.execute(select(Portfolio.id, Portfolio.agent_id, Portfolio.cash_balance))
+        agent_of = {}
+        equity = {}
+        for pid, agent_id, cash in result.all():
+            agent_of[pid] = agent_id
+            equity[pid] = cash
+
+        result = await self.session.execute(
+            select(Position.portfolio_id, Position.ticker, Position.quantity, Position.avg_cost, Position.current_price)
+        )
+        for pid, ticker, qty, avg_cost, current in result.all():
+            if pid in equity:
+                equity[pid] += qty * (prices.get(ticker) or current or avg_cost)
+        return [(agent_of[pid], eq) for pid, eq in equity.items()]
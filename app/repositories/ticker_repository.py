@@ -0,0 +1,62 @@
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import select
+
+from app.repositories.base import BaseRepository
+from app.domain.models import Ticker, WatchlistEntry
+from app.domain.schemas import TickerCreate, TickerUpdate
+from app.repositories.watchlist_repository import WatchlistRepository
+
+def normalize_symbol(symbol: str) -> str:
+    return symbol.strip().upper()
+
+class TickerRepository(BaseRepository[Ticker, TickerCreate, TickerUpdate]):
+
+    async def get_by_symbol(self, symbol: str) -> Ticker:
+        result = await self.session.execute(select(Ticker).where(Ticker.symbol == normalize_symbol(symbol)))
+        return result.scalars().first()
+
+    async def list(self, active_only: bool = True) -> List[Ticker]:
+        stmt = select(Ticker).order_by(Ticker.symbol)
+        if active_only:
+            stmt = stmt.where(Ticker.is_active.is_(True))
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def get_active_symbols(self, symbols: Iterable[str]) -> Set[str]:
+        """The subset of `symbols` that is registered and active."""
+        symbols = {normalize_symbol(s) for s in symbols}
+        if not symbols:
+            return set()
+        result = await self.session.execute(
+            select(Ticker.symbol).where(Ticker.symbol.in_(symbols), Ticker.is_active.is_(True))
+        )
+        return set(result.scalars().all())
+
+    async def get_inactive_symbols(self, symbols: Iterable[str]) -> Set[str]:
+        """The subset of `symbols` that is registered but deactivated."""
+        result = await self.session.execute(
+            select(Ticker.symbol).where(Ticker.symbol.in_(set(symbols)), Ticker.is_active.is_(False))
+        )
+        return set(result.scalars().all())
+
+    async def upsert_many(self, tickers: List[TickerCreate]) -> Tuple[int, int]:
+        """Insert new symbols and update the given fields of known ones (caller commits). Returns (created, updated)."""
+        by_symbol = {normalize_symbol(t.symbol): t for t in tickers}
+        result = await self.session.execute(select(Ticker).where(Ticker.symbol.in_(by_symbol)))
+        existing = {t.symbol: t for t in result.scalars().all()}
+
+        for symbol, ticker_in in by_symbol.items():
+            ticker = existing.get(symbol)
+            if ticker is None:
+                self.session.add(Ticker(symbol=symbol, **ticker_in.model_dump(exclude={"symbol"})))
+            else:
+                await self.apply_update(ticker, ticker_in.model_dump(exclude={"symbol"}, exclude_unset=True))
+        return len(by_symbol) - len(existing), len(existing)
+
+    async def apply_update(self, ticker: Ticker, changes: Dict[str, Any]):
+        """Set the given fields (caller commits). Deactivating drops the ticker from every watchlist; holdings keep being quoted."""
+        for field, value in changes.items():
+            setattr(ticker, field, value)
+        if changes.get("is_active") is False:
+            await WatchlistRepository(WatchlistEntry, self.session).remove_ticker(ticker.symbol)
@@ -1,6 +1,6 @@
-from app.repositories.base import BaseRepository
+from app.repositories.base import BulkInsertRepository
 from app.domain.models import Trade
 from app.domain.schemas import TradeRead
 
-class TradeRepository(BaseRepository[Trade, TradeRead, TradeRead]):
+class TradeRepository(BulkInsertRepository[Trade, TradeRead, TradeRead]):
     pass
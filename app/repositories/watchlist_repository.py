@@ -0,0 +1,53 @@
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Set
+
+from sqlalchemy import delete, exists, insert, select
+
+from app.repositories.base import BaseRepository
+from app.domain.models import Agent, Ticker, WatchlistEntry
+from app.domain.schemas import WatchlistUpdate
+
+class WatchlistRepository(BaseRepository[WatchlistEntry, WatchlistUpdate, WatchlistUpdate]):
+
+    async def get_symbols(self, agent_id: uuid.UUID) -> List[str]:
+        result = await self.session.execute(
+            select(WatchlistEntry.ticker).where(WatchlistEntry.agent_id == agent_id).order_by(WatchlistEntry.ticker)
+        )
+        return result.scalars().all()
+
+    async def get_for_agents(self, agent_ids: List[uuid.UUID]) -> Dict[uuid.UUID, List[str]]:
+        result = await self.session.execute(
+            select(WatchlistEntry.agent_id, WatchlistEntry.ticker)
+            .join(Ticker, Ticker.symbol == WatchlistEntry.ticker)
+            .where(WatchlistEntry.agent_id.in_(agent_ids), Ticker.is_active.is_(True))
+        )
+        grouped = defaultdict(list)
+        for agent_id, ticker in result.all():
+            grouped[agent_id].append(ticker)
+        return grouped
+
+    async def replace(self, agent_id: uuid.UUID, symbols: List[str]):
+        """Set an agent's watchlist to exactly `symbols` (caller commits)."""
+        await self.session.execute(delete(WatchlistEntry).where(WatchlistEntry.agent_id == agent_id))
+        if symbols:
+            await self.session.execute(insert(WatchlistEntry), [{"agent_id": agent_id, "ticker": s} for s in symbols])
+
+    async def remove_ticker(self, symbol: str) -> int:
+        """Drop a symbol from every watchlist, e.g. when it is deactivated (caller commits)."""
+        result = await self.session.execute(delete(WatchlistEntry).where(WatchlistEntry.ticker == symbol))
+        return result.rowcount
+
+    async def watched_symbols(self) -> Set[str]:
+        """Every active symbol on at least one watchlist."""
+        result = await self.session.execute(
+            select(WatchlistEntry.ticker).distinct()
+            .join(Ticker, Ticker.symbol == WatchlistEntry.ticker)
+            .where(Ticker.is_active.is_(True))
+        )
+        return set(result.scalars().all())
+
+    async def has_unwatched_agents(self) -> bool:
+        """Whether some agent has no watchlist (and so follows the default universe)."""
+        stmt = select(exists().where(~exists().where(WatchlistEntry.agent_id == Agent.id)).select_from(Agent))
+        return bool((await self.session.execute(stmt)).scalar())
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import math
+import uuid
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.domain.constants import TradeAction
+from app.domain.models import Portfolio, Position, Trade, EquityRollup, EquitySnapshot
+from app.repositories.equity_repository import EquityRepository
+
+logger = logging.getLogger(__name__)
+
+# Marks run around the clock, so calendar buckets are the return periods
+PERIODS_PER_YEAR = {
+    "1h": 365 * 24,
+    "1d": 365,
+}
+
+# Analytics for every agent, recomputed once per mark (cycle) and shared by all requests
+_cache: Dict[str, Any] = {"key": None, "results": {}}
+_cache_lock = asyncio.Lock()
+
+def series_metrics(values: array, periods_per_year: int) -> Dict[str, Any]:
+    """Return, volatility, Sharpe/Sortino (rf=0) and max drawdown of one equity series."""
+    n = len(values)
+    metrics = {
+        "periods": max(n - 1, 0),
+        "total_return_pct": None,
+        "volatility_pct": None,
+        "sharpe": None,
+        "sortino": None,
+        "max_drawdown_pct": None,
+    }
+    if n < 2:
+        return metrics
+
+    returns = array("d", (
+        values[i] / values[i - 1] - 1.0 for i in range(1, n) if values[i - 1] > 0
+    ))
+    if values[0] > 0:
+        metrics["total_return_pct"] = (values[-1] / values[0] - 1.0) * 100
+
+    peak = values[0]
+    max_dd = 0.0
+    for v in values:
+        if v > peak:
+            peak = v
+        elif peak > 0:
+            max_dd = max(max_dd, (peak - v) / peak)
+    metrics["max_drawdown_pct"] = max_dd * 100
+
+    m = len(returns)
+    if m >= 2:
+        mean = math.fsum(returns) / m
+        std = math.sqrt(math.fsum((r - mean) ** 2 for r in returns) / (m - 1))
+        downside = math.sqrt(math.fsum(min(r, 0.0) ** 2 for r in returns) / m)
+        annualizer = math.sqrt(periods_per_year)
+        metrics["volatility_pct"] = std * annualizer * 100
+        metrics["sharpe"] = mean / std * annualizer if std > 0 else None
+        metrics["sortino"] = mean / downside * annualizer if downside > 0 else None
+    return metrics
+
+class AnalyticsService:
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+        self.equity_repo = EquityRepository(EquitySnapshot, db_session)
+
+    async def get_agent_analytics(self, agent_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        """AgentAnalyticsRead-shaped metrics for one agent, served from the per-cycle cache."""
+        results = await self.get_all_analytics()
+        return results.get(agent_id)
+
+    async def get_all_analytics(self) -> Dict[uuid.UUID, Dict[str, Any]]:
+        as_of = await self.equity_repo.latest_snapshot_time()
+        key = f"{as_of}:{settings.ANALYTICS_RESOLUTION}"
+        if _cache["key"] == key:
+            return _cache["results"]
+
+        async with _cache_lock:
+            if _cache["key"] != key: # Another request may have filled it meanwhile
+                t0 = datetime.utcnow()
+                _cache["results"] = await self.compute_all(as_of)
+                _cache["key"] = key
+                duration = (datetime.utcnow() - t0).total_seconds()
+                logger.info(f"📐 Analytics computed for {len(_cache['results'])} agents in {duration:.2f}s")
+        return _cache["results"]
+
+    async def compute_all(self, as_of: Optional[datetime] = None) -> Dict[uuid.UUID, Dict[str, Any]]:
+        """
+        Metrics for all agents at once: one columnar pass over the rollup series
+        plus grouped SQL aggregates for trades and exposure.
+        """
+        resolution = settings.ANALYTICS_RESOLUTION
+        since = (as_of or datetime.utcnow()) - timedelta(days=settings.ANALYTICS_LOOKBACK_DAYS)
+
+        # 1. Current state per portfolio
+        result = await self.db.execute(select(Portfolio.id, Portfolio.agent_id, Portfolio.total_equity))
+        portfolios = {pid: (agent_id, equity) for pid, agent_id, equity in result.all()}
+
+        # 2. Equity series as columns ordered by portfolio
+        result = await self.db.execute(
+            select(EquityRollup.portfolio_id, EquityRollup.close).where(
+                EquityRollup.resolution == resolution,
+                EquityRollup.bucket_start >= since
+            ).order_by(EquityRollup.portfolio_id, EquityRollup.bucket_start)
+        )
+        pid_col = array("q")
+        close_col = array("d")
+        for pid, close in result.all():
+            pid_col.append(pid)
+            close_col.append(close)
+
+        # 3. Trade aggregates
+        is_sell = Trade.action == TradeAction.SELL.value
+        result = await self.db.execute(
+            select(
+                Trade.portfolio_id,
+                func.count(Trade.id),
+                func.sum(case((is_sell, 1), else_=0)),
+                func.sum(case((Trade.pnl_realized > 0, 1), else_=0)),
+                func.coalesce(func.sum(Trade.pnl_realized), 0.0),
+                func.coalesce(func.sum(Trade.quantity * Trade.price), 0.0),
+            ).where(Trade.timestamp >= since).group_by(Trade.portfolio_id)
+        )
+        trade_stats = {row[0]: row[1:] for row in result.all()}
+
+        # 4. Gross exposure
+        result = await self.db.execute(
+            select(
+                Position.portfolio_id,
+                func.sum(Position.quantity * func.coalesce(Position.current_price, Position.avg_cost))
+            ).group_by(Position.portfolio_id)
+        )
+        exposure = dict(result.all())
+
+        # 5. Walk the contiguous per-portfolio segments
+        segments = {}
+        start = 0
+        for i in range(1, len(pid_col) + 1):
+            if i == len(pid_col) or pid_col[i] != pid_col[start]:
+                segments[pid_col[start]] = (start, i)
+                start = i
+
+        periods_per_year = PERIODS_PER_YEAR.get(resolution, 365)
+        results = {}
+        for pid, (agent_id, equity) in portfolios.items():
+            lo, hi = segments.get(pid, (0, 0))
+            values = close_col[lo:hi]
+            values.append(equity) # The latest mark closes the series
+
+            metrics = series_metrics(values, periods_per_year)
+            count, closed, wins, pnl_total, notional = trade_stats.get(pid, (0, 0, 0, 0.0, 0.0))
+            avg_equity = math.fsum(values) / len(values)
+            gross = exposure.get(pid) or 0.0
+
+            metrics.update(
+                agent_id=agent_id,
+                as_of=as_of,
+                resolution=resolution,
+                trade_count=count,
+                closed_trades=closed,
+                win_rate=wins / closed if closed else None,
+                avg_realized_pnl=pnl_total / closed if closed else None,
+                realized_pnl_total=pnl_total,
+                exposure_pct=gross / equity * 100 if equity > 0 else None,
+                turnover=notional / avg_equity if avg_equity > 0 else None,
+            )
+            results[agent_id] = metrics
+        return results
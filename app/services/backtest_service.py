@@ -0,0 +1,312 @@
+import asyncio
+import itertools
+import logging
+import math
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.exceptions import InsufficientFundsError, ShortSellingError
+from app.domain.constants import OrderType, RiskRejectReason
+from app.domain.ledger import PortfolioState, PositionState, RestingOrder, TradeRecord
+from app.domain.schemas import (
+    BacktestScenario, BacktestResult, BacktestAgentResult, LLMTrade, PortfolioRead, PositionRead
+)
+from app.ports.llm_port import LLMPort, load_llm_adapter
+from app.services.analytics_service import series_metrics
+from app.services.order_book import OrderBook
+from app.services.risk_engine import ProposedTrade
+from app.services.trading_service import TradingService
+
+logger = logging.getLogger(__name__)
+
+TRADING_MINUTES_PER_YEAR = 252 * 390
+
+class BacktestTradingService(TradingService):
+    """
+    TradingService whose `_execute_trade` rules run against in-memory PortfolioState
+    records instead of ORM objects: no session, simulated clock, its own order book.
+    """
+
+    def __init__(self, llm_client: LLMPort):
+        super().__init__(db_session=None, llm_client=llm_client, market_data_client=None, orders=OrderBook())
+        self.now: Optional[datetime] = None
+        self.trades: List[TradeRecord] = []
+
+    def _open_position(self, portfolio: PortfolioState, ticker: str, quantity: int, price: float):
+        portfolio.positions.append(PositionState(ticker=ticker, quantity=quantity, avg_cost=price))
+
+    async def _close_position(self, portfolio: PortfolioState, position: PositionState):
+        portfolio.positions.remove(position)
+
+    def _record_trade(self, portfolio: PortfolioState, **fields):
+        self.trades.append(TradeRecord(portfolio_id=portfolio.id, timestamp=self.now, **fields))
+
+class PriceTape:
+    """
+    Historical closes aligned on one timeline (forward-filled), with the technicals
+    the live prompt carries precomputed per ticker in a single pass.
+    """
+
+    def __init__(self, prices: Dict[str, List]):
+        self.timeline = sorted({ts for series in prices.values() for ts, _ in series})
+        index = {ts: i for i, ts in enumerate(self.timeline)}
+        n = len(self.timeline)
+        self.columns: Dict[str, Dict[str, array]] = {}
+
+        for ticker, series in prices.items():
+            close = array("d", [math.nan]) * n
+            for ts, price in series:
+                close[index[ts]] = price
+            last = math.nan
+            for i in range(n):  # forward fill
+                if math.isnan(close[i]):
+                    close[i] = last
+                else:
+                    last = close[i]
+            self.columns[ticker] = self._indicators(close)
+
+    def _indicators(self, close: array) -> Dict[str, array]:
+        n = len(close)
+        sma50 = array("d", [math.nan]) * n
+        rsi14 = array("d", [50.0]) * n
+        daily_ret = array("d", [0.0]) * n
+
+        window_sum, window = 0.0, []
+        avg_gain = avg_loss = 0.0
+        prev_day_close, day, last_close = math.nan, None, math.nan
+        for i in range(n):
+            c = close[i]
+            if math.isnan(c):
+                continue
+            # SMA 50 (bars)
+            window.append(c)
+            window_sum += c
+            if len(window) > 50:
+                window_sum -= window.pop(0)
+            sma50[i] = window_sum / len(window)
+            # RSI 14 (Wilder smoothing)
+            if not math.isnan(last_close):
+                change = c - last_close
+                avg_gain = (avg_gain * 13 + max(change, 0.0)) / 14
+                avg_loss = (avg_loss * 13 + max(-change, 0.0)) / 14
+                rsi14[i] = 100.0 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+            # Return vs previous session close
+            ts_day = self.timeline[i].date()
+            if ts_day != day:
+                prev_day_close, day = last_close, ts_day
+            if not math.isnan(prev_day_close) and prev_day_close > 0:
+                daily_ret[i] = (c / prev_day_close - 1) * 100
+            last_close = c
+        return {"close": close, "sma_50": sma50, "rsi_14": rsi14, "daily_return_pct": daily_ret}
+
+    def cycle_indices(self, cycle_minutes: int) -> List[int]:
+        indices, next_at = [], None
+        for i, ts in enumerate(self.timeline):
+            if next_at is None or ts >= next_at:
+                indices.append(i)
+                next_at = ts + timedelta(minutes=cycle_minutes)
+        return indices
+
+    def prices(self, i: int) -> Dict[str, float]:
+        """Closes at bar `i`, rounded like market_data(i)."""
+        return {t: round(cols["close"][i], 2) for t, cols in self.columns.items() if not math.isnan(cols["close"][i])}
+
+    def market_data(self, i: int) -> Dict[str, Dict[str, float]]:
+        data = {}
+        for ticker, cols in self.columns.items():
+            price = cols["close"][i]
+            if math.isnan(price):
+                continue
+            sma = cols["sma_50"][i]
+            data[ticker] = {
+                "price": round(price, 2),
+                "daily_return_pct": round(cols["daily_return_pct"][i], 2),
+                "sma_50": round(sma, 2),
+                "dist_sma50_pct": round((price / sma - 1) * 100, 2) if sma else 0.0,
+                "rsi_14": round(cols["rsi_14"][i], 1),
+            }
+        return data
+
+def _portfolio_read(portfolio: PortfolioState, open_orders: Iterable[RestingOrder] = ()) -> PortfolioRead:
+    return PortfolioRead(
+        id=portfolio.id,
+        cash_balance=portfolio.cash_balance,
+        total_equity=portfolio.total_equity,
+        positions=[
+            PositionRead(ticker=p.ticker, quantity=p.quantity, avg_cost=p.avg_cost, current_price=p.current_price)
+            for p in portfolio.positions
+        ],
+        open_orders=[
+            LLMTrade(action=o.action, ticker=o.ticker, quantity=o.quantity, order_type=o.order_type, trigger_price=o.trigger_price)
+            for o in open_orders
+        ]
+    )
+
+class Rejections:
+    """Rejected orders per agent, in total and by RiskRejectReason."""
+
+    def __init__(self, n: int):
+        self.total = [0] * n
+        self.by_reason: List[Dict[str, int]] = [{} for _ in range(n)]
+
+    def add(self, k: int, reason: Optional[RiskRejectReason] = None):
+        self.total[k] += 1
+        if reason is not None:
+            self.by_reason[k][reason.value] = self.by_reason[k].get(reason.value, 0) + 1
+
+async def _execute_checked(
+    service: BacktestTradingService,
+    proposed: List[Tuple[int, ProposedTrade]],
+    quotes: Dict[str, Dict[str, float]],
+    rejections: Rejections
+):
+    """Risk-check `proposed` (agent index, trade) as one order set and apply what passed, as TradingService._execute_decisions does."""
+    results = service.risk.validate([trade for _, trade in proposed], quotes)
+    for (k, trade), result in zip(proposed, results):
+        if not result.accepted:
+            rejections.add(k, result.reason)
+            continue
+        try:
+            await service._execute_trade(trade.portfolio, trade.action, trade.ticker, trade.quantity, result.price, trade.reasoning)
+        except InsufficientFundsError:
+            rejections.add(k, RiskRejectReason.INSUFFICIENT_FUNDS)
+        except ShortSellingError:
+            rejections.add(k, RiskRejectReason.INSUFFICIENT_HOLDINGS)
+
+async def _fill_orders(service: BacktestTradingService, portfolios: List[PortfolioState], prices: Dict[str, float], rejections: Rejections):
+    """One price tick for the resting orders: expire, match, fill at the bar's close after the risk checks."""
+    service.orders.expire(service.now)
+    proposed = [
+        (order.portfolio_id - 1, ProposedTrade(
+            portfolios[order.portfolio_id - 1], order.action, order.ticker, order.quantity,
+            f"[{order.order_type.value} @ ${order.trigger_price:.2f}] {order.reasoning}"
+        ))
+        for order in service.orders.match(prices)
+    ]
+    # Bars carry no fetch time or placeholder flag: only the notional, cash, holdings and concentration checks can bite
+    await _execute_checked(service, proposed, {ticker: {"price": price} for ticker, price in prices.items()}, rejections)
+
+async def run_scenario(scenario: BacktestScenario, llm: Optional[LLMPort] = None) -> BacktestResult:
+    """Simulate market cycles over the scenario's price history with the live trading and risk rules."""
+    t0 = time.perf_counter()
+    llm = llm or load_llm_adapter(scenario.llm, **scenario.llm_kwargs)
+    service = BacktestTradingService(llm)
+    tape = PriceTape(scenario.prices)
+    cycles = tape.cycle_indices(scenario.cycle_minutes)
+
+    portfolios = [PortfolioState(id=i, cash_balance=a.cash) for i, a in enumerate(scenario.agents, start=1)]
+    curves = [array("d") for _ in portfolios]
+    rejections = Rejections(len(portfolios))
+    errors = [0] * len(portfolios)
+    semaphore = asyncio.Semaphore(scenario.llm_concurrency)
+    order_ids = itertools.count(1)
+    last_bar = -1
+
+    for i in cycles:
+        # Resting orders are matched on every bar since the last cycle, like the live price updates
+        if service.orders:
+            for j in range(last_bar + 1, i + 1):
+                service.now = tape.timeline[j]
+                await _fill_orders(service, portfolios, tape.prices(j), rejections)
+        last_bar = i
+
+        service.now = tape.timeline[i]
+        market_data = tape.market_data(i)
+        prices = {t: d["price"] for t, d in market_data.items()}
+
+        # Mark to market and rank, as in update_market_values / execute_market_cycle
+        for portfolio, curve in zip(portfolios, curves):
+            curve.append(portfolio.mark(prices))
+        order = sorted(range(len(portfolios)), key=lambda k: portfolios[k].total_equity, reverse=True)
+        leader_equity = portfolios[order[0]].total_equity if order else 0.0
+        ranks = {k: rank for rank, k in enumerate(order, start=1)}
+
+        async def decide(k: int):
+            async with semaphore:
+                agent = scenario.agents[k]
+                return await llm.generate_trade_decision(
+                    agent_name=agent.name,
+                    portfolio=_portfolio_read(portfolios[k], service.orders.for_portfolio(k + 1)),
+                    market_data=market_data,
+                    rank=ranks[k],
+                    leader_gap=leader_equity - portfolios[k].total_equity,
+                    persona=agent.persona
+                )
+
+        decisions = await asyncio.gather(*(decide(k) for k in range(len(portfolios))), return_exceptions=True)
+
+        # One order set per cycle, risk-checked together like a live execute batch
+        proposed = []
+        for k, decision in enumerate(decisions):
+            if isinstance(decision, Exception):
+                errors[k] += 1
+                continue
+            for trade_req in decision.trades:
+                if trade_req.order_type != OrderType.MARKET:
+                    if not prices.get(trade_req.ticker):
+                        rejections.add(k, RiskRejectReason.NO_PRICE)
+                        continue
+                    if len(service.orders.for_portfolio(k + 1)) >= settings.ORDER_MAX_OPEN_PER_AGENT:
+                        rejections.add(k)
+                        continue
+                    service.orders.add(RestingOrder(
+                        id=next(order_ids), portfolio_id=k + 1, ticker=trade_req.ticker, action=trade_req.action,
+                        order_type=trade_req.order_type, quantity=trade_req.quantity, trigger_price=trade_req.trigger_price,
+                        reasoning=decision.thoughts,
+                        expires_at=service.now + timedelta(hours=settings.ORDER_TTL_HOURS) if settings.ORDER_TTL_HOURS else None
+                    ))
+                    continue
+                proposed.append((k, ProposedTrade(
+                    portfolios[k], trade_req.action, trade_req.ticker, trade_req.quantity, decision.thoughts
+                )))
+        await _execute_checked(service, proposed, market_data, rejections)
+
+    # Final mark after the last cycle's trades
+    if cycles:
+        prices = {t: d["price"] for t, d in tape.market_data(cycles[-1]).items()}
+        for portfolio, curve in zip(portfolios, curves):
+            curve.append(portfolio.mark(prices))
+
+    periods_per_year = TRADING_MINUTES_PER_YEAR // max(scenario.cycle_minutes, 1)
+    trade_counts = [0] * len(portfolios)
+    for trade in service.trades:
+        trade_counts[trade.portfolio_id - 1] += 1
+
+    agents = []
+    for k, agent in enumerate(scenario.agents):
+        metrics = series_metrics(curves[k], periods_per_year)
+        agents.append(BacktestAgentResult(
+            name=agent.name,
+            final_equity=portfolios[k].total_equity,
+            total_return_pct=metrics["total_return_pct"],
+            sharpe=metrics["sharpe"],
+            max_drawdown_pct=metrics["max_drawdown_pct"],
+            trades=trade_counts[k],
+            rejected_trades=rejections.total[k],
+            rejections=rejections.by_reason[k],
+            llm_errors=errors[k],
+            equity_curve=list(curves[k])
+        ))
+
+    return BacktestResult(
+        scenario=scenario.name,
+        start=tape.timeline[cycles[0]] if cycles else None,
+        end=tape.timeline[cycles[-1]] if cycles else None,
+        cycles=len(cycles),
+        duration_seconds=time.perf_counter() - t0,
+        agents=agents
+    )
+
+def _run_scenario_sync(scenario: BacktestScenario) -> BacktestResult:
+    return asyncio.run(run_scenario(scenario))
+
+def run_scenarios(scenarios: List[BacktestScenario], workers: int = 1) -> List[BacktestResult]:
+    """Run scenarios, one per CPU core when workers > 1 (each builds its own LLM adapter)."""
+    if workers <= 1 or len(scenarios) <= 1:
+        return [_run_scenario_sync(s) for s in scenarios]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_scenario_sync, scenarios))
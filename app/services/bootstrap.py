@@ -0,0 +1,80 @@
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.domain.models import Agent, Base, Portfolio, Ticker, User
+
+logger = logging.getLogger(__name__)
+
+# Registry seed: the universe agents without a watchlist trade (TradingService.DEFAULT_UNIVERSE)
+DEFAULT_TICKERS = [
+    ("AAPL", "Apple Inc.", "Technology"),
+    ("GOOGL", "Alphabet Inc.", "Communication Services"),
+    ("MSFT", "Microsoft Corporation", "Technology"),
+    ("TSLA", "Tesla, Inc.", "Consumer Discretionary"),
+    ("NVDA", "NVIDIA Corporation", "Technology"),
+    ("AMD", "Advanced Micro Devices, Inc.", "Technology"),
+    ("META", "Meta Platforms, Inc.", "Communication Services"),
+    ("AMZN", "Amazon.com, Inc.", "Consumer Discretionary"),
+    ("NFLX", "Netflix, Inc.", "Communication Services"),
+    ("PYPL", "PayPal Holdings, Inc.", "Financials"),
+]
+
+async def create_schema(engine: AsyncEngine):
+    logger.info("Initializing Database...")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+async def seed_defaults(session: AsyncSession):
+    """Default admin user (admin/admin) and, on empty tables, the ticker registry and the two starter agents."""
+    from app.core.security import get_password_hash
+
+    result = await session.execute(select(User).where(User.username == "admin"))
+    admin = result.scalars().first()
+    if not admin:
+        logger.info("creating default admin user")
+        admin = User(
+            username="admin",
+            hashed_password=get_password_hash("admin"),
+            is_admin=True
+        )
+        session.add(admin)
+        await session.commit()
+        logger.info("Default admin user created (admin/admin)")
+
+    result = await session.execute(select(Ticker.id).limit(1))
+    if result.first() is None:
+        session.add_all([
+            Ticker(symbol=symbol, name=name, exchange="NASDAQ", sector=sector)
+            for symbol, name, sector in DEFAULT_TICKERS
+        ])
+        await session.commit()
+        logger.info(f"Seeded ticker registry ({len(DEFAULT_TICKERS)} symbols)")
+
+    result = await session.execute(select(Agent.id).limit(1))
+    if result.first() is not None:
+        return
+
+    logger.info("Seeding default agents...")
+    agent1 = Agent(
+        name="AlphaBot",
+        provider="gemini",
+        persona="You are a simplified momentum trader.",
+        owner_id=admin.id
+    )
+    agent2 = Agent(
+        name="MarketMaker",
+        provider="gemini",
+        persona="You are a high-frequency liquidity provider.",
+        owner_id=admin.id
+    )
+    session.add_all([agent1, agent2])
+    await session.flush() # Generate IDs
+
+    session.add_all([
+        Portfolio(agent_id=agent1.id, cash_balance=100000.0, total_equity=100000.0),
+        Portfolio(agent_id=agent2.id, cash_balance=500000.0, total_equity=500000.0),
+    ])
+    await session.commit()
+    logger.info("Seeded agents: AlphaBot, MarketMaker")
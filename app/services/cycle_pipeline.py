@@ -0,0 +1,416 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Mapping, Optional, Set, Tuple
+
+from app.core import query_stats
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.domain.constants import CycleAgentStatus, CycleRunStatus
+from app.domain.market_snapshot import MarketSnapshot
+from app.domain.models import CycleRun
+from app.repositories.cycle_run_repository import CycleRunRepository
+from app.services.trading_service import trading_lock
+
+logger = logging.getLogger(__name__)
+
+class CyclePipeline:
+    """
+    One market cycle as a streaming pipeline over bounded queues:
+
+        load (pages of agents, marked as quotes arrive)
+          -> decide (CYCLE_LLM_CONCURRENCY workers, LLM_BATCH_SIZE agents per request)
+          -> execute (risk check + trade rules per micro-batch)
+          -> persist (bulk inserts + commit per batch)
+
+    The stages share the service's AsyncSession, which allows one operation at a time,
+    so DB work takes `db_lock` while LLM calls never do: loading the next page and
+    committing executed batches overlap with decisions still in flight.
+    Each batch commits on its own, so a cycle is no longer one transaction.
+    With LLM_STREAMING, an agent's trades enter the execute stage as soon as they are
+    parsed; commits wait for the thoughts of executed trades so rows carry their reasoning.
+
+    Every run has a `cycle_runs` row; each agent's checkpoint commits with its trades and
+    audit row. A run that crashed (heartbeat older than CYCLE_RUN_STALE_SECONDS) or failed
+    is resumed by a trigger for the same scheduled slot (CYCLE_SLOT_MINUTES): agents already
+    checkpointed are skipped. A later slot abandons it and starts fresh.
+    """
+
+    def __init__(self, service, resume: bool = True):
+        self.service = service
+        self.resume = resume
+        self.db_lock = asyncio.Lock()
+        self.decide_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.CYCLE_QUEUE_SIZE)
+        self.execute_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.CYCLE_QUEUE_SIZE)
+        self.persist_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.CYCLE_QUEUE_SIZE)
+        # Enough decision workers to keep every provider's pool busy
+        self.workers = max(settings.CYCLE_LLM_CONCURRENCY, getattr(service.llm, "max_concurrency", 0), 1)
+        self.rich_data = MarketSnapshot({}) # Built once per cycle, shared read-only by every stage
+        self.ranking: Dict[Any, Tuple[int, float]] = {}
+        self.stats = {"agents": 0, "decided": 0, "errors": 0, "executed": 0, "rejected": 0}
+        self.run_row: Optional[CycleRun] = None
+        self.skip: Set[Any] = set() # Agents a resumed run already committed
+        self.timings: Dict[Any, Dict[str, float]] = {} # agent id -> perf_counter marks
+        self.checkpoints = {CycleAgentStatus.DONE: 0, CycleAgentStatus.FAILED: 0} # Buffered since the last commit
+
+    async def run(self):
+        # Detached: a cron-triggered cycle runs as a background task of GET /market/cron
+        with query_stats.detached(), query_stats.track("Market Cycle") as db_stats:
+            await self._run()
+        if self.run_row is not None:
+            db_stats.label = f"Market Cycle #{self.run_row.id}"
+            query_stats.log_stats(db_stats, level=logging.INFO)
+
+    async def _run(self):
+        start_time = datetime.utcnow()
+        if not await self._begin_run():
+            return
+        logger.info(f"🚀 Starting Market Cycle #{self.run_row.id} at {start_time}")
+
+        # Fills triggered from now on wait for this run; one already trading finishes first
+        await trading_lock.acquire()
+        heartbeat = asyncio.create_task(self._heartbeat(self.run_row.id))
+        stages = []
+        try:
+            quotes = await self._start_quotes()
+            stages = [
+                asyncio.create_task(self._load(quotes)),
+                *(asyncio.create_task(self._decide()) for _ in range(self.workers)),
+                asyncio.create_task(self._execute()),
+                asyncio.create_task(self._persist()),
+            ]
+            await asyncio.gather(*stages)
+        except Exception as e:
+            for task in stages:
+                task.cancel()
+            await self._fail_run(e)
+            raise
+        except BaseException:
+            # Cancelled (shutdown): the run stays RUNNING and is resumed once its heartbeat goes stale
+            for task in stages:
+                task.cancel()
+            raise
+        finally:
+            heartbeat.cancel()
+            trading_lock.release()
+        await self._finish_run()
+
+        if not self.stats["agents"]:
+            logger.info("No agents to process.")
+            return
+        duration = (datetime.utcnow() - start_time).total_seconds()
+        logger.info(
+            f"✅ Market Cycle Completed in {duration:.2f}s | Success: {self.stats['decided']}/{self.stats['agents']} Agents "
+            f"| Orders: {self.stats['executed']} executed, {self.stats['rejected']} rejected, "
+            f"{sum(self.service.placed_orders.values())} limit/stop placed"
+        )
+
+    # --- Run bookkeeping ---
+
+    async def _begin_run(self) -> bool:
+        """Resume the latest interrupted run or open a new one; False if a live run is in progress."""
+        service = self.service
+        repo = service.cycle_run_repo
+        now = datetime.utcnow()
+        async with self.db_lock:
+            await repo.abandon_unfinished(now - timedelta(seconds=settings.CYCLE_RESUME_WINDOW_SECONDS))
+            run = await repo.get_latest_unfinished()
+            if run and run.status == CycleRunStatus.RUNNING.value and run.heartbeat_at > now - timedelta(seconds=settings.CYCLE_RUN_STALE_SECONDS):
+                logger.info(f"⏳ Cycle #{run.id} is still running (heartbeat {run.heartbeat_at}), not starting another")
+                await service.db.commit()
+                return False
+
+            if run and self.resume and run.started_at >= self._slot_start(now):
+                self.skip = await repo.done_agent_ids(run.id)
+                await repo.clear_failed(run.id)
+                run.status = CycleRunStatus.RUNNING.value
+                run.agents_failed = 0
+                run.resumes += 1
+                run.error = None
+                run.heartbeat_at = now
+                logger.info(f"♻️ Resuming cycle #{run.id}: {len(self.skip)}/{run.agents_total} agents already done")
+            else:
+                if run:
+                    await repo.set_status(run.id, CycleRunStatus.ABANDONED)
+                run = CycleRun(agents_total=await repo.count_agents(), started_at=now, heartbeat_at=now)
+                service.db.add(run)
+            await service.db.commit()
+        self.run_row = run
+        return True
+
+    async def _heartbeat(self, run_id: int):
+        """
+        Keep the heartbeat fresh while slow LLM calls hold back checkpoints, so a concurrent
+        trigger never takes a live run for a crashed one. Uses its own session: the cycle's
+        session holds uncommitted trades between batches.
+        """
+        interval = max(settings.CYCLE_RUN_STALE_SECONDS / 4, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with SessionLocal() as session:
+                    await CycleRunRepository(CycleRun, session).touch(run_id, datetime.utcnow())
+                    await session.commit()
+            except Exception as e:
+                logger.warning(f"Cycle #{run_id} heartbeat failed: {e}")
+
+    @staticmethod
+    def _slot_start(now: datetime) -> datetime:
+        """Start of the scheduled cycle slot `now` falls in; slots are aligned on the hour."""
+        minutes = max(settings.CYCLE_SLOT_MINUTES, 1)
+        return now.replace(minute=now.minute - now.minute % minutes, second=0, microsecond=0)
+
+    def _checkpoint(self, agent, status: CycleAgentStatus, executed: int = 0, rejected: int = 0, error: Optional[str] = None):
+        """Buffer an agent's progress row; it is written by the commit that writes its trades."""
+        marks = self.timings.pop(agent.id, {})
+        now = time.perf_counter()
+        started, decided = marks.get("started"), marks.get("decided")
+        self.service.cycle_agent_repo.buffer(
+            run_id=self.run_row.id,
+            agent_id=agent.id,
+            status=status.value,
+            queued_ms=(started - marks["queued"]) * 1000 if started and "queued" in marks else None,
+            decide_ms=((decided or now) - started) * 1000 if started else None,
+            execute_ms=(now - decided) * 1000 if decided else None,
+            trades_executed=executed,
+            trades_rejected=rejected,
+            error=error,
+            finished_at=datetime.utcnow()
+        )
+        self.checkpoints[status] += 1
+
+    def _mark(self, agent, stage: str):
+        self.timings.setdefault(agent.id, {})[stage] = time.perf_counter()
+
+    async def _finish_run(self):
+        run = self.run_row
+        async with self.db_lock:
+            run.status = CycleRunStatus.COMPLETED.value
+            run.finished_at = datetime.utcnow()
+            await self.service.db.commit()
+
+    async def _fail_run(self, error: Exception):
+        service = self.service
+        run_id = self.run_row.id # The rollback expires the row
+        try:
+            await service.db.rollback()
+            await service.cycle_run_repo.set_status(run_id, CycleRunStatus.FAILED, error=repr(error)[:2000])
+            await service.db.commit()
+        except Exception as e:
+            logger.error(f"Could not mark cycle #{run_id} as failed: {e}")
+        logger.error(f"💥 Cycle #{run_id} failed, it will resume on the next trigger: {error}")
+
+    # --- Stages ---
+
+    async def _start_quotes(self) -> "asyncio.Future":
+        """
+        Kick off the quote fetch; with the book, marks and snapshots happen there first.
+        Without the scheduler, resting orders are matched here on the fetched quotes.
+        """
+        service = self.service
+        async with self.db_lock:
+            # Resting orders are quoted and shown in the prompts
+            await service.refresh_orders(full=True)
+        if service.book:
+            async with self.db_lock:
+                self.rich_data = await service._update_market_values_in_book()
+            self._set_ranking([(state.agent_id, state.total_equity) for state in service.book.portfolios.values()])
+            return None
+
+        async with self.db_lock:
+            tickers = await service.quote_universe(await service.portfolio_repo.get_held_tickers())
+        logger.info(f"📊 Fetching Market Data for {len(tickers)} tickers...")
+        quotes = asyncio.create_task(service.market_data.get_rich_market_data(list(tickers)))
+        if not settings.RUN_SCHEDULER:
+            # No price updates between cycles (serverless): fill resting orders on this cycle's
+            # quotes before any portfolio loads, at the cost of overlapping the first page with the fetch
+            self.rich_data = MarketSnapshot(await quotes)
+            async with self.db_lock:
+                await service._match_orders(self.rich_data, in_cycle=True)
+        return quotes
+
+    async def _load(self, quotes: Optional["asyncio.Future"]):
+        service = self.service
+        page_size = max(settings.CYCLE_LOAD_BATCH_SIZE, 1)
+        after_id = None
+        prices: Mapping[str, float] = {}
+        marked_at = None
+
+        while True:
+            async with self.db_lock:
+                agents = await service.agent_repo.get_page_with_portfolios(after_id, page_size)
+
+            if quotes is not None:
+                # The first page loads while quotes are in flight
+                t0 = datetime.utcnow()
+                self.rich_data = MarketSnapshot(await quotes)
+                quotes = None
+                logger.info(f"   -> Data fetched in {(datetime.utcnow() - t0).total_seconds():.2f}s (after first page)")
+                prices = self.rich_data.price_view
+                marked_at = datetime.utcnow()
+                async with self.db_lock:
+                    self._set_ranking(await service.portfolio_repo.get_equities(prices))
+
+            if agents:
+                after_id = agents[-1].id
+            page_full = len(agents) == page_size
+            if self.skip:
+                agents = [agent for agent in agents if agent.id not in self.skip]
+
+            if service.book:
+                service._apply_book_marks(agents)
+            else:
+                snapshots = service._mark_agents(agents, prices, marked_at)
+                async with self.db_lock:
+                    await service.equity_repo.add_snapshots(snapshots)
+                # No write transaction may stay open across the LLM calls: on SQLite it would lock
+                # out the heartbeat. Committed with the buffered checkpoints, so trades and marks match
+                await self._commit()
+
+            for agent in agents:
+                if agent.portfolio:
+                    self.stats["agents"] += 1
+                    self._mark(agent, "queued")
+                    await self.decide_queue.put(agent)
+
+            if not page_full:
+                break
+
+        for _ in range(self.workers):
+            await self.decide_queue.put(None)
+
+    async def _decide(self):
+        # With LLM_BATCH_SIZE > 1 a worker takes up to that many ready agents per request
+        batch_size = max(settings.LLM_BATCH_SIZE, 1)
+        finished = False
+        while not finished:
+            agents = []
+            agent = await self.decide_queue.get()
+            while True:
+                if agent is None:
+                    finished = True
+                    break
+                agents.append(agent)
+                if len(agents) >= batch_size:
+                    break
+                try:
+                    agent = self.decide_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+
+            if len(agents) == 1:
+                await self._decide_one(agents[0])
+            elif agents:
+                await self._decide_many(agents)
+        await self.execute_queue.put(None)
+
+    async def _decide_one(self, agent):
+        rank, gap = self.ranking.get(agent.id, (0, 0.0))
+        self._mark(agent, "started")
+        try:
+            if settings.LLM_STREAMING:
+                # Trades can reach the execute stage while the thoughts are still streaming
+                decided = await self.service._decide_streaming(
+                    agent, self.rich_data, rank, gap,
+                    lambda decision, audit_row: self._hand_off(agent, decision, audit_row)
+                )
+            else:
+                decided = await self.service._decide(agent, self.rich_data, rank, gap)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Error processing agent {agent.name}: {e}")
+            self._checkpoint(agent, CycleAgentStatus.FAILED, error=str(e))
+            return
+        if decided is not None:
+            await self._hand_off(agent, *decided)
+
+    async def _hand_off(self, agent, decision, audit_row):
+        self.stats["decided"] += 1
+        self._mark(agent, "decided")
+        await self.execute_queue.put((agent, decision, audit_row))
+
+    async def _decide_many(self, agents):
+        ranked = [(agent, *self.ranking.get(agent.id, (0, 0.0))) for agent in agents]
+        for agent in agents:
+            self._mark(agent, "started")
+        try:
+            decided = await self.service._decide_batch(ranked, self.rich_data)
+        except Exception as e:
+            self.stats["errors"] += len(agents)
+            logger.error(f"❌ Error processing batch of {len(agents)} agents: {e}")
+            for agent in agents:
+                self._checkpoint(agent, CycleAgentStatus.FAILED, error=str(e))
+            return
+        for agent, result in decided:
+            if isinstance(result, Exception):
+                self.stats["errors"] += 1
+                logger.error(f"❌ Error processing agent {agent.name}: {result}")
+                self._checkpoint(agent, CycleAgentStatus.FAILED, error=str(result))
+                continue
+            await self._hand_off(agent, *result)
+
+    async def _execute(self):
+        batch_size = max(settings.CYCLE_EXECUTE_BATCH_SIZE, 1)
+        finished = 0
+        while finished < self.workers:
+            # Take what is ready (up to a batch) rather than waiting for a full one
+            batch = []
+            item = await self.execute_queue.get()
+            while True:
+                if item is None:
+                    finished += 1
+                else:
+                    batch.append(item)
+                if len(batch) >= batch_size or finished == self.workers:
+                    break
+                try:
+                    item = self.execute_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+
+            if batch:
+                async with self.db_lock:
+                    executed, rejected = await self.service._execute_decisions(batch, self.rich_data)
+                for agent, _, audit_row in batch:
+                    risk = audit_row["response"].get("risk", [])
+                    accepted = sum(1 for r in risk if r["accepted"])
+                    self._checkpoint(agent, CycleAgentStatus.DONE, executed=accepted, rejected=len(risk) - accepted)
+                self.stats["executed"] += executed
+                self.stats["rejected"] += rejected
+                await self.persist_queue.put(batch)
+        await self.persist_queue.put(None)
+
+    async def _persist(self):
+        while (batch := await self.persist_queue.get()) is not None:
+            await self._commit()
+            if self.service.book:
+                for agent, _, _ in batch:
+                    self.service.book.sync_portfolio(agent.portfolio)
+        # Marks of agents whose decision failed
+        await self._commit()
+
+    async def _commit(self):
+        service = self.service
+        # Streamed trades already executed carry their reasoning only once the thoughts finish
+        if unfinished := service.unfinished_decisions():
+            await asyncio.wait(unfinished)
+        async with self.db_lock:
+            if unfinished := service.unfinished_decisions():
+                await asyncio.wait(unfinished)
+            # Counters and checkpoint rows are taken together: failures can be buffered during the awaits below
+            counts, self.checkpoints = self.checkpoints, {CycleAgentStatus.DONE: 0, CycleAgentStatus.FAILED: 0}
+            await service.cycle_agent_repo.flush_buffer()
+            await service.trade_repo.flush_buffer()
+            await service.order_repo.flush_buffer()
+            await service.audit_repo.flush_buffer()
+            run = self.run_row
+            run.agents_done += counts[CycleAgentStatus.DONE]
+            run.agents_failed += counts[CycleAgentStatus.FAILED]
+            run.heartbeat_at = datetime.utcnow()
+            await service.db.commit()
+
+    def _set_ranking(self, equities):
+        equities = sorted(equities, key=lambda x: x[1], reverse=True)
+        leader_equity = equities[0][1] if equities else 0
+        self.ranking = {aid: (rank, leader_equity - eq) for rank, (aid, eq) in enumerate(equities, start=1)}
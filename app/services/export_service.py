@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+import uuid
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.responses import dumps
+from app.domain.constants import ExportFormat, ExportKind
+from app.domain.models import AuditLog, EquitySnapshot, Portfolio, Trade
+
+MEDIA_TYPES = {ExportFormat.NDJSON: "application/x-ndjson", ExportFormat.CSV: "text/csv"}
+
+def export_query(kind: ExportKind, agent_id: Optional[uuid.UUID] = None, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Select:
+    """Column select for one export, oldest first; `start` is inclusive, `end` exclusive."""
+    if kind == ExportKind.TRADES:
+        model = Trade
+        stmt = select(
+            Trade.id, Portfolio.agent_id, Trade.portfolio_id, Trade.timestamp, Trade.ticker, Trade.action,
+            Trade.quantity, Trade.price, Trade.pnl_realized, Trade.reasoning
+        ).join(Portfolio, Portfolio.id == Trade.portfolio_id)
+        agent_column = Portfolio.agent_id
+    elif kind == ExportKind.EQUITY:
+        model = EquitySnapshot
+        stmt = select(
+            EquitySnapshot.id, Portfolio.agent_id, EquitySnapshot.portfolio_id, EquitySnapshot.timestamp,
+            EquitySnapshot.total_equity, EquitySnapshot.cash_balance
+        ).join(Portfolio, Portfolio.id == EquitySnapshot.portfolio_id)
+        agent_column = Portfolio.agent_id
+    else:
+        model = AuditLog
+        stmt = select(AuditLog.id, AuditLog.agent_id, AuditLog.timestamp, AuditLog.prompt, AuditLog.response)
+        agent_column = AuditLog.agent_id
+
+    if agent_id is not None:
+        stmt = stmt.where(agent_column == agent_id)
+    if start is not None:
+        stmt = stmt.where(model.timestamp >= start)
+    if end is not None:
+        stmt = stmt.where(model.timestamp < end)
+    return stmt.order_by(model.id)
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"), default=str)
+    return value
+
+async def _encoded(session: AsyncSession, stmt: Select, fmt: ExportFormat) -> AsyncIterator[bytes]:
+    """One chunk per `yield_per` partition of a server-side cursor, so memory stays flat."""
+    result = await session.stream(stmt.execution_options(yield_per=settings.EXPORT_YIELD_PER))
+    if fmt == ExportFormat.CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(list(result.keys()))
+        async for partition in result.partitions():
+            writer.writerows([_csv_value(v) for v in row] for row in partition)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8") # Header of an empty export
+    else:
+        async for partition in result.mappings().partitions():
+            yield b"".join(dumps(dict(row)) + b"\n" for row in partition)
+
+async def export_stream(
+    session_factory: async_sessionmaker,
+    kind: ExportKind,
+    fmt: ExportFormat = ExportFormat.NDJSON,
+    gzip: bool = False,
+    agent_id: Optional[uuid.UUID] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> AsyncIterator[bytes]:
+    """
+    Export rows as NDJSON or CSV bytes, optionally gzip-compressed on the fly.
+    Opens its own session so the cursor lives as long as the consumer (e.g. a StreamingResponse).
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None # wbits 31: gzip container
+    async with session_factory() as session:
+        async for chunk in _encoded(session, export_query(kind, agent_id, start, end), fmt):
+            if compressor is None:
+                yield chunk
+            elif compressed := compressor.compress(chunk):
+                yield compressed
+    if compressor is not None:
+        yield compressor.flush()
+
+def export_filename(kind: ExportKind, fmt: ExportFormat, gzip: bool) -> str:
+    return f"{kind.value}-{datetime.utcnow():%Y%m%dT%H%M%S}.{fmt.value}{'.gz' if gzip else ''}"
@@ -0,0 +1,38 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.core import query_stats
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.domain.models import EquitySnapshot
+from app.repositories.equity_repository import EquityRepository
+
+logger = logging.getLogger(__name__)
+
+# Upkeep shared by the in-process scheduler and the /market/cron trigger (serverless)
+
+_last_rollup: Optional[float] = None
+
+def equity_rollup_due() -> bool:
+    return _last_rollup is None or time.monotonic() - _last_rollup >= settings.EQUITY_ROLLUP_INTERVAL_MINUTES * 60
+
+async def run_equity_rollup():
+    """Roll snapshots up from each resolution's watermark, then prune raw rows already covered."""
+    global _last_rollup
+    _last_rollup = time.monotonic()
+    with query_stats.detached():
+        await _rollup()
+
+async def _rollup():
+    async with SessionLocal() as session:
+        try:
+            repo = EquityRepository(EquitySnapshot, session)
+            hourly = await repo.rollup("1h")
+            daily = await repo.rollup("1d")
+            pruned = await repo.prune_raw(datetime.utcnow() - timedelta(days=settings.EQUITY_RAW_RETENTION_DAYS))
+            await session.commit()
+            logger.info(f"📈 Equity rollup: {hourly} hourly / {daily} daily buckets, pruned {pruned} raw snapshots")
+        except Exception as e:
+            logger.error(f"Equity Rollup Error: {e}", exc_info=True)
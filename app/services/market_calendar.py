@@ -0,0 +1,122 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th `weekday` (Mon=0) of the month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _easter(year: int) -> date:
+    # Anonymous Gregorian algorithm
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    return date(year, month, (h + l - 7 * m + 33 * month + 19) % 32)
+
+def _observed(day: date) -> date:
+    # Saturday holidays close the Friday before, Sunday ones the Monday after
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+class MarketCalendar:
+    """
+    NYSE regular sessions: 9:30-16:00 America/New_York on weekdays, minus exchange
+    holidays, closing at 13:00 on the scheduled half-days. Holidays follow the
+    exchange rules (Juneteenth from 2022, no Friday closure for a Saturday New Year);
+    ad-hoc closures come from MARKET_EXTRA_HOLIDAYS. Naive datetimes are UTC.
+    """
+    OPEN = time(9, 30)
+    CLOSE = time(16, 0)
+    EARLY_CLOSE = time(13, 0)
+
+    def __init__(self, tz: str = "America/New_York", extra_holidays: Iterable[str] = ()):
+        self.tz = ZoneInfo(tz)
+        self.extra_holidays = {date.fromisoformat(d) for d in extra_holidays}
+        self._years: Dict[int, Tuple[Set[date], Set[date]]] = {}
+
+    def _rules(self, year: int) -> Tuple[Set[date], Set[date]]:
+        if year not in self._years:
+            holidays = {
+                _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+                _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+                _easter(year) - timedelta(days=2),  # Good Friday
+                _nth_weekday(year, 5, 0, -1),  # Memorial Day
+                _observed(date(year, 7, 4)),
+                _nth_weekday(year, 9, 0, 1),  # Labor Day
+                _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+                _observed(date(year, 12, 25)),
+            }
+            new_year = date(year, 1, 1)
+            if new_year.weekday() != 5:
+                holidays.add(_observed(new_year))
+            if year >= 2022:
+                holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+            holidays |= {d for d in self.extra_holidays if d.year == year}
+
+            early = {_nth_weekday(year, 11, 3, 4) + timedelta(days=1)}
+            for day in (date(year, 7, 3), date(year, 12, 24)):
+                if day.weekday() < 5 and day not in holidays:
+                    early.add(day)
+            self._years[year] = (holidays, early)
+        return self._years[year]
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self._rules(day.year)[0]
+
+    def session(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """(open, close) of the day's regular session, tz-aware; None when the exchange is closed."""
+        if not self.is_trading_day(day):
+            return None
+        close = self.EARLY_CLOSE if day in self._rules(day.year)[1] else self.CLOSE
+        return (
+            datetime.combine(day, self.OPEN, tzinfo=self.tz),
+            datetime.combine(day, close, tzinfo=self.tz)
+        )
+
+    def _local(self, at: Optional[datetime]) -> datetime:
+        if at is None:
+            at = datetime.now(timezone.utc)
+        elif at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        return at.astimezone(self.tz)
+
+    def is_open(self, at: Optional[datetime] = None) -> bool:
+        at = self._local(at)
+        session = self.session(at.date())
+        return session is not None and session[0] <= at < session[1]
+
+    def last_close(self, at: Optional[datetime] = None) -> datetime:
+        """Close of the latest session that has ended at `at`."""
+        at = self._local(at)
+        day = at.date()
+        while True:
+            session = self.session(day)
+            if session is not None and session[1] <= at:
+                return session[1]
+            day -= timedelta(days=1)
+
+    def next_open(self, at: Optional[datetime] = None) -> datetime:
+        """Open of the current session if it has not started yet, else of the next one."""
+        at = self._local(at)
+        day = at.date()
+        while True:
+            session = self.session(day)
+            if session is not None and session[0] >= at:
+                return session[0]
+            day += timedelta(days=1)
+
+market_calendar = MarketCalendar(extra_holidays=settings.MARKET_EXTRA_HOLIDAYS)
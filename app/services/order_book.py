@@ -0,0 +1,153 @@
+import heapq
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from app.domain.ledger import RestingOrder
+
+class OrderBook:
+    """
+    In-memory matching engine for resting LIMIT/STOP orders.
+
+    Each ticker keeps two heaps keyed by trigger price: orders that fire as the price
+    falls to their trigger (BUY LIMIT, SELL STOP) in a max-heap, orders that fire as it
+    rises (SELL LIMIT, BUY STOP) in a min-heap. A tick pops from each top only while the
+    top triggers, so matching k of n resting orders costs O(k log n); orders that did not
+    trigger are never looked at. Cancels and expiries are lazy: heap entries of orders no
+    longer held are skipped when they surface, and the heaps are rebuilt once stale
+    entries outnumber live ones.
+
+    The book has no session: TradingService loads OPEN orders into it and persists what
+    it fills; the backtest drives it directly.
+    """
+
+    def __init__(self):
+        self.orders: Dict[int, RestingOrder] = {}
+        self.by_portfolio: Dict[int, Set[int]] = {}
+        self.hydrated = False
+        self.last_id = 0 # Highest order id loaded, for incremental refreshes
+        self._below: Dict[str, List[Tuple[float, int]]] = {} # ticker -> (-trigger, id)
+        self._above: Dict[str, List[Tuple[float, int]]] = {} # ticker -> (trigger, id)
+        self._expiry: List[Tuple[datetime, int]] = []
+        self._per_ticker: Dict[str, int] = {}
+        self._entries = 0 # Heap entries, live and stale
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    # --- Loading ---
+
+    def load(self, orders: Iterable[RestingOrder], replace: bool = False) -> int:
+        """Hold OPEN orders read from the database; `replace` drops everything held first. Returns how many were added."""
+        if replace:
+            self.clear()
+        added = 0
+        for order in orders:
+            if order.id not in self.orders:
+                self.add(order)
+                added += 1
+        self.hydrated = True
+        return added
+
+    def clear(self):
+        self.orders.clear()
+        self.by_portfolio.clear()
+        self._below.clear()
+        self._above.clear()
+        self._expiry.clear()
+        self._per_ticker.clear()
+        self._entries = 0
+        self.last_id = 0
+
+    # --- Orders ---
+
+    def add(self, order: RestingOrder):
+        self.orders[order.id] = order
+        self.by_portfolio.setdefault(order.portfolio_id, set()).add(order.id)
+        self._per_ticker[order.ticker] = self._per_ticker.get(order.ticker, 0) + 1
+        self._push(order)
+        self.last_id = max(self.last_id, order.id)
+
+    def _push(self, order: RestingOrder):
+        if order.triggers_below:
+            heapq.heappush(self._below.setdefault(order.ticker, []), (-order.trigger_price, order.id))
+        else:
+            heapq.heappush(self._above.setdefault(order.ticker, []), (order.trigger_price, order.id))
+        self._entries += 1
+        if order.expires_at is not None:
+            heapq.heappush(self._expiry, (order.expires_at, order.id))
+            self._entries += 1
+
+    def cancel(self, order_id: int) -> Optional[RestingOrder]:
+        order = self._remove(order_id)
+        self._maybe_compact()
+        return order
+
+    def _remove(self, order_id: int) -> Optional[RestingOrder]:
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return None
+        ids = self.by_portfolio[order.portfolio_id]
+        ids.discard(order_id)
+        if not ids:
+            del self.by_portfolio[order.portfolio_id]
+        remaining = self._per_ticker[order.ticker] - 1
+        if remaining:
+            self._per_ticker[order.ticker] = remaining
+        else:
+            del self._per_ticker[order.ticker]
+        return order
+
+    def _maybe_compact(self):
+        """Rebuild the heaps from the live orders once stale entries outnumber live ones."""
+        if self._entries <= 4 * len(self.orders) + 64:
+            return
+        self._below.clear()
+        self._above.clear()
+        self._expiry.clear()
+        self._entries = 0
+        for order in self.orders.values():
+            self._push(order)
+
+    def for_portfolio(self, portfolio_id: int) -> List[RestingOrder]:
+        return [self.orders[i] for i in sorted(self.by_portfolio.get(portfolio_id, ()))]
+
+    def tickers(self) -> Set[str]:
+        """Tickers with resting orders; they must be quoted on every tick."""
+        return set(self._per_ticker)
+
+    # --- Matching ---
+
+    def match(self, prices: Mapping[str, float]) -> List[RestingOrder]:
+        """
+        Remove and return the orders `prices` trigger (a missing or zero price triggers nothing),
+        per ticker and side in trigger-price priority, then time (id) priority.
+        """
+        triggered: List[RestingOrder] = []
+        for ticker in list(self._per_ticker):
+            price = prices.get(ticker)
+            if not price:
+                continue
+            heap = self._below.get(ticker)
+            while heap and -heap[0][0] >= price:
+                self._take(heapq.heappop(heap)[1], triggered)
+            heap = self._above.get(ticker)
+            while heap and heap[0][0] <= price:
+                self._take(heapq.heappop(heap)[1], triggered)
+        self._maybe_compact()
+        return triggered
+
+    def expire(self, now: datetime) -> List[RestingOrder]:
+        """Remove and return the orders whose expiry is at or before `now`."""
+        expired: List[RestingOrder] = []
+        while self._expiry and self._expiry[0][0] <= now:
+            self._take(heapq.heappop(self._expiry)[1], expired)
+        self._maybe_compact()
+        return expired
+
+    def _take(self, order_id: int, into: List[RestingOrder]):
+        self._entries -= 1
+        order = self._remove(order_id)
+        if order is not None:
+            into.append(order)
+
+order_book = OrderBook()
@@ -0,0 +1,253 @@
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.domain.ledger import PortfolioState, PositionState
+from app.domain.models import Portfolio, Position
+
+logger = logging.getLogger(__name__)
+
+class PortfolioBook:
+    """
+    Authoritative in-memory mark-to-market state for every portfolio.
+
+    Hydrated once from the database (portfolios created later are taken in by
+    `load_new` at each tick), indexed by portfolio, agent and held ticker,
+    so a price tick only touches the portfolios holding the tickers that moved.
+    Marks are journaled (price vectors, append-only) before they are applied and
+    written behind to the database in batched UPDATEs; on restart the journal is
+    replayed over the hydrated state, so a crash between flushes loses nothing.
+
+    Cash and holdings still change only through TradingService trades, which
+    hand the committed portfolio back via `sync_portfolio`.
+    """
+
+    def __init__(self, journal_path: str):
+        self.journal_path = journal_path
+        self.portfolios: Dict[int, PortfolioState] = {}
+        self.by_agent: Dict[uuid.UUID, PortfolioState] = {}
+        self.by_ticker: Dict[str, Set[int]] = {}
+        self.prices: Dict[str, float] = {}
+        self.hydrated = False
+        self._dirty_portfolios: Set[int] = set()
+        self._dirty_positions: Dict[int, float] = {} # position id -> price
+        self._written: Tuple[Dict[int, float], Dict[int, float]] = ({}, {}) # (portfolio id -> equity, position id -> price) of the flush awaiting its commit
+        self._last_flush = time.monotonic()
+        self._flushed_offset = 0 # Journal bytes covered by the last flush
+        self._max_id = 0 # Highest portfolio id loaded; newer ones are picked up by load_new
+
+    # --- Lifecycle ---
+
+    async def hydrate(self, session: AsyncSession):
+        """Load all portfolios and positions with two column selects, then replay the journal."""
+        t0 = time.perf_counter()
+        self.portfolios.clear()
+        self.by_agent.clear()
+        self.by_ticker.clear()
+        self._max_id = 0
+        await self._load(session)
+
+        replayed = self._replay_journal()
+        self.hydrated = True
+        logger.info(
+            f"📒 Portfolio book hydrated: {len(self.portfolios)} portfolios in "
+            f"{time.perf_counter() - t0:.2f}s ({replayed} journaled marks replayed)"
+        )
+        if replayed:
+            await self.flush(session)
+            await session.commit()
+            self.flush_committed()
+
+    async def load_new(self, session: AsyncSession) -> int:
+        """Take in portfolios created since the last load (agents registered at runtime): one MAX(id) select when there are none."""
+        newest = (await session.execute(select(func.max(Portfolio.id)))).scalar()
+        if newest is None or newest <= self._max_id:
+            return 0
+        added = await self._load(session, after_id=self._max_id)
+        if added:
+            logger.info(f"📒 Portfolio book took in {added} new portfolios")
+        return added
+
+    async def _load(self, session: AsyncSession, after_id: int = 0) -> int:
+        result = await session.execute(
+            select(Portfolio.id, Portfolio.agent_id, Portfolio.cash_balance, Portfolio.total_equity)
+            .where(Portfolio.id > after_id)
+        )
+        added: Set[int] = set()
+        for pid, agent_id, cash, equity in result.all():
+            self._max_id = max(self._max_id, pid)
+            if pid in self.portfolios:
+                continue # Already taken over from a trade by sync_portfolio
+            state = PortfolioState(id=pid, agent_id=agent_id, cash_balance=cash, total_equity=equity)
+            self.portfolios[pid] = state
+            self.by_agent[agent_id] = state
+            added.add(pid)
+
+        result = await session.execute(
+            select(Position.id, Position.portfolio_id, Position.ticker, Position.quantity,
+                   Position.avg_cost, Position.current_price)
+            .where(Position.portfolio_id > after_id)
+        )
+        for pos_id, pid, ticker, qty, avg_cost, price in result.all():
+            if pid not in added:
+                continue
+            state = self.portfolios[pid]
+            state.positions.append(PositionState(ticker=ticker, quantity=qty, avg_cost=avg_cost, current_price=price, id=pos_id))
+            self.by_ticker.setdefault(ticker, set()).add(pid)
+        return len(added)
+
+    def _replay_journal(self) -> int:
+        if not os.path.exists(self.journal_path):
+            return 0
+        replayed = 0
+        with open(self.journal_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break # Torn final write from the crash
+                self._apply_marks(entry["prices"])
+                replayed += 1
+        return replayed
+
+    # --- Marks ---
+
+    def held_tickers(self) -> Set[str]:
+        return {t for t, pids in self.by_ticker.items() if pids}
+
+    def mark(self, prices: Mapping[str, float]) -> int:
+        """Journal then apply a price vector. Returns the number of portfolios re-marked."""
+        changed = {t: p for t, p in prices.items() if p and self.prices.get(t) != p}
+        if not changed:
+            return 0
+        with open(self.journal_path, "a") as f:
+            f.write(json.dumps({"ts": datetime.utcnow().isoformat(), "prices": changed}) + "\n")
+        return self._apply_marks(changed)
+
+    def _apply_marks(self, prices: Dict[str, float]) -> int:
+        self.prices.update(prices)
+        affected: Set[int] = set()
+        for ticker in prices:
+            affected.update(self.by_ticker.get(ticker, ()))
+
+        for pid in affected:
+            state = self.portfolios[pid]
+            equity = state.cash_balance
+            for pos in state.positions:
+                price = prices.get(pos.ticker)
+                if price:
+                    pos.current_price = price
+                    if pos.id is not None:
+                        self._dirty_positions[pos.id] = price
+                equity += pos.quantity * (pos.current_price or pos.avg_cost)
+            state.total_equity = equity
+        self._dirty_portfolios.update(affected)
+        return len(affected)
+
+    # --- Trades ---
+
+    def sync_portfolio(self, portfolio: Portfolio):
+        """Take over cash and holdings from a committed ORM portfolio (after a trade cycle)."""
+        state = self.portfolios.get(portfolio.id)
+        if state is None:
+            state = PortfolioState(id=portfolio.id, agent_id=portfolio.agent_id, cash_balance=portfolio.cash_balance)
+            self.portfolios[portfolio.id] = state
+            self.by_agent[portfolio.agent_id] = state
+            self._max_id = max(self._max_id, portfolio.id)
+
+        kept = {p.id for p in portfolio.positions}
+        for pos in state.positions:
+            self.by_ticker.get(pos.ticker, set()).discard(portfolio.id)
+            if pos.id not in kept:
+                self._dirty_positions.pop(pos.id, None) # Sold out: the trade deleted the row
+        state.cash_balance = portfolio.cash_balance
+        state.positions = [
+            PositionState(ticker=p.ticker, quantity=p.quantity, avg_cost=p.avg_cost, current_price=p.current_price, id=p.id)
+            for p in portfolio.positions
+        ]
+        for pos in state.positions:
+            self.by_ticker.setdefault(pos.ticker, set()).add(portfolio.id)
+        stored = {p.id: p.current_price for p in portfolio.positions}
+        state.mark(self.prices)
+        # Rows still pending a mark, or that the book now prices differently, are written by the next flush
+        for pos in state.positions:
+            if pos.id is not None and (pos.id in self._dirty_positions or pos.current_price != stored[pos.id]):
+                self._dirty_positions[pos.id] = pos.current_price
+        self._dirty_portfolios.add(portfolio.id)
+
+    # --- Write-behind ---
+
+    def snapshot_rows(self, timestamp: datetime) -> List[dict]:
+        return [
+            {"portfolio_id": s.id, "timestamp": timestamp, "total_equity": s.total_equity, "cash_balance": s.cash_balance}
+            for s in self.portfolios.values()
+        ]
+
+    def flush_due(self) -> bool:
+        return time.monotonic() - self._last_flush >= settings.PORTFOLIO_BOOK_FLUSH_SECONDS
+
+    async def flush(self, session: AsyncSession) -> int:
+        """
+        Write dirty marks in batched executemany UPDATEs (caller commits).
+        They stay dirty, and the journal untruncated, until the caller's commit succeeds
+        and calls `flush_committed`: after a failed commit the next flush writes them again.
+        """
+        self._flushed_offset = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        self._written = ({}, {})
+        if not self._dirty_portfolios and not self._dirty_positions:
+            self._last_flush = time.monotonic()
+            return 0
+
+        portfolios = [
+            {"id": pid, "total_equity": self.portfolios[pid].total_equity}
+            for pid in self._dirty_portfolios if pid in self.portfolios
+        ]
+        positions = [{"id": pos_id, "current_price": price} for pos_id, price in self._dirty_positions.items()]
+        if portfolios:
+            await session.execute(update(Portfolio), portfolios)
+        if positions:
+            await session.execute(update(Position), positions)
+
+        self._written = (
+            {row["id"]: row["total_equity"] for row in portfolios},
+            {row["id"]: row["current_price"] for row in positions}
+        )
+        self._last_flush = time.monotonic()
+        return len(portfolios)
+
+    def flush_committed(self):
+        """Marks covered by the last flush are durable in the database; drop them from the dirty sets and the journal."""
+        # Re-marked while the commit was in flight: still dirty
+        portfolios, positions = self._written
+        for pid, equity in portfolios.items():
+            state = self.portfolios.get(pid)
+            if state is None or state.total_equity == equity:
+                self._dirty_portfolios.discard(pid)
+        for pos_id, price in positions.items():
+            if self._dirty_positions.get(pos_id) == price:
+                del self._dirty_positions[pos_id]
+        self._written = ({}, {})
+
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "rb") as f:
+            f.seek(self._flushed_offset)
+            pending = f.read() # Marks journaled while the flush was committing
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pending)
+        os.replace(tmp_path, self.journal_path)
+        self._flushed_offset = 0
+
+    def get(self, agent_id: uuid.UUID) -> Optional[PortfolioState]:
+        return self.by_agent.get(agent_id)
+
+portfolio_book = PortfolioBook(journal_path=settings.PORTFOLIO_BOOK_JOURNAL_PATH)
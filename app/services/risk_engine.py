@@ -0,0 +1,138 @@
+import math
+import time
+from array import array
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.domain.constants import RiskRejectReason, TradeAction
+
+class ProposedTrade:
+    """One order from an agent's decision, in the order the LLM proposed it."""
+    __slots__ = ("portfolio", "action", "ticker", "quantity", "reasoning")
+
+    def __init__(self, portfolio, action: TradeAction, ticker: str, quantity: int, reasoning: str = ""):
+        self.portfolio = portfolio # ORM Portfolio or PortfolioState
+        self.action = action
+        self.ticker = ticker
+        self.quantity = quantity
+        self.reasoning = reasoning
+
+class RiskResult:
+    __slots__ = ("trade", "price", "reason", "detail")
+
+    def __init__(self, trade: ProposedTrade, price: Optional[float], reason: Optional[RiskRejectReason] = None, detail: str = ""):
+        self.trade = trade
+        self.price = price
+        self.reason = reason
+        self.detail = detail
+
+    @property
+    def accepted(self) -> bool:
+        return self.reason is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ticker": self.trade.ticker,
+            "action": self.trade.action.value,
+            "quantity": self.trade.quantity,
+            "price": self.price,
+            "accepted": self.accepted,
+            "reason": self.reason.value if self.reason else None,
+            "detail": self.detail
+        }
+
+class RiskEngine:
+    """
+    Pre-trade checks over a whole cycle's order set, before anything touches the ORM.
+
+    Quote checks (missing/fallback/stale price, order notional) run column-wise over
+    the batch; cash, holdings and concentration then run in one pass per order with a
+    running view of each portfolio, so later orders see the effect of earlier accepted ones.
+    Limits default to settings; 0 disables a limit.
+    """
+
+    def __init__(
+        self,
+        max_order_notional: Optional[float] = None,
+        max_position_pct: Optional[float] = None,
+        max_quote_age_seconds: Optional[float] = None
+    ):
+        self.max_order_notional = settings.RISK_MAX_ORDER_NOTIONAL if max_order_notional is None else max_order_notional
+        self.max_position_pct = settings.RISK_MAX_POSITION_PCT if max_position_pct is None else max_position_pct
+        self.max_quote_age_seconds = settings.RISK_MAX_QUOTE_AGE_SECONDS if max_quote_age_seconds is None else max_quote_age_seconds
+
+    def validate(self, trades: List[ProposedTrade], quotes: Dict[str, Dict[str, Any]], now: Optional[float] = None) -> List[RiskResult]:
+        now = time.time() if now is None else now
+        n = len(trades)
+
+        # Quote columns, one entry per ticker in the batch
+        tickers = {t.ticker for t in trades}
+        price_of = {}
+        quote_reject = {}
+        for ticker in tickers:
+            quote = quotes.get(ticker) or {}
+            price = quote.get("price")
+            price_of[ticker] = float(price) if price else math.nan
+            age = now - quote.get("fetched_at", now)
+            if not price:
+                quote_reject[ticker] = (RiskRejectReason.NO_PRICE, f"No price data for {ticker}")
+            elif quote.get("is_fallback"):
+                quote_reject[ticker] = (RiskRejectReason.FALLBACK_PRICE, f"{ticker} price is a placeholder")
+            elif self.max_quote_age_seconds and age > self.max_quote_age_seconds:
+                quote_reject[ticker] = (RiskRejectReason.STALE_QUOTE, f"{ticker} quote is {age:.0f}s old")
+
+        # Order columns
+        price = array("d", (price_of[t.ticker] for t in trades))
+        quantity = array("d", (t.quantity for t in trades))
+        notional = array("d", (q * p for q, p in zip(quantity, price)))
+
+        rejected = [quote_reject.get(t.ticker, (None, "")) for t in trades]
+        reasons: List[Optional[RiskRejectReason]] = [r for r, _ in rejected]
+        details = [d for _, d in rejected]
+        if self.max_order_notional:
+            limit = self.max_order_notional
+            for i in range(n):
+                if reasons[i] is None and notional[i] > limit:
+                    reasons[i] = RiskRejectReason.MAX_NOTIONAL
+                    details[i] = f"Order notional ${notional[i]:.2f} exceeds ${limit:.2f}"
+
+        # Running portfolio view: cash and per-ticker holdings after earlier accepted orders
+        cash: Dict[int, float] = {}
+        held: Dict[int, Dict[str, int]] = {}
+        for i, trade in enumerate(trades):
+            if reasons[i] is not None:
+                continue
+            portfolio = trade.portfolio
+            pid = id(portfolio)
+            if pid not in cash:
+                cash[pid] = portfolio.cash_balance
+                held[pid] = {}
+                for pos in portfolio.positions:
+                    held[pid][pos.ticker] = held[pid].get(pos.ticker, 0) + pos.quantity
+
+            if trade.action == TradeAction.BUY:
+                if cash[pid] < notional[i]:
+                    reasons[i] = RiskRejectReason.INSUFFICIENT_FUNDS
+                    details[i] = f"Need ${notional[i]:.2f}, have ${cash[pid]:.2f}"
+                    continue
+                equity = portfolio.total_equity or portfolio.cash_balance
+                exposure = (held[pid].get(trade.ticker, 0) + trade.quantity) * price[i]
+                if self.max_position_pct and equity > 0 and exposure / equity > self.max_position_pct:
+                    reasons[i] = RiskRejectReason.CONCENTRATION
+                    details[i] = f"{trade.ticker} would be {exposure / equity:.0%} of equity"
+                    continue
+                cash[pid] -= notional[i]
+                held[pid][trade.ticker] = held[pid].get(trade.ticker, 0) + trade.quantity
+            elif trade.action == TradeAction.SELL:
+                holding = held[pid].get(trade.ticker, 0)
+                if holding < trade.quantity:
+                    reasons[i] = RiskRejectReason.INSUFFICIENT_HOLDINGS
+                    details[i] = f"Sell {trade.quantity} {trade.ticker} but hold {holding}"
+                    continue
+                cash[pid] += notional[i]
+                held[pid][trade.ticker] = holding - trade.quantity
+
+        return [
+            RiskResult(trade, None if math.isnan(price[i]) else price[i], reasons[i], details[i])
+            for i, trade in enumerate(trades)
+        ]
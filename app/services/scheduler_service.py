@@ -1,11 +1,16 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 import logging
 
 from app.core.config import settings
 from app.services.trading_service import TradingService
-from app.adapters.gemini_adapter import GeminiAdapter
-from app.adapters.yahoo_finance_adapter import YahooFinanceAdapter
+from app.adapters.llm_router import get_llm_router
+from app.adapters.market_hours_cache import get_market_data
+from app.services.maintenance import run_equity_rollup
+from app.services.portfolio_book import portfolio_book
+from app.services.market_calendar import market_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -16,19 +21,35 @@ class SchedulerService:
         self.scheduler = AsyncIOScheduler()
         self.engine = engine
         self.SessionLocal = SessionLocal
-        self.gemini_client = GeminiAdapter()
-        self.market_data_client = YahooFinanceAdapter()
+        self.llm_client = get_llm_router()
+        self.market_data_client = get_market_data()
+        self.book = portfolio_book if settings.USE_PORTFOLIO_BOOK else None
+        self.calendar = market_calendar if settings.MARKET_CALENDAR_ENABLED else None
+        self.last_price_update: Optional[datetime] = None
 
     async def start(self):
         logger.info(f"Starting Scheduler with timezone {settings.SCHEDULER_TIMEZONE}...")
+
+        if self.book:
+            async with self.SessionLocal() as session:
+                await self.book.hydrate(session)
+            # Write-behind of in-memory marks
+            self.scheduler.add_job(
+                self.run_book_flush,
+                'interval',
+                seconds=settings.PORTFOLIO_BOOK_FLUSH_SECONDS,
+                id='portfolio_book_flush',
+                replace_existing=True,
+                coalesce=True
+            )
         
-        # Market Cycle: Runs Monday-Friday during NASDAQ hours (9:30 AM - 4:00 PM ET)
-        # Every 30 minutes (0, 30)
+        # Market Cycle: every 30 minutes Monday-Friday 9:00-15:30 ET; the exchange
+        # calendar skips the pre-open slot, holidays and half-day afternoons
         self.scheduler.add_job(
             self.run_market_cycle, 
             'cron',
             day_of_week='mon-fri',
-            hour='9-16',
+            hour='9-15',
             minute='*/30',
             timezone=settings.SCHEDULER_TIMEZONE,
             id='market_cycle',
@@ -46,20 +67,37 @@ class SchedulerService:
             replace_existing=True,
             coalesce=True
         )
+
+        # Equity Rollups: downsample snapshots into 1h/1d buckets for charts
+        self.scheduler.add_job(
+            self.run_equity_rollup,
+            'interval',
+            minutes=settings.EQUITY_ROLLUP_INTERVAL_MINUTES,
+            id='equity_rollup',
+            replace_existing=True,
+            coalesce=True
+        )
         self.scheduler.start()
 
     async def shutdown(self):
         logger.info("Shutting down Scheduler...")
         self.scheduler.shutdown()
+        if self.book:
+            await self.run_book_flush()
         await self.engine.dispose()
 
     async def run_market_cycle(self):
+        if self.calendar and not self.calendar.is_open():
+            logger.debug("Market closed, no cycle")
+            return
         async with self.SessionLocal() as session:
             try:
                 service = TradingService(
                     db_session=session,
-                    llm_client=self.gemini_client,
-                    market_data_client=self.market_data_client
+                    llm_client=self.llm_client,
+                    market_data_client=self.market_data_client,
+                    book=self.book,
+                    calendar=self.calendar
                 )
                 await service.execute_market_cycle()
             except Exception as e:
@@ -67,13 +105,36 @@ class SchedulerService:
 
     async def run_price_update(self):
         # Lightweight job to just update equity/prices
+        now = datetime.now(timezone.utc)
+        if self.calendar and not self.calendar.is_open(now):
+            # One mark at the close, then nothing can move until the next open
+            if self.last_price_update and self.last_price_update >= self.calendar.last_close(now) + timedelta(seconds=settings.MARKET_CLOSE_SETTLE_SECONDS):
+                logger.debug("Market closed, last close already marked")
+                return
         async with self.SessionLocal() as session:
             try:
                 service = TradingService(
                     db_session=session,
-                    llm_client=self.gemini_client,
-                    market_data_client=self.market_data_client
+                    llm_client=self.llm_client,
+                    market_data_client=self.market_data_client,
+                    book=self.book,
+                    calendar=self.calendar
                 )
                 await service.update_market_values()
+                self.last_price_update = now
             except Exception as e:
                 logger.error(f"Price Update Error: {e}", exc_info=True)
+
+    async def run_equity_rollup(self):
+        await run_equity_rollup()
+
+    async def run_book_flush(self):
+        async with self.SessionLocal() as session:
+            try:
+                flushed = await self.book.flush(session)
+                await session.commit()
+                self.book.flush_committed()
+                if flushed:
+                    logger.debug(f"Portfolio book flushed {flushed} portfolios")
+            except Exception as e:
+                logger.error(f"Portfolio Book Flush Error: {e}", exc_info=True)
@@ -0,0 +1,166 @@
+import importlib
+import logging
+import math
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.domain.constants import ScreenerStyle
+from app.domain.market_snapshot import MarketSnapshot
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ("daily_return_pct", "rel_vol_20", "dist_sma50_pct", "macd_hist", "rsi_14", "atr_14_pct", "bb_width", "dist_52w_high_pct")
+
+class ScreenerSnapshot:
+    """
+    One cycle's quotes as z-scored feature columns (array('d'), one slot per ticker),
+    built once and shared by every screener. Missing values score neutral (0).
+    """
+
+    def __init__(self, rich_data: Dict[str, Dict[str, Any]]):
+        self.tickers: List[str] = list(rich_data)
+        self.usable = [not quote.get("is_fallback") and bool(quote.get("price")) for quote in rich_data.values()]
+        self.columns: Dict[str, array] = {}
+        for feature in FEATURES:
+            if isinstance(rich_data, MarketSnapshot):
+                raw = rich_data.column(feature)
+            else:
+                raw = array("d", (_number(quote.get(feature)) for quote in rich_data.values()))
+            self.columns[feature] = _zscore(raw)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+def _number(value: Any) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return value if math.isfinite(value) else math.nan
+
+def _zscore(column: array) -> array:
+    present = [x for x in column if not math.isnan(x)]
+    if len(present) < 2:
+        return array("d", bytes(8 * len(column)))
+    mean = sum(present) / len(present)
+    std = math.sqrt(sum((x - mean) ** 2 for x in present) / len(present))
+    if std == 0:
+        return array("d", bytes(8 * len(column)))
+    return array("d", (0.0 if math.isnan(x) else (x - mean) / std for x in column))
+
+class Screener:
+    """
+    Scores every ticker of a snapshot for one trading style; higher ranks first.
+    `keywords` matched against an agent's persona pick the screener for that agent.
+    """
+    name = "base"
+    keywords: Tuple[str, ...] = ()
+    weights: Dict[str, float] = {}
+
+    def score(self, snapshot: ScreenerSnapshot) -> array:
+        scores = array("d", bytes(8 * len(snapshot)))
+        for feature, weight in self.weights.items():
+            column = snapshot.columns[feature]
+            for i in range(len(scores)):
+                scores[i] += weight * column[i]
+        return scores
+
+class MomentumScreener(Screener):
+    """Trending names: strong day, positive MACD histogram, above the 50-day average, on volume."""
+    name = ScreenerStyle.MOMENTUM.value
+    keywords = ("momentum", "trend", "breakout", "growth")
+    weights = {"daily_return_pct": 1.0, "macd_hist": 1.0, "dist_sma50_pct": 1.0, "rel_vol_20": 0.5}
+
+class ValueScreener(Screener):
+    """Pullbacks: oversold RSI, furthest below the 52-week high and the 50-day average."""
+    name = ScreenerStyle.VALUE.value
+    keywords = ("value", "contrarian", "reversion", "dip", "bargain")
+    weights = {"rsi_14": -1.0, "dist_52w_high_pct": -1.0, "dist_sma50_pct": -0.5}
+
+class VolatilityScreener(Screener):
+    """Movers: widest ranges and bands, unusual volume, large moves either way."""
+    name = ScreenerStyle.VOLATILITY.value
+    keywords = ("volatil", "liquidity", "high-frequency", "scalp", "market maker", "swing")
+    weights = {"atr_14_pct": 1.0, "bb_width": 1.0, "rel_vol_20": 1.0}
+
+    def score(self, snapshot: ScreenerSnapshot) -> array:
+        scores = super().score(snapshot)
+        moves = snapshot.columns["daily_return_pct"]
+        for i in range(len(scores)):
+            scores[i] += abs(moves[i])
+        return scores
+
+SCREENERS: Dict[str, Screener] = {s.name: s for s in (MomentumScreener(), ValueScreener(), VolatilityScreener())}
+
+def load_screeners(specs: Dict[str, str]) -> Dict[str, Screener]:
+    """Built-in screeners plus name -> "module:Class" plugins (SCREENER_PLUGINS)."""
+    screeners = dict(SCREENERS)
+    for name, spec in specs.items():
+        module_name, _, class_name = spec.partition(":")
+        screener = getattr(importlib.import_module(module_name), class_name)()
+        screener.name = name
+        screeners[name] = screener
+    return screeners
+
+class TickerScreener:
+    """
+    Pre-LLM stage: trims an agent's candidate tickers to the top-K for its persona's style.
+    Each style ranks the cycle's snapshot once; per agent, selection is a walk down that
+    ranking. Holdings are added back by the caller, so prompt size stays bounded at K + holdings.
+    """
+
+    def __init__(self, top_k: int, screeners: Optional[Dict[str, Screener]] = None, default_style: Optional[str] = None):
+        self.top_k = top_k
+        self.screeners = screeners if screeners is not None else load_screeners(settings.SCREENER_PLUGINS)
+        self.default_style = default_style or settings.SCREENER_DEFAULT_STYLE
+        if self.default_style not in self.screeners:
+            raise ValueError(f"Unknown screener style '{self.default_style}' (have: {', '.join(self.screeners)})")
+        self._source: Optional[Dict[str, Any]] = None
+        self._snapshot: Optional[ScreenerSnapshot] = None
+        self._rankings: Dict[str, List[str]] = {}
+
+    def style_for(self, persona: Optional[str]) -> str:
+        text = (persona or "").lower()
+        for name, screener in self.screeners.items():
+            if any(keyword in text for keyword in screener.keywords):
+                return name
+        return self.default_style
+
+    def _ranking(self, rich_data: Dict[str, Dict[str, Any]], style: str) -> List[str]:
+        if self._source is not rich_data:
+            self._source = rich_data
+            self._snapshot = ScreenerSnapshot(rich_data)
+            self._rankings = {}
+        if style not in self._rankings:
+            snapshot = self._snapshot
+            scores = self.screeners[style].score(snapshot)
+            order = sorted(range(len(snapshot)), key=lambda i: (not snapshot.usable[i], -scores[i]))
+            self._rankings[style] = [snapshot.tickers[i] for i in order]
+            logger.info(f"🔎 Screener '{style}' ranked {len(snapshot)} tickers, top: {', '.join(self._rankings[style][:5])}")
+        return self._rankings[style]
+
+    def select(self, candidates: Iterable[str], rich_data: Dict[str, Dict[str, Any]], persona: Optional[str]) -> List[str]:
+        """The top-K of `candidates` (tickers quoted in `rich_data`) for the persona's style, best first."""
+        candidates = [t for t in candidates if t in rich_data]
+        if len(candidates) <= self.top_k:
+            return candidates
+        wanted = set(candidates)
+        picked = []
+        for ticker in self._ranking(rich_data, self.style_for(persona)):
+            if ticker in wanted:
+                picked.append(ticker)
+                if len(picked) == self.top_k:
+                    break
+        return picked
+
+_ticker_screener: Optional[TickerScreener] = None
+
+def get_ticker_screener() -> Optional[TickerScreener]:
+    """Process-wide screener, None when SCREENER_TOP_K is 0. Plugins are imported once, on first use."""
+    global _ticker_screener
+    if settings.SCREENER_TOP_K <= 0:
+        return None
+    if _ticker_screener is None:
+        _ticker_screener = TickerScreener(settings.SCREENER_TOP_K)
+    return _ticker_screener
@@ -1,28 +1,57 @@
 import logging
 import asyncio
-from typing import List, Dict
-from datetime import datetime
+from typing import Any, Awaitable, Callable, Iterable, List, Dict, Mapping, Optional, Set, Tuple, Union
+from datetime import datetime, timedelta
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.domain.models import Agent, Portfolio, Position, Trade, AuditLog
-from app.domain.constants import TradeAction
-from app.domain.schemas import LLMResponse, PortfolioRead, PositionRead
+from app.domain.models import Agent, Portfolio, Position, Trade, AuditLog, EquitySnapshot, Ticker, WatchlistEntry, CycleRun, CycleRunAgent, Order
+from app.domain.constants import CycleRunStatus, OrderStatus, OrderType, RiskRejectReason, TradeAction
+from app.domain.schemas import AgentDecisionRequest, LLMResponse, LLMTrade, PortfolioRead, PositionRead
+from app.domain.market_snapshot import MarketSnapshot, MarketView
+from app.domain.ledger import RestingOrder
 from app.ports.llm_port import LLMPort
 from app.ports.market_data_port import MarketDataPort
 from app.repositories.agent_repository import AgentRepository
 from app.repositories.portfolio_repository import PortfolioRepository
 from app.repositories.trade_repository import TradeRepository
-from app.core.exceptions import InsufficientFundsError, ShortSellingError
+from app.repositories.audit_repository import AuditLogRepository
+from app.repositories.equity_repository import EquityRepository
+from app.repositories.ticker_repository import TickerRepository
+from app.repositories.cycle_run_repository import CycleRunRepository, CycleRunAgentRepository
+from app.repositories.watchlist_repository import WatchlistRepository
+from app.repositories.order_repository import OrderRepository
+from app.services.portfolio_book import PortfolioBook
+from app.services.order_book import OrderBook, order_book
+from app.services.market_calendar import MarketCalendar
+from app.services.risk_engine import RiskEngine, ProposedTrade
+from app.services.screener import TickerScreener, get_ticker_screener
+from app.core.config import settings
+from app.core.exceptions import InsufficientFundsError, ShortSellingError, LLMGenerationError
 
 logger = logging.getLogger(__name__)
 
+# Risk rejections that say nothing about the order itself: a triggered order stays open for a later tick
+QUOTE_REJECTS = {RiskRejectReason.NO_PRICE, RiskRejectReason.FALLBACK_PRICE, RiskRejectReason.STALE_QUOTE}
+
+# Order fills and market cycles both write portfolio cash computed from their own loads, so in this
+# process they never overlap: a cycle holds it from start to finish, a fill while it trades
+trading_lock = asyncio.Lock()
+
 class TradingService:
+    # Watchlist of agents that have none of their own
+    DEFAULT_UNIVERSE = ["AAPL", "GOOGL", "MSFT", "TSLA", "NVDA", "AMD", "META", "AMZN", "NFLX", "PYPL"]
+
     def __init__(
         self,
         db_session: AsyncSession,
         llm_client: LLMPort,
-        market_data_client: MarketDataPort
+        market_data_client: MarketDataPort,
+        book: Optional[PortfolioBook] = None,
+        calendar: Optional[MarketCalendar] = None,
+        orders: Optional[OrderBook] = None,
+        screener: Optional[TickerScreener] = None
     ):
         self.db = db_session
         self.llm = llm_client
@@ -30,42 +59,118 @@ class TradingService:
         self.agent_repo = AgentRepository(Agent, db_session)
         self.portfolio_repo = PortfolioRepository(Portfolio, db_session)
         self.trade_repo = TradeRepository(Trade, db_session)
+        self.audit_repo = AuditLogRepository(AuditLog, db_session)
+        self.equity_repo = EquityRepository(EquitySnapshot, db_session)
+        self.ticker_repo = TickerRepository(Ticker, db_session)
+        self.watchlist_repo = WatchlistRepository(WatchlistEntry, db_session)
+        self.cycle_run_repo = CycleRunRepository(CycleRun, db_session)
+        self.cycle_agent_repo = CycleRunAgentRepository(CycleRunAgent, db_session)
+        self.order_repo = OrderRepository(Order, db_session)
+        # DEFAULT_UNIVERSE minus deactivated registry tickers, refreshed by quote_universe()
+        self.default_watchlist = list(self.DEFAULT_UNIVERSE)
+        self.risk = RiskEngine()
+        # Trims each prompt's watchlist to the persona's top-K before the LLM call; the process-wide one unless injected
+        self._screener = screener
+        # Hydrated in-memory book: marks skip the ORM and are written behind
+        self.book = book if book is not None and book.hydrated else None
+        # Exchange sessions; without one the service trades whenever it is asked to
+        self.calendar = calendar
+        # Resting LIMIT/STOP orders, shared by the process and matched on every price update
+        self.orders = orders if orders is not None else order_book
+        self.placed_orders: Dict[int, int] = {} # portfolio id -> orders placed by this service, not yet in the book
+        # Streamed decisions handed off before their thoughts finished, by id(decision)
+        self._streaming: Dict[int, dict] = {}
+
+    @property
+    def screener(self) -> Optional[TickerScreener]:
+        if self._screener is None:
+            self._screener = get_ticker_screener()
+        return self._screener
+
+    async def quote_universe(self, held: Iterable[str]) -> Set[str]:
+        """
+        Tickers worth quoting: the union of all watchlists (the default one included while some agent has none),
+        `held` and the tickers of resting orders.
+        """
+        tickers = await self.watchlist_repo.watched_symbols()
+        if await self.watchlist_repo.has_unwatched_agents():
+            inactive = await self.ticker_repo.get_inactive_symbols(self.DEFAULT_UNIVERSE)
+            self.default_watchlist = [t for t in self.DEFAULT_UNIVERSE if t not in inactive]
+            tickers.update(self.default_watchlist)
+        tickers.update(held)
+        tickers.update(self.orders.tickers())
+        return tickers
+
+    async def refresh_orders(self, full: bool = False):
+        """
+        Load OPEN orders into the order book: all of them on the first call or with `full`,
+        otherwise only those placed (by any process) since the last refresh.
+        """
+        if full or not self.orders.hydrated:
+            added = self.orders.load(await self.order_repo.get_open(), replace=True)
+            logger.debug(f"Order book loaded with {added} open orders")
+        else:
+            self.orders.load(await self.order_repo.get_open(after_id=self.orders.last_id))
+
+    def agent_market_data(self, agent: Agent, rich_data: MarketSnapshot) -> MarketView:
+        """The slice of the cycle's quotes an agent's prompt carries: its (screened) watchlist, then its holdings."""
+        tickers = [entry.ticker for entry in agent.watchlist] or list(self.default_watchlist)
+        if self.screener:
+            tickers = self.screener.select(tickers, rich_data, agent.persona)
+        if agent.portfolio:
+            tickers += [p.ticker for p in agent.portfolio.positions]
+        return rich_data.view(tickers)
 
     async def update_market_values(self):
         """
-        Fetches latest market data and updates Portfolio equity and Position prices.
+        Fetches latest market data and updates Portfolio equity and Position prices, then
+        fills the resting orders the new prices trigger.
         This is a lightweight operation compared to the full market cycle.
         """
+        await self.refresh_orders()
+        if self.book:
+            rich_data = await self._update_market_values_in_book()
+            await self._match_orders(rich_data)
+            return rich_data, None
+
         # 1. Fetch Agents
         agents = await self.agent_repo.get_all_with_portfolios()
         if not agents:
             return {}, []
 
-        # 2. Gather all tickers to fetch prices efficiently
-        # Expanded universe for a more active simulation
-        all_tickers = set(["AAPL", "GOOGL", "MSFT", "TSLA", "NVDA", "AMD", "META", "AMZN", "NFLX", "PYPL"]) 
-        for agent in agents:
-            if agent.portfolio:
-                for pos in agent.portfolio.positions:
-                    all_tickers.add(pos.ticker)
+        # 2. Gather all tickers to fetch prices efficiently: watchlists + holdings, deduplicated
+        all_tickers = await self.quote_universe(
+            pos.ticker for agent in agents if agent.portfolio for pos in agent.portfolio.positions
+        )
         
         # 3. Fetch Data
         logger.info(f"📊 Fetching Market Data for {len(all_tickers)} tickers...")
         t0 = datetime.utcnow()
-        rich_data = await self.market_data.get_rich_market_data(list(all_tickers))
+        rich_data = MarketSnapshot(await self.market_data.get_rich_market_data(list(all_tickers)))
         fetch_duration = (datetime.utcnow() - t0).total_seconds()
         logger.info(f"   -> Data fetched in {fetch_duration:.2f}s")
-        
-        simple_prices = {t: d['price'] for t, d in rich_data.items()}
 
         # 4. Update Equity & Position Prices
+        snapshots = self._mark_agents(agents, rich_data.price_view, datetime.utcnow())
+            
+        # 5. Append the equity series in one bulk INSERT
+        await self.equity_repo.add_snapshots(snapshots)
+        await self.db.commit()
+
+        # 6. Resting orders
+        await self._match_orders(rich_data)
+        return rich_data, agents
+
+    def _mark_agents(self, agents: List[Agent], prices: Mapping[str, float], marked_at: datetime) -> List[dict]:
+        """Mark ORM portfolios to `prices`; returns their equity snapshot rows."""
+        snapshots = []
         for agent in agents:
             if not agent.portfolio:
                 continue
             
             equity = agent.portfolio.cash_balance
             for pos in agent.portfolio.positions:
-                price = simple_prices.get(pos.ticker)
+                price = prices.get(pos.ticker)
                 
                 # Update persisted price if available
                 if price:
@@ -77,123 +182,428 @@ class TradingService:
                     equity += pos.quantity * fallback
             
             agent.portfolio.total_equity = equity
-            
-        await self.db.commit()
-        return rich_data, agents
+            snapshots.append({
+                "portfolio_id": agent.portfolio.id,
+                "timestamp": marked_at,
+                "total_equity": equity,
+                "cash_balance": agent.portfolio.cash_balance
+            })
+        return snapshots
 
-    async def execute_market_cycle(self):
-        start_time = datetime.utcnow()
-        logger.info(f"🚀 Starting Market Cycle at {start_time}")
-        
-        # Reuse the update logic
-        rich_data, agents = await self.update_market_values()
-        
-        if not agents:
-            logger.info("No agents found.")
-            return
+    async def _update_market_values_in_book(self):
+        """Mark-to-market in memory: no ORM graph load, equity/prices written behind in batches."""
+        # Agents registered since the last tick get their snapshots and ranking from now on
+        await self.book.load_new(self.db)
+        all_tickers = await self.quote_universe(self.book.held_tickers())
 
-        logger.info(f"👥 Processing {len(agents)} agents...")
-        
-        all_tickers = list(rich_data.keys())
-        simple_prices = {t: d['price'] for t, d in rich_data.items()}
-        
-        # 5. Calculate Leaderboard (based on just-updated equity)
-        agent_equities = [(a.id, a.portfolio.total_equity) for a in agents if a.portfolio]
-        agent_equities.sort(key=lambda x: x[1], reverse=True)
-        
-        leader_equity = agent_equities[0][1] if agent_equities else 0
-        ranking_map = {aid: (rank, leader_equity - eq) for rank, (aid, eq) in enumerate(agent_equities, start=1)}
+        logger.info(f"📊 Fetching Market Data for {len(all_tickers)} tickers...")
+        t0 = datetime.utcnow()
+        rich_data = MarketSnapshot(await self.market_data.get_rich_market_data(list(all_tickers)))
+        fetch_duration = (datetime.utcnow() - t0).total_seconds()
+        logger.info(f"   -> Data fetched in {fetch_duration:.2f}s")
+
+        marked = self.book.mark(rich_data.price_view)
+        await self.equity_repo.add_snapshots(self.book.snapshot_rows(datetime.utcnow()))
+        flushed = None
+        if self.book.flush_due():
+            flushed = await self.book.flush(self.db)
+        await self.db.commit()
+        if flushed is not None:
+            self.book.flush_committed()
+        logger.info(f"   -> Marked {marked} portfolios in memory")
+        return rich_data
 
-        # 6. Process Each Agent
+    def _apply_book_marks(self, agents: List[Agent]):
+        """Apply the book's marks to loaded agents without dirtying the ORM."""
         for agent in agents:
             if not agent.portfolio:
                 continue
-                
-            rank, gap = ranking_map.get(agent.id, (0, 0.0))
-            
-            # Convert DB Portfolio to Pydantic for LLM
-            # We explicitly construct it to ensure clean data passed
-            positions_read = [
-                PositionRead(
-                    ticker=p.ticker,
-                    quantity=p.quantity,
-                    avg_cost=p.avg_cost,
-                    current_price=p.current_price
-                ) for p in agent.portfolio.positions
-            ]
-            portfolio_read = PortfolioRead(
-                id=agent.portfolio.id,
-                cash_balance=agent.portfolio.cash_balance,
-                total_equity=agent.portfolio.total_equity,
-                positions=positions_read
-            )
+            state = self.book.get(agent.id)
+            if state is None:
+                # Registered after this cycle's load_new: the book takes it over as loaded
+                self.book.sync_portfolio(agent.portfolio)
+                continue
+            set_committed_value(agent.portfolio, "total_equity", state.total_equity)
+            for pos in agent.portfolio.positions:
+                set_committed_value(pos, "current_price", self.book.prices.get(pos.ticker, pos.current_price))
 
-            try:
-                # 6. Get LLM Decision
-                logger.info(f"   -> Asking Gemini for {agent.name}...")
-                decision = await self.llm.generate_trade_decision(
-                    agent_name=agent.name,
-                    portfolio=portfolio_read,
-                    market_data=rich_data, # Passing rich dict
-                    rank=rank,
-                    leader_gap=gap,
-                    persona=agent.persona # Passing persona
-                )
+    async def _match_orders(self, rich_data: MarketSnapshot, in_cycle: bool = False):
+        """
+        Fill the resting orders this tick's prices trigger, at the tick price and through the
+        same risk checks as cycle orders, and expire old ones. Orders that did not trigger cost nothing.
+        `in_cycle`: called by a cycle before it loads any portfolio; it already holds trading_lock.
+        """
+        now = datetime.utcnow()
+        expired = self.orders.expire(now)
+        triggered = []
+        if not self.market_closed():
+            # Placeholder prices never trigger an order
+            prices = {t: rich_data.price_view[t] for t in self.orders.tickers() if t in rich_data and not rich_data[t].get("is_fallback")}
+            triggered = self.orders.match(prices)
+        if triggered and not in_cycle and trading_lock.locked():
+            # A cycle is trading these portfolios; never block the tick behind it
+            self._hold(triggered)
+            triggered = []
+        if in_cycle or not triggered:
+            await self._fill_orders(now, expired, triggered, rich_data, in_cycle)
+            return
+        # Free, so taken without yielding: no cycle can start loading between the check and here
+        async with trading_lock:
+            await self._fill_orders(now, expired, triggered, rich_data)
 
-                logger.info("Fetching audit context")
-                
-                # 7. Audit Log (Full Context)
-                # We store the exact data used for decision making
-                audit_context = {
-                    "identity": {
-                        "name": agent.name,
-                        "persona": agent.persona
-                    },
-                    "gamification": {
-                        "rank": rank,
-                        "gap_to_leader": gap
-                    },
-                    "portfolio": portfolio_read.model_dump(),
-                    "market_data_snapshot": {k: v for k, v in rich_data.items() if k in all_tickers} # Store what was passed
-                }
-                
-                logger.info("Audit context fetched")
-                
-                audit_log = AuditLog(
-                    agent_id=agent.id,
-                    prompt=audit_context,
-                    response=decision.model_dump()
-                )
+    def _hold(self, triggered: List[RestingOrder]):
+        """Put triggered orders back to fill once the running cycle has committed."""
+        for order in triggered:
+            self.orders.add(order)
+        logger.info(f"⏸️ {len(triggered)} triggered orders wait for the running cycle")
 
-                self.db.add(audit_log)
-                # 8. Execute Trades
-                for trade_req in decision.trades:
-                    current_price = simple_prices.get(trade_req.ticker)
-                    if not current_price:
-                        logger.warning(f"Skipping trade for {trade_req.ticker}: No price data")
-                        continue
-                        
+    async def _fill_orders(self, now: datetime, expired: List[RestingOrder], triggered: List[RestingOrder], rich_data: MarketSnapshot, in_cycle: bool = False):
+        if triggered and not in_cycle and await self._cycle_running(now):
+            # Cycle of another process (its heartbeat is in the DB)
+            self._hold(triggered)
+            triggered = []
+
+        await self.order_repo.expire([order.id for order in expired], now)
+        if triggered:
+            # Cancelled by another process since it was loaded; the rest stay locked until the commit below
+            still_open = await self.order_repo.claim_open(order.id for order in triggered)
+            triggered = [order for order in triggered if order.id in still_open]
+
+        closed, portfolios = [], {}
+        if triggered:
+            # Loaded under the lock: the tick's own agents may predate a cycle that committed since
+            portfolios = await self._order_portfolios({order.portfolio_id for order in triggered})
+            triggered = [order for order in triggered if order.portfolio_id in portfolios]
+            proposed = [
+                ProposedTrade(portfolios[order.portfolio_id], order.action, order.ticker, order.quantity, order.reasoning)
+                for order in triggered
+            ]
+            for order, result in zip(triggered, self.risk.validate(proposed, rich_data)):
+                if result.reason in QUOTE_REJECTS:
+                    self.orders.add(order)
+                    continue
+                detail = result.detail
+                if result.accepted:
                     try:
                         await self._execute_trade(
-                            agent.portfolio, 
-                            trade_req.action, 
-                            trade_req.ticker, 
-                            trade_req.quantity, 
-                            current_price, 
-                            decision.thoughts
+                            portfolios[order.portfolio_id],
+                            order.action,
+                            order.ticker,
+                            order.quantity,
+                            result.price,
+                            f"[{order.order_type.value} @ ${order.trigger_price:.2f}] {order.reasoning}"
                         )
                     except (InsufficientFundsError, ShortSellingError) as e:
-                        logger.warning(f"Trade rejected for {agent.name}: {e}")
-            
-                logger.info(f"   -> 🤖 {agent.name} (Rank #{rank}): {len(decision.trades)} Trades. Thoughts: {decision.thoughts[:50]}...")
-            
-            except Exception as e:
-                logger.error(f"❌ Error processing agent {agent.name}: {e}")
-                
-        # 9. Commit all changes (Atomic Cycle)
+                        detail = str(e)
+                    else:
+                        closed.append({"id": order.id, "status": OrderStatus.FILLED.value, "closed_at": now, "fill_price": result.price, "detail": None})
+                        continue
+                logger.warning(f"Triggered {order.order_type.value} order {order.id} rejected: {detail}")
+                closed.append({"id": order.id, "status": OrderStatus.REJECTED.value, "closed_at": now, "fill_price": None, "detail": detail})
+            await self.order_repo.close_many(closed)
+            await self.trade_repo.flush_buffer()
+
+        if not expired and not closed:
+            return
         await self.db.commit()
-        duration = (datetime.utcnow() - start_time).total_seconds()
-        logger.info(f"✅ Market Cycle Completed in {duration:.2f}s | Success: {len(agents)} Agents")
+        if self.book:
+            for portfolio in portfolios.values():
+                self.book.sync_portfolio(portfolio)
+        filled = sum(1 for row in closed if row["status"] == OrderStatus.FILLED.value)
+        logger.info(f"🎯 Orders: {filled} filled, {len(closed) - filled} rejected, {len(expired)} expired, {len(self.orders)} resting")
+
+    async def _order_portfolios(self, ids: Set[int]) -> Dict[int, Portfolio]:
+        portfolios = await self.portfolio_repo.get_many_with_positions(list(ids))
+        if self.book:
+            # Marks are written behind: concentration checks need the book's equity
+            for portfolio in portfolios:
+                state = self.book.portfolios.get(portfolio.id)
+                if state is not None:
+                    set_committed_value(portfolio, "total_equity", state.total_equity)
+        return {portfolio.id: portfolio for portfolio in portfolios}
+
+    async def _cycle_running(self, now: datetime) -> bool:
+        run = await self.cycle_run_repo.get_latest_unfinished()
+        return (
+            run is not None and run.status == CycleRunStatus.RUNNING.value
+            and run.heartbeat_at > now - timedelta(seconds=settings.CYCLE_RUN_STALE_SECONDS)
+        )
+
+    def market_closed(self) -> bool:
+        return self.calendar is not None and not self.calendar.is_open()
+
+    async def execute_market_cycle(self, force: bool = False, resume: bool = True):
+        """
+        Run one trading cycle through the streaming CyclePipeline (load -> decide -> execute -> persist).
+        While the exchange is closed the cycle is skipped (no quotes, no LLM calls) unless `force`.
+        With `resume`, an interrupted run (crash, deploy) is continued, skipping agents it already committed.
+        """
+        if self.market_closed() and not force:
+            logger.info(f"🌙 Market closed, skipping cycle (next open {self.calendar.next_open().isoformat()})")
+            return
+        from app.services.cycle_pipeline import CyclePipeline
+        await CyclePipeline(self, resume=resume).run()
+
+    def _portfolio_read(self, agent: Agent) -> PortfolioRead:
+        # Convert DB Portfolio to Pydantic for LLM
+        # We explicitly construct it to ensure clean data passed
+        positions_read = [
+            PositionRead(
+                ticker=p.ticker,
+                quantity=p.quantity,
+                avg_cost=p.avg_cost,
+                current_price=p.current_price
+            ) for p in agent.portfolio.positions
+        ]
+        open_orders = [
+            LLMTrade(action=o.action, ticker=o.ticker, quantity=o.quantity, order_type=o.order_type, trigger_price=o.trigger_price)
+            for o in self.orders.for_portfolio(agent.portfolio.id)
+        ]
+        return PortfolioRead(
+            id=agent.portfolio.id,
+            cash_balance=agent.portfolio.cash_balance,
+            total_equity=agent.portfolio.total_equity,
+            positions=positions_read,
+            open_orders=open_orders
+        )
+
+    def _audit_row(self, agent: Agent, portfolio_read: PortfolioRead, rich_data: MarketView, rank: int, gap: float, decision: LLMResponse) -> dict:
+        # Audit Log (Full Context)
+        # We store the exact data used for decision making
+        audit_context = {
+            "identity": {
+                "name": agent.name,
+                "persona": agent.persona
+            },
+            "gamification": {
+                "rank": rank,
+                "gap_to_leader": gap
+            },
+            "portfolio": portfolio_read.model_dump(),
+            "market_data_snapshot": rich_data.as_dict() # Store what was passed (shared per view, not copied)
+        }
+        response = decision.model_dump()
+        if decision.usage:
+            response["usage"] = decision.usage # Latency / attempts / tokens of this call
+        logger.info(f"   -> 🤖 {agent.name} (Rank #{rank}): {len(decision.trades)} Trades. Thoughts: {decision.thoughts[:50]}...")
+        return {
+            "agent_id": agent.id,
+            "prompt": audit_context,
+            "response": response,
+            "timestamp": datetime.utcnow()
+        }
+
+    async def _decide(self, agent: Agent, rich_data: MarketSnapshot, rank: int, gap: float) -> Tuple[LLMResponse, dict]:
+        """Ask the LLM for one agent's decision; returns it with its (unbuffered) audit row."""
+        portfolio_read = self._portfolio_read(agent)
+        rich_data = self.agent_market_data(agent, rich_data)
+        logger.info(f"   -> Asking {agent.provider} for {agent.name}...")
+        decision = await self.llm.generate_trade_decision(
+            agent_name=agent.name,
+            portfolio=portfolio_read,
+            market_data=rich_data, # Read-only view, its prompt JSON is cached
+            rank=rank,
+            leader_gap=gap,
+            persona=agent.persona, # Passing persona
+            provider=agent.provider
+        )
+        return decision, self._audit_row(agent, portfolio_read, rich_data, rank, gap, decision)
+
+    async def _decide_streaming(
+        self,
+        agent: Agent,
+        rich_data: MarketSnapshot,
+        rank: int,
+        gap: float,
+        hand_off: Callable[[LLMResponse, dict], Awaitable[None]]
+    ) -> Optional[Tuple[LLMResponse, dict]]:
+        """
+        Streamed decision. If the trades arrive before the thoughts, `hand_off(decision, audit_row)`
+        gets a provisional decision with empty thoughts; once the stream ends the thoughts are
+        written into it, its audit row and the trade rows already buffered, and None is returned.
+        Otherwise returns (decision, audit_row) like _decide.
+        """
+        portfolio_read = self._portfolio_read(agent)
+        rich_data = self.agent_market_data(agent, rich_data)
+        logger.info(f"   -> Streaming {agent.provider} decision for {agent.name}...")
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+
+        def on_trades(trades):
+            if not ready.done():
+                ready.set_result(trades)
+
+        call = asyncio.create_task(self.llm.stream_trade_decision(
+            agent_name=agent.name,
+            portfolio=portfolio_read,
+            market_data=rich_data,
+            rank=rank,
+            leader_gap=gap,
+            persona=agent.persona,
+            provider=agent.provider,
+            on_trades=on_trades
+        ))
+        try:
+            await asyncio.wait({ready, call}, return_when=asyncio.FIRST_COMPLETED)
+            if call.done():
+                decision = call.result()
+                return decision, self._audit_row(agent, portfolio_read, rich_data, rank, gap, decision)
+
+            decision = LLMResponse(thoughts="", trades=ready.result())
+            audit_row = self._audit_row(agent, portfolio_read, rich_data, rank, gap, decision)
+            pending = self._streaming[id(decision)] = {"rows": [], "executed": False, "done": loop.create_future()}
+            try:
+                await hand_off(decision, audit_row)
+                try:
+                    final = await call
+                    decision.thoughts = final.thoughts
+                    decision.usage = final.usage
+                except Exception as e:
+                    logger.warning(f"⚠️ {agent.name}: trades were handed off but the rest of the stream failed: {e}")
+                    audit_row["response"]["stream_error"] = str(e)
+                audit_row["response"]["thoughts"] = decision.thoughts
+                if decision.usage:
+                    audit_row["response"]["usage"] = decision.usage
+                for row in pending["rows"]:
+                    row["reasoning"] = decision.thoughts
+            finally:
+                del self._streaming[id(decision)]
+                pending["done"].set_result(None)
+            return None
+        finally:
+            call.cancel()
+
+    def unfinished_decisions(self) -> List["asyncio.Future"]:
+        """Executed streamed decisions whose thoughts are still streaming; their rows must not be flushed yet."""
+        return [pending["done"] for pending in self._streaming.values() if pending["executed"]]
+
+    async def _decide_batch(
+        self, ranked: List[Tuple[Agent, int, float]], rich_data: MarketSnapshot
+    ) -> List[Tuple[Agent, Union[Tuple[LLMResponse, dict], Exception]]]:
+        """Decisions for several agents through one shared-context LLM request (see LLMPort.generate_batch_decisions)."""
+        requests, reads, shared = [], {}, []
+        for agent, rank, gap in ranked:
+            key = str(agent.id)
+            reads[key] = self._portfolio_read(agent)
+            shared.extend(self.agent_market_data(agent, rich_data))
+            requests.append(AgentDecisionRequest(
+                key=key,
+                agent_name=agent.name,
+                portfolio=reads[key],
+                rank=rank,
+                leader_gap=gap,
+                persona=agent.persona or "",
+                provider=agent.provider
+            ))
+        logger.info(f"   -> Asking for {len(requests)} agents in one batch...")
+        # One shared context: the union of the group's watchlists and holdings
+        results = await self.llm.generate_batch_decisions(requests, rich_data.view(shared))
+
+        decided = []
+        for agent, rank, gap in ranked:
+            key = str(agent.id)
+            result = results.get(key)
+            if result is None:
+                result = LLMGenerationError("No decision returned for agent")
+            if isinstance(result, Exception):
+                decided.append((agent, result))
+                continue
+            audit_row = self._audit_row(agent, reads[key], self.agent_market_data(agent, rich_data), rank, gap, result)
+            decided.append((agent, (result, audit_row)))
+        return decided
+
+    async def _execute_decisions(self, decided: List[Tuple[Agent, LLMResponse, dict]], rich_data: Mapping[str, Mapping[str, Any]]) -> Tuple[int, int]:
+        """
+        Risk-check a batch of decisions as one order set, apply what passed and buffer
+        trades + audit rows for the next flush. LIMIT/STOP orders are buffered to rest
+        instead. Returns (executed, rejected) for the market orders.
+        """
+        proposed, proposed_audit = [], []
+        for agent, decision, audit_row in decided:
+            streaming = self._streaming.get(id(decision))
+            if streaming is not None:
+                streaming["executed"] = True
+            for trade_req in decision.trades:
+                if trade_req.order_type != OrderType.MARKET:
+                    self._place_order(agent, trade_req, decision.thoughts, rich_data, audit_row, streaming)
+                    continue
+                proposed.append(ProposedTrade(
+                    agent.portfolio, trade_req.action, trade_req.ticker, trade_req.quantity, decision.thoughts
+                ))
+                proposed_audit.append((audit_row, streaming))
+
+        results = self.risk.validate(proposed, rich_data)
+        rejected = 0
+        for result, (audit_row, streaming) in zip(results, proposed_audit):
+            audit_row["response"].setdefault("risk", []).append(result.to_dict())
+            if not result.accepted:
+                rejected += 1
+                logger.warning(f"Trade rejected ({result.reason.value}): {result.detail}")
+                continue
+            trade = result.trade
+            try:
+                row = await self._execute_trade(
+                    trade.portfolio,
+                    trade.action,
+                    trade.ticker,
+                    trade.quantity,
+                    result.price,
+                    trade.reasoning
+                )
+            except (InsufficientFundsError, ShortSellingError) as e:
+                rejected += 1
+                logger.warning(f"Trade rejected: {e}")
+                continue
+            if streaming is not None and row is not None:
+                streaming["rows"].append(row) # Reasoning is filled in when the thoughts finish
+
+        for _, _, audit_row in decided:
+            self.audit_repo.buffer(**audit_row)
+        return len(results) - rejected, rejected
+
+    def _place_order(
+        self,
+        agent: Agent,
+        trade_req: LLMTrade,
+        reasoning: str,
+        rich_data: Mapping[str, Mapping[str, Any]],
+        audit_row: dict,
+        streaming: Optional[dict]
+    ) -> bool:
+        """Buffer a LIMIT/STOP order; once committed it joins the order book on the next refresh."""
+        portfolio = agent.portfolio
+        open_count = len(self.orders.for_portfolio(portfolio.id)) + self.placed_orders.get(portfolio.id, 0)
+        quote = rich_data.get(trade_req.ticker) or {}
+        detail = ""
+        if not quote.get("price"):
+            detail = f"No price data for {trade_req.ticker}"
+        elif open_count >= settings.ORDER_MAX_OPEN_PER_AGENT:
+            detail = f"{open_count} orders already open (max {settings.ORDER_MAX_OPEN_PER_AGENT})"
+        audit_row["response"].setdefault("orders", []).append(
+            {**trade_req.model_dump(mode="json"), "accepted": not detail, "detail": detail}
+        )
+        if detail:
+            logger.warning(f"Order rejected: {detail}")
+            return False
+
+        now = datetime.utcnow()
+        row = self.order_repo.buffer(
+            agent_id=agent.id,
+            portfolio_id=portfolio.id,
+            ticker=trade_req.ticker,
+            action=trade_req.action.value,
+            order_type=trade_req.order_type.value,
+            quantity=trade_req.quantity,
+            trigger_price=trade_req.trigger_price,
+            status=OrderStatus.OPEN.value,
+            reasoning=reasoning,
+            created_at=now,
+            expires_at=now + timedelta(hours=settings.ORDER_TTL_HOURS) if settings.ORDER_TTL_HOURS else None
+        )
+        if streaming is not None:
+            streaming["rows"].append(row) # Reasoning is filled in when the thoughts finish
+        self.placed_orders[portfolio.id] = self.placed_orders.get(portfolio.id, 0) + 1
+        return True
 
     async def _execute_trade(
         self, 
@@ -221,13 +631,7 @@ class TradingService:
                 position.quantity += quantity
                 position.avg_cost = total_cost / position.quantity
             else:
-                position = Position(
-                    portfolio_id=portfolio.id,
-                    ticker=ticker,
-                    quantity=quantity,
-                    avg_cost=price
-                )
-                portfolio.positions.append(position)
+                self._open_position(portfolio, ticker, quantity, price)
                 
         elif action == TradeAction.SELL:
             position = next((p for p in portfolio.positions if p.ticker == ticker), None)
@@ -240,15 +644,11 @@ class TradingService:
             
             position.quantity -= quantity
             if position.quantity == 0:
-                # Remove position safely
-                 # Using session.delete is safer than list removal for ORM
-                await self.db.delete(position)
-                # Also remove from local list to avoid processing again if needed (though we break usually)
-                portfolio.positions.remove(position)
+                await self._close_position(portfolio, position)
         
         # Record Trade
-        trade = Trade(
-            portfolio_id=portfolio.id,
+        return self._record_trade(
+            portfolio,
             ticker=ticker,
             action=action.value, # Store enum value
             quantity=quantity,
@@ -256,4 +656,25 @@ class TradingService:
             reasoning=reasoning,
             pnl_realized=pnl if action == TradeAction.SELL else None
         )
-        self.db.add(trade)
+
+    # --- Persistence hooks for _execute_trade ---
+    # The backtest engine overrides these to keep the same rules on in-memory state.
+
+    def _open_position(self, portfolio: Portfolio, ticker: str, quantity: int, price: float):
+        position = Position(
+            portfolio_id=portfolio.id,
+            ticker=ticker,
+            quantity=quantity,
+            avg_cost=price
+        )
+        portfolio.positions.append(position)
+
+    async def _close_position(self, portfolio: Portfolio, position: Position):
+        # Remove position safely
+        # Using session.delete is safer than list removal for ORM
+        await self.db.delete(position)
+        # Also remove from local list to avoid processing again if needed (though we break usually)
+        portfolio.positions.remove(position)
+
+    def _record_trade(self, portfolio: Portfolio, **fields) -> dict:
+        return self.trade_repo.buffer(portfolio_id=portfolio.id, timestamp=datetime.utcnow(), **fields)
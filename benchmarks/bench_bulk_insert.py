@@ -0,0 +1,124 @@
+"""
+Benchmark for the commit phase of a market cycle (trades + audit logs).
+
+Compares per-object `session.add` (row-by-row INSERT ... RETURNING at flush) with
+the repositories' buffered bulk path (executemany on SQLite, COPY on Postgres).
+Point DATABASE_URL at a scratch Postgres database to measure the COPY path.
+
+Usage:
+    python -m benchmarks.bench_bulk_insert --agents 1000 10000 --trades 2
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+
+_DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_bulk_insert.db")
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_DB_FILE}")
+
+from sqlalchemy import delete, insert, select
+
+from app.core.database import engine, SessionLocal
+from app.domain.models import Base, Agent, Portfolio, Trade, AuditLog, User
+from app.repositories.audit_repository import AuditLogRepository
+from app.repositories.trade_repository import TradeRepository
+
+TICKERS = ["AAPL", "GOOGL", "MSFT", "TSLA", "NVDA", "AMD", "META", "AMZN", "NFLX", "PYPL"]
+AUDIT_PROMPT = {
+    "identity": {"name": "Bench", "persona": "Benchmark trader."},
+    "market_data_snapshot": {t: {"price": 100.0, "rsi_14": 50.0, "sma_50": 98.0} for t in TICKERS},
+}
+AUDIT_RESPONSE = {"thoughts": "Benchmark thoughts " * 10, "trades": [{"ticker": "AAPL", "action": "BUY", "quantity": 1}]}
+
+
+async def seed(n_agents: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with SessionLocal() as session:
+        user = User(username="bench", hashed_password="x")
+        session.add(user)
+        await session.flush()
+        agents = [Agent(name=f"Agent{i}", persona="Benchmark trader.", owner_id=user.id) for i in range(n_agents)]
+        session.add_all(agents)
+        await session.flush()
+        await session.execute(insert(Portfolio), [{"agent_id": a.id, "cash_balance": 10000.0, "total_equity": 10000.0} for a in agents])
+        await session.commit()
+        rows = await session.execute(select(Portfolio.agent_id, Portfolio.id))
+        return rows.all()
+
+
+def trade_fields(j: int) -> dict:
+    return {"ticker": TICKERS[j % len(TICKERS)], "action": "BUY", "quantity": 1, "price": 100.0,
+            "reasoning": "Benchmark reasoning", "pnl_realized": None}
+
+
+async def orm_cycle(pairs, n_trades: int) -> float:
+    async with SessionLocal() as session:
+        for agent_id, portfolio_id in pairs:
+            session.add(AuditLog(agent_id=agent_id, prompt=AUDIT_PROMPT, response=AUDIT_RESPONSE))
+            for j in range(n_trades):
+                session.add(Trade(portfolio_id=portfolio_id, **trade_fields(j)))
+        t0 = time.perf_counter()
+        await session.commit()
+        return time.perf_counter() - t0
+
+
+async def bulk_cycle(pairs, n_trades: int) -> float:
+    async with SessionLocal() as session:
+        trades = TradeRepository(Trade, session)
+        audits = AuditLogRepository(AuditLog, session)
+        now = datetime.utcnow()
+        for agent_id, portfolio_id in pairs:
+            audits.buffer(agent_id=agent_id, prompt=AUDIT_PROMPT, response=AUDIT_RESPONSE, timestamp=now)
+            for j in range(n_trades):
+                trades.buffer(portfolio_id=portfolio_id, timestamp=now, **trade_fields(j))
+        t0 = time.perf_counter()
+        await trades.flush_buffer()
+        await audits.flush_buffer()
+        await session.commit()
+        return time.perf_counter() - t0
+
+
+async def reset():
+    async with SessionLocal() as session:
+        await session.execute(delete(Trade))
+        await session.execute(delete(AuditLog))
+        await session.commit()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--trades", type=int, default=2, help="Trades per agent per cycle")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Dialect: {engine.dialect.name} ({engine.dialect.driver})")
+    for n_agents in args.agents:
+        pairs = await seed(n_agents)
+        rows = n_agents * (args.trades + 1)
+        print(f"{n_agents} agents: {n_agents * args.trades} trades + {n_agents} audit logs per cycle")
+
+        results = {}
+        for label, fn in (("orm add + commit", orm_cycle), ("bulk flush + commit", bulk_cycle)):
+            timings = []
+            for _ in range(args.repeat):
+                timings.append(await fn(pairs, args.trades))
+                await reset()
+            results[label] = best = min(timings)
+            print(f"  {label:<22} {best * 1000:9.1f} ms  {rows / best:10.0f} rows/s")
+        orm, bulk = results.values()
+        print(f"  -> commit phase {orm / bulk:.1f}x faster ({(1 - bulk / orm) * 100:.0f}% less time)")
+
+    await engine.dispose()
+    if os.path.exists(_DB_FILE):
+        os.remove(_DB_FILE)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
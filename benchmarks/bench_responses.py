@@ -0,0 +1,148 @@
+"""
+Benchmark for the heavy read endpoints (leaderboard and agent detail).
+
+Compares the ORM + `response_model` validation path with the projection +
+FastJSONResponse path on a throwaway SQLite database.
+
+Usage:
+    python -m benchmarks.bench_responses --agents 2000 --positions 5 --trades 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import warnings
+
+_DB_FILE = os.path.join(tempfile.mkdtemp(), "bench_responses.db")
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DB_FILE}"
+
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import select, insert
+from sqlalchemy.orm import selectinload
+
+from app.core.database import engine, SessionLocal
+from app.core.responses import dumps
+from app.domain.models import Base, Agent, Portfolio, Position, Trade, AuditLog, User
+from app.domain.schemas import AgentRead, AgentDetail
+from app.repositories.agent_repository import AgentRepository
+
+TICKERS = ["AAPL", "GOOGL", "MSFT", "TSLA", "NVDA", "AMD", "META", "AMZN", "NFLX", "PYPL"]
+
+
+async def seed(n_agents: int, n_positions: int, n_trades: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with SessionLocal() as session:
+        user = User(username="bench", hashed_password="x")
+        session.add(user)
+        await session.flush()
+
+        agents = [Agent(name=f"Agent{i}", persona="Benchmark trader.", owner_id=user.id) for i in range(n_agents)]
+        session.add_all(agents)
+        await session.flush()
+
+        portfolios = [Portfolio(agent_id=a.id, cash_balance=10000.0, total_equity=10000.0) for a in agents]
+        session.add_all(portfolios)
+        await session.flush()
+
+        await session.execute(insert(Position), [
+            {"portfolio_id": p.id, "ticker": TICKERS[j % len(TICKERS)], "quantity": 10,
+             "avg_cost": 100.0, "current_price": 100.0 + random.random() * 10}
+            for p in portfolios for j in range(n_positions)
+        ])
+
+        # Detail payload: one agent with a long trade and audit history
+        detail_portfolio = portfolios[0]
+        await session.execute(insert(Trade), [
+            {"portfolio_id": detail_portfolio.id, "ticker": TICKERS[j % len(TICKERS)], "action": "BUY",
+             "quantity": 1, "price": 100.0, "reasoning": "Benchmark reasoning " * 10}
+            for j in range(n_trades)
+        ])
+        await session.execute(insert(AuditLog), [
+            {"agent_id": agents[0].id,
+             "prompt": {"market_data_snapshot": {t: {"price": 100.0, "rsi_14": 50.0} for t in TICKERS}},
+             "response": {"thoughts": "Benchmark thoughts " * 20, "trades": []}}
+            for _ in range(n_trades)
+        ])
+        await session.commit()
+        return agents[0].id
+
+
+async def legacy_leaderboard() -> bytes:
+    async with SessionLocal() as session:
+        agents = await AgentRepository(Agent, session).get_all_with_portfolios()
+        adapter = TypeAdapter(List[AgentRead])
+        return json.dumps(adapter.dump_python(adapter.validate_python(agents), mode="json")).encode()
+
+
+async def fast_leaderboard() -> bytes:
+    async with SessionLocal() as session:
+        return dumps(await AgentRepository(Agent, session).get_agent_rows())
+
+
+async def legacy_detail(agent_id) -> bytes:
+    async with SessionLocal() as session:
+        stmt = select(Agent).where(Agent.id == agent_id).options(
+            selectinload(Agent.portfolio).selectinload(Portfolio.positions),
+            selectinload(Agent.portfolio).selectinload(Portfolio.trades),
+            selectinload(Agent.audit_logs),
+            selectinload(Agent.owner)
+        )
+        agent = (await session.execute(stmt)).scalars().first()
+        detail = AgentDetail.model_validate(agent)
+        detail.trades = agent.portfolio.trades
+        with warnings.catch_warnings():
+            # The handler assigned ORM trades after validation; Pydantic warns on the raw enum strings
+            warnings.simplefilter("ignore")
+            return detail.model_dump_json().encode()
+
+
+async def fast_detail(agent_id) -> bytes:
+    async with SessionLocal() as session:
+        return dumps(await AgentRepository(Agent, session).get_agent_detail_row(agent_id))
+
+
+async def timeit(label: str, fn, repeat: int) -> float:
+    await fn()  # warm up
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        payload = await fn()
+    elapsed = (time.perf_counter() - t0) / repeat
+    print(f"  {label:<22} {elapsed * 1000:9.1f} ms/req  {1 / elapsed:8.1f} req/s  ({len(payload) / 1024:.0f} KiB)")
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=2000)
+    parser.add_argument("--positions", type=int, default=5)
+    parser.add_argument("--trades", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.agents} agents x {args.positions} positions, {args.trades} trades/audit logs...")
+    agent_id = await seed(args.agents, args.positions, args.trades)
+
+    print("GET /agents/ (leaderboard)")
+    legacy = await timeit("orm + response_model", legacy_leaderboard, args.repeat)
+    fast = await timeit("projection + fast json", fast_leaderboard, args.repeat)
+    print(f"  -> {legacy / fast:.1f}x throughput")
+
+    print("GET /agents/{id} (detail)")
+    legacy = await timeit("orm + response_model", lambda: legacy_detail(agent_id), args.repeat)
+    fast = await timeit("projection + fast json", lambda: fast_detail(agent_id), args.repeat)
+    print(f"  -> {legacy / fast:.1f}x throughput")
+
+    await engine.dispose()
+    os.remove(_DB_FILE)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,191 @@
+"""
+Synthetic large dataset for load tests: users owning agents, with portfolios,
+positions, trades and audit logs, written in bulk (executemany on SQLite, COPY on
+Postgres). The same --seed always produces the same rows.
+
+Trades and audit logs are spread over agents with a heavy tail, so a few agents
+carry long histories (the worst case for GET /agents/{id}) while most are light.
+
+Usage:
+    python -m benchmarks.dataset --db loadtest.db --reset
+    python -m benchmarks.dataset --database-url postgresql+asyncpg://localhost/loadtest --reset \\
+        --agents 10000 --positions 100000 --trades 1000000 --audit-logs 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+DEFAULT_DB = "loadtest.db"
+LOADTEST_PASSWORD = "loadtest"
+TICKERS = ["AAPL", "GOOGL", "MSFT", "TSLA", "NVDA", "AMD", "META", "AMZN", "NFLX", "PYPL"]
+PERSONAS = [
+    "Momentum trader riding breakouts in large-cap tech.",
+    "Value investor buying quality names on deep pullbacks.",
+    "Volatility scalper trading intraday swings.",
+    "Conservative long-term growth investor.",
+]
+
+
+def configure_database(db: str = None, database_url: str = None) -> str:
+    """Point the app at the load-test database; call before importing any app module."""
+    url = database_url or f"sqlite+aiosqlite:///{db or DEFAULT_DB}"
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("GOOGLE_API_KEY", "loadtest")
+    os.environ.setdefault("SCHEDULER_ENABLED", "false")
+    os.environ.setdefault("DB_INIT_ON_STARTUP", "false")
+    os.environ["DB_QUERY_STATS_ENABLED"] = os.environ["DB_QUERY_STATS_HEADERS"] = "true" # Read by the load test
+    return url
+
+
+def spread(total: int, n: int, rng: random.Random) -> List[int]:
+    """Split `total` rows over `n` owners with lognormal weights (exact sum)."""
+    if n == 0:
+        return []
+    weights = [rng.lognormvariate(0, 1.2) for _ in range(n)]
+    scale = total / sum(weights)
+    counts = [int(w * scale) for w in weights]
+    for i in rng.sample(range(n), total - sum(counts)):
+        counts[i] += 1
+    return counts
+
+
+def quote(rng: random.Random) -> dict:
+    price = round(rng.uniform(20, 900), 2)
+    return {
+        "price": price,
+        "daily_return_pct": round(rng.gauss(0, 2), 2),
+        "rsi_14": round(rng.uniform(20, 80), 1),
+        "sma_50": round(price * rng.uniform(0.9, 1.1), 2),
+        "macd_hist": round(rng.gauss(0, 1), 3),
+        "is_fallback": False,
+    }
+
+
+async def generate(args):
+    from sqlalchemy import func, insert, select
+
+    from app.core.database import SessionLocal, engine
+    from app.core.security import get_password_hash
+    from app.domain.models import Agent, AuditLog, Base, Portfolio, Position, Trade, User
+    from app.repositories.audit_repository import AuditLogRepository
+    from app.repositories.base import BulkInsertRepository
+    from app.repositories.trade_repository import TradeRepository
+    from app.services.bootstrap import create_schema, seed_defaults
+
+    rng = random.Random(args.seed)
+    t0 = time.perf_counter()
+    if args.reset:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+    await create_schema(engine)
+
+    async with SessionLocal() as session:
+        await seed_defaults(session)
+        if (await session.execute(select(func.count()).select_from(User).where(User.username.like("load_%")))).scalar():
+            raise SystemExit("Load-test rows already present; pass --reset to regenerate")
+
+        hashed = get_password_hash(LOADTEST_PASSWORD)
+        await session.execute(insert(User), [
+            {"username": f"load_{i:06d}", "hashed_password": hashed, "is_admin": False, "avatar_id": 1 + i % 8,
+             "first_name": f"Load{i}", "last_name": "Tester"}
+            for i in range(args.users)
+        ])
+        user_ids = (await session.execute(
+            select(User.id).where(User.username.like("load_%")).order_by(User.id)
+        )).scalars().all()
+
+        agents = [
+            {"id": uuid.UUID(int=rng.getrandbits(128), version=4), "name": f"LoadAgent{i:06d}", "provider": "gemini",
+             "persona": PERSONAS[i % len(PERSONAS)], "owner_id": user_ids[i % len(user_ids)]}
+            for i in range(args.agents)
+        ]
+        await session.execute(insert(Agent), agents)
+        await session.execute(insert(Portfolio), [
+            {"agent_id": a["id"], "cash_balance": round(rng.uniform(0, 10000), 2), "total_equity": round(rng.uniform(5000, 20000), 2)}
+            for a in agents
+        ])
+        portfolio_ids = dict((await session.execute(select(Portfolio.agent_id, Portfolio.id))).all())
+        await session.commit()
+        print(f"  {args.users} users, {args.agents} agents + portfolios ({time.perf_counter() - t0:.1f}s)")
+
+        # Evenly spread, one position per (portfolio, ticker)
+        positions = BulkInsertRepository(Position, session)
+        per_agent, extra = divmod(args.positions, len(agents))
+        for i, agent in enumerate(agents):
+            for ticker in rng.sample(TICKERS, per_agent + (i < extra)):
+                price = round(rng.uniform(20, 900), 2)
+                positions.buffer(portfolio_id=portfolio_ids[agent["id"]], ticker=ticker, quantity=rng.randint(1, 200),
+                                 avg_cost=round(price * rng.uniform(0.8, 1.2), 2), current_price=price)
+            if positions.pending >= args.chunk:
+                await positions.flush_buffer()
+                await session.commit()
+        await positions.flush_buffer()
+        await session.commit()
+        print(f"  {args.positions} positions ({time.perf_counter() - t0:.1f}s)")
+
+        now = datetime.utcnow()
+        horizon = args.days * 86400
+        trades = TradeRepository(Trade, session)
+        for agent, count in zip(agents, spread(args.trades, len(agents), rng)):
+            pid = portfolio_ids[agent["id"]]
+            for _ in range(count):
+                action = "BUY" if rng.random() < 0.55 else "SELL"
+                trades.buffer(portfolio_id=pid, ticker=rng.choice(TICKERS), action=action, quantity=rng.randint(1, 50),
+                              price=round(rng.uniform(20, 900), 2), reasoning="Synthetic load-test trade.",
+                              timestamp=now - timedelta(seconds=rng.randrange(horizon)),
+                              pnl_realized=round(rng.gauss(0, 150), 2) if action == "SELL" else None)
+            if trades.pending >= args.chunk:
+                await trades.flush_buffer()
+                await session.commit()
+        await trades.flush_buffer()
+        await session.commit()
+        print(f"  {args.trades} trades ({time.perf_counter() - t0:.1f}s)")
+
+        # A handful of distinct payloads, shared across rows to keep generation fast
+        prompts = [{"identity": {"persona": p}, "market_data_snapshot": {t: quote(rng) for t in TICKERS}} for p in PERSONAS]
+        responses = [{"thoughts": "Synthetic load-test reasoning. " * 8,
+                      "trades": [{"ticker": t, "action": "BUY", "quantity": 5}]} for t in TICKERS]
+        audits = AuditLogRepository(AuditLog, session)
+        for agent, count in zip(agents, spread(args.audit_logs, len(agents), rng)):
+            for _ in range(count):
+                audits.buffer(agent_id=agent["id"], prompt=rng.choice(prompts), response=rng.choice(responses),
+                              timestamp=now - timedelta(seconds=rng.randrange(horizon)))
+            if audits.pending >= args.chunk:
+                await audits.flush_buffer()
+                await session.commit()
+        await audits.flush_buffer()
+        await session.commit()
+        print(f"  {args.audit_logs} audit logs ({time.perf_counter() - t0:.1f}s)")
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite file (ignored with --database-url)")
+    parser.add_argument("--database-url", help="e.g. postgresql+asyncpg://localhost/loadtest")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--agents", type=int, default=10000)
+    parser.add_argument("--positions", type=int, default=100000, help=f"Total, at most {len(TICKERS)} per agent")
+    parser.add_argument("--trades", type=int, default=1000000)
+    parser.add_argument("--audit-logs", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=180, help="History spanned by trade/audit timestamps")
+    parser.add_argument("--chunk", type=int, default=20000, help="Rows per bulk write")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.positions > args.agents * len(TICKERS):
+        parser.error(f"--positions is at most {len(TICKERS)} per agent")
+
+    url = configure_database(args.db, args.database_url)
+    print(f"Generating load-test dataset into {url}")
+    asyncio.run(generate(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Load scenarios against the FastAPI app, in-process (httpx ASGI transport, no
+network), on a dataset from `benchmarks.dataset`.
+
+Each endpoint runs alone for --requests requests at --concurrency. For each one it
+reports throughput, p50/p95/p99 latency, SQL statements and DB time per request
+(from the X-DB-* headers, with requests flagged for N+1 suspects), and peak RSS
+(with its growth during the scenario, since earlier scenarios raise the baseline).
+Results are saved as JSON keyed by commit, so runs can be compared across commits.
+
+Usage:
+    python -m benchmarks.dataset --db loadtest.db --reset
+    python -m benchmarks.load_test --db loadtest.db --requests 500 --concurrency 16
+    python -m benchmarks.load_test --db loadtest.db --compare benchmarks/results/<sha>.json
+    python -m benchmarks.load_test --db loadtest.db --only agents_me agent_detail
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.dataset import configure_database
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))]
+
+
+def rss_bytes() -> int:
+    """Current resident set size; the process high-water mark where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def git_revision() -> Dict[str, Any]:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": "unknown", "dirty": False}
+    return {"commit": sha, "dirty": dirty}
+
+
+class Fixtures:
+    """Sample of agents and users to address, and bearer tokens for their owners."""
+
+    def __init__(self, agents: List[Any], users: List[Any], rng: random.Random):
+        from app.core.security import create_access_token
+
+        self.rng = rng
+        self.agent_ids = [str(agent_id) for agent_id in agents]
+        self.usernames = [username for _, username in users]
+        self.tokens = [create_access_token(subject=user_id) for user_id, _ in users]
+
+    def auth(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.rng.choice(self.tokens)}"}
+
+
+# name -> request factory: (fixtures) -> (path, headers)
+SCENARIOS: Dict[str, Callable[[Fixtures], tuple]] = {
+    "leaderboard": lambda fx: ("/agents/", {}),
+    "agent_detail": lambda fx: (f"/agents/{fx.rng.choice(fx.agent_ids)}", fx.auth()),
+    "agents_me": lambda fx: ("/agents/me", fx.auth()),
+    "public_profile": lambda fx: (f"/users/{fx.rng.choice(fx.usernames)}/public", {}),
+}
+
+
+async def load_fixtures(sample: int, rng: random.Random) -> Fixtures:
+    from sqlalchemy import func, select
+
+    from app.core.database import SessionLocal
+    from app.domain.models import Agent, User
+
+    async with SessionLocal() as session:
+        agents = (await session.execute(select(Agent.id).order_by(func.random()).limit(sample))).scalars().all()
+        users = (await session.execute(
+            select(User.id, User.username).where(User.agents.any()).order_by(func.random()).limit(sample)
+        )).all()
+    if not agents or not users:
+        raise SystemExit("No agents/users found; generate a dataset first (python -m benchmarks.dataset)")
+    return Fixtures(agents, users, rng)
+
+
+async def dataset_counts() -> Dict[str, int]:
+    from sqlalchemy import func, select
+
+    from app.core.database import SessionLocal
+    from app.domain.models import Agent, AuditLog, Position, Trade, User
+
+    async with SessionLocal() as session:
+        return {
+            model.__tablename__: (await session.execute(select(func.count()).select_from(model))).scalar()
+            for model in (User, Agent, Position, Trade, AuditLog)
+        }
+
+
+async def run_scenario(client, fixtures: Fixtures, build: Callable, n_requests: int, concurrency: int,
+                       warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        path, headers = build(fixtures)
+        await client.get(path, headers=headers)
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    queries: List[int] = []
+    db_time = 0.0
+    n_plus_one = 0
+    response_bytes = 0
+    remaining = n_requests
+
+    async def worker():
+        nonlocal remaining, response_bytes, db_time, n_plus_one
+        while remaining > 0:
+            remaining -= 1
+            path, headers = build(fixtures)
+            t0 = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - t0)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            response_bytes += len(response.content)
+            # Per-request SQL stats from QueryStatsMiddleware
+            queries.append(int(response.headers.get("x-db-queries", 0)))
+            db_time += float(response.headers.get("x-db-time-ms", 0))
+            n_plus_one += int(response.headers.get("x-db-n1-suspects", 0)) > 0
+
+    start_rss = peak_rss = rss_bytes()
+    done = asyncio.Event()
+
+    async def sample_rss():
+        nonlocal peak_rss
+        while not done.is_set():
+            peak_rss = max(peak_rss, rss_bytes())
+            await asyncio.sleep(0.01)
+
+    sampler = asyncio.create_task(sample_rss())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    done.set()
+    await sampler
+    peak_rss = max(peak_rss, rss_bytes())
+
+    latencies.sort()
+    ms = lambda p: round(percentile(latencies, p) * 1000, 2)
+    return {
+        "requests": len(latencies),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": ms(50),
+        "p95_ms": ms(95),
+        "p99_ms": ms(99),
+        "max_ms": round(latencies[-1] * 1000, 2),
+        "queries_per_request": round(sum(queries) / len(queries), 2),
+        "max_queries": max(queries),
+        "db_ms_per_request": round(db_time / len(latencies), 2),
+        "n_plus_one_requests": n_plus_one,
+        "avg_response_kib": round(response_bytes / len(latencies) / 1024, 1),
+        "peak_rss_mib": round(peak_rss / 2 ** 20, 1),
+        "rss_growth_mib": round((peak_rss - start_rss) / 2 ** 20, 1),
+    }
+
+
+def print_table(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]] = None):
+    header = f"  {'scenario':<16}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'DB ms':>8}{'KiB':>8}{'RSS MiB':>9}{'+RSS':>7}{'errors':>8}"
+    print(header)
+    for name, r in results.items():
+        print(f"  {name:<16}{r['throughput_rps']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+              f"{r['queries_per_request']:>9.1f}{r['db_ms_per_request']:>8.1f}{r['avg_response_kib']:>8.1f}{r['peak_rss_mib']:>9.1f}{r['rss_growth_mib']:>7.1f}{r['errors']:>8}")
+    if not baseline:
+        return
+
+    print(f"\nvs {baseline['meta']['commit']}{' (dirty)' if baseline['meta']['dirty'] else ''} ({baseline['meta']['created_at']}):")
+    change = lambda new, old: f"{(new / old - 1) * 100:+.0f}%" if old else "n/a"
+    print(f"  {'scenario':<16}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}{'RSS':>9}")
+    for name, r in results.items():
+        old = baseline["scenarios"].get(name)
+        if not old:
+            print(f"  {name:<16}{'(new scenario)':>20}")
+            continue
+        print(f"  {name:<16}{change(r['throughput_rps'], old['throughput_rps']):>9}{change(r['p50_ms'], old['p50_ms']):>9}"
+              f"{change(r['p95_ms'], old['p95_ms']):>9}{change(r['p99_ms'], old['p99_ms']):>9}"
+              f"{r['queries_per_request'] - old['queries_per_request']:>+9.1f}{change(r['peak_rss_mib'], old['peak_rss_mib']):>9}")
+
+
+async def main(args):
+    import httpx
+
+    from app.core.config import settings
+    from app.core.database import engine
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    fixtures = await load_fixtures(args.sample, rng)
+    counts = await dataset_counts()
+    meta = {
+        **git_revision(),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "dialect": f"{engine.dialect.name}+{engine.dialect.driver}",
+        "dataset": counts,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    print(f"Commit {meta['commit']}{' (dirty)' if meta['dirty'] else ''}, {meta['dialect']}, "
+          + ", ".join(f"{n} {table}" for table, n in counts.items()))
+    print(f"{args.requests} requests per scenario, concurrency {args.concurrency}\n")
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url=f"http://loadtest{settings.API_V1_STR}", timeout=None) as client:
+        for name in args.only or SCENARIOS:
+            results[name] = await run_scenario(
+                client, fixtures, SCENARIOS[name], args.requests, args.concurrency, args.warmup
+            )
+            print(f"  ✓ {name}: {results[name]['throughput_rps']} req/s, p95 {results[name]['p95_ms']} ms")
+    await engine.dispose()
+
+    print()
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{meta['commit']}{'-dirty' if meta['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "scenarios": results}, f, indent=2)
+    print(f"\nSaved {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="SQLite file from benchmarks.dataset (default: loadtest.db)")
+    parser.add_argument("--database-url", help="e.g. postgresql+asyncpg://localhost/loadtest")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per scenario")
+    parser.add_argument("--sample", type=int, default=500, help="Agents/users drawn as request targets")
+    parser.add_argument("--only", nargs="+", choices=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help=f"Results file (default: {os.path.relpath(RESULTS_DIR)}/<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to diff against")
+    args = parser.parse_args()
+
+    configure_database(args.db, args.database_url)
+    asyncio.run(main(args))